@@ -4,80 +4,246 @@ Science Agent with LangChain, PubMed Integration, and Memory Support
 
 import os
 import json
+import time
 import asyncio
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Any, Optional, Callable, AsyncIterator
 from datetime import datetime
 import logging
 
+import yaml
+
 # LangChain imports
-from langchain_openai import ChatOpenAI
-from langchain.agents import AgentExecutor, create_openai_functions_agent
+from langchain.agents import AgentExecutor
+from langchain.agents.format_scratchpad import format_to_openai_function_messages
+from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+from langchain.agents.output_parsers import OpenAIFunctionsAgentOutputParser
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
 from langchain.tools import Tool, BaseTool
 from langchain.memory import ConversationBufferWindowMemory
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnablePassthrough
+from langchain_core.utils.function_calling import convert_to_openai_function, convert_to_openai_tool
 
 # RDF and SPARQL imports
 import sys
 sys.path.append('../shared')
 from sparql_utils import SPARQLQueryGenerator, RDFKnowledgeBase
 
-@dataclass
-class EvidenceAnalysis:
-    study_type: str
-    sample_size: int
-    evidence_quality: str
-    findings: List[str]
-    limitations: List[str]
-    clinical_relevance: str
-    citation_count: int
-    publication_date: str
+import vector_index
+import rdf_compile
+from hybrid_retrieval import HybridRetriever
+from sparql_engine import SPARQLEngine
+from memory_store import UserMemoryStore
+from scheduler import AdmissionScheduler, SchedulerOverloaded
+from embeddings import embedding_spec, create_embeddings, CachedEmbeddings
+from ingest import load_manifest
+from pubmed_client import PubMedClient
+from baseline_runner import BaselineRunner
+from llm_backends import create_llm
+from tracing import Span, Tracer, TraceCallbackHandler, annotate, start_metrics_server
+from response_cache import ResponseCache, knowledge_version
+from context_assembler import ContextAssembler
+from response_evaluator import ResponseEvaluator
+from claim_batch import ClaimBatchValidator
+from claim_index import ClaimEvidenceIndex
+from meta_analysis import parse_studies, synthesize
+from literature_store import LiteratureStore
+from evidence_classifier import EvidenceClassifier
+from tool_runtime import threaded_coroutine, with_timeout
+from results import (
+    EvidenceAssessment, ResearchTrends, ClaimValidation, MetaAnalysisSynthesis, PubMedSearchResult, serialize
+)
 
 class ScienceAgent:
     """
     Cannabis Science Agent with PubMed Integration, Evidence Analysis, and Memory
     """
     
-    def __init__(self, agent_path: str = "."):
+    def __init__(self, agent_path: str = ".", lazy: Optional[bool] = None):
         self.agent_path = agent_path
-        self.memory_store = {}  # User-specific conversation memory
+        
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+        
+        self.config = self._load_config()
+        self.context_assembler = ContextAssembler.from_config(self.config)
+        self.evidence_classifier = EvidenceClassifier.from_config(self.config.get("specialization", {}))
+        self.memory_store = UserMemoryStore.from_config(
+            self.config.get("memory", {}), agent_path, summarizer=self.context_assembler.summarize
+        )  # User-specific conversation memory
+        self.scheduler = AdmissionScheduler.from_config(self.config.get("concurrency", {}))
+        tracing_config = self.config.get("tracing", {})
+        self.tracer = Tracer.from_config(tracing_config, agent_path)
+        self.metrics_server = None
+        if tracing_config.get("metrics_port"):
+            self.metrics_server = start_metrics_server(
+                self.tracer.metrics, tracing_config.get("metrics_host", "127.0.0.1"), tracing_config["metrics_port"]
+            )
+        startup_config = self.config.get("startup", {})
+        self.lazy = startup_config.get("lazy", False) if lazy is None else lazy
+        self.startup_timings: Dict[str, float] = {}
+        
+        self.llm = None
+        self.retriever = None
+        self.vectorstore = None
+        self.hybrid_retriever = None
+        self.rdf_kb = None
+        self.sparql_generator = None
+        self.sparql_engine = None
+        self.pubmed_client = None
+        self.literature_store = None
+        self.claim_index = None
+        self.response_cache = None
+        # CPU-bound tools run here, off the event loop shared by concurrent tool calls
+        self.tool_executor = ThreadPoolExecutor(
+            max_workers=self.config.get("execution", {}).get("tool_workers", 4),
+            thread_name_prefix="science-agent-tool"
+        )
+        self._pending_components: Dict[str, Future] = {}
+        self._agent_ready = False
+        self._agent_lock = threading.Lock()
         
         # Initialize components
-        self._initialize_llm()
-        self._initialize_retriever()
-        self._initialize_rdf_knowledge()
-        self._initialize_tools()
-        self._initialize_agent()
+        components = {
+            "llm": self._initialize_llm,
+            "pubmed": self._initialize_pubmed,
+            "retriever": self._initialize_retriever,
+            "rdf_knowledge": self._initialize_rdf_knowledge,
+            "literature": self._initialize_literature_store,
+            "claim_index": self._initialize_claim_index,
+        }
+        if self.lazy:
+            # Load subsystems in the background; the agent is assembled on first use
+            executor = ThreadPoolExecutor(
+                max_workers=len(components),
+                thread_name_prefix="science-agent-init"
+            )
+            for name, initializer in components.items():
+                self._pending_components[name] = executor.submit(self._timed_phase, name, initializer)
+            executor.shutdown(wait=False)
+        else:
+            for name, initializer in components.items():
+                self._timed_phase(name, initializer)
+            self._ensure_agent()
         
         # Load test questions
         self.baseline_questions = self._load_baseline_questions()
+        self.response_evaluator = ResponseEvaluator.from_config(
+            self.baseline_questions, self.config.get("baseline_testing", {})
+        )
+    
+    def _load_config(self) -> Dict[str, Any]:
+        """Load agent configuration"""
+        try:
+            config_path = os.path.join(self.agent_path, "agent_config.yaml")
+            if os.path.exists(config_path):
+                with open(config_path, 'r') as f:
+                    return yaml.safe_load(f) or {}
+            return {}
+        except Exception as e:
+            self.logger.error(f"Failed to load agent config: {e}")
+            return {}
+    
+    def _timed_phase(self, name: str, initializer: Callable[[], None]):
+        """Run a startup phase and record how long it took"""
+        start = time.perf_counter()
+        try:
+            initializer()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.startup_timings[name] = elapsed
+            self.logger.info(f"Startup phase '{name}' took {elapsed:.3f}s")
+    
+    def _ensure_ready(self, *components: str):
+        """Block until the given background-loaded components are available"""
+        for name in components:
+            future = self._pending_components.get(name)
+            if future is not None:
+                future.result()
+    
+    def _ensure_agent(self):
+        """Assemble tools and the agent executor once their components are loaded"""
+        if self._agent_ready:
+            return
+        with self._agent_lock:
+            if self._agent_ready:
+                return
+            self._ensure_ready("llm", "pubmed", "retriever", "rdf_knowledge", "literature")
+            self._timed_phase("tools", self._initialize_tools)
+            self._timed_phase("agent", self._initialize_agent)
+            self._timed_phase("response_cache", self._initialize_response_cache)
+            self._agent_ready = True
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Get admission queue depth and concurrency counters"""
+        return self.scheduler.stats()
+    
+    def get_response_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache size and hit counters"""
+        return self.response_cache.stats() if self.response_cache else {"enabled": False}
+    
+    def get_metrics(self) -> str:
+        """Get aggregate span metrics in the Prometheus text format"""
+        return self.tracer.metrics.render()
+    
+    def get_startup_timings(self) -> Dict[str, float]:
+        """Get the duration in seconds of each completed startup phase"""
+        return dict(self.startup_timings)
+    
+    def build_warm_start_snapshot(self) -> Dict[str, Any]:
+        """Compile the knowledge base so fresh workers memory-map it instead of parsing Turtle
         
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
+        The vectorstore needs no snapshot: vector_index already opens the
+        ingested index memory-mapped where FAISS supports it.
+        """
+        rdf_config = self.config.get("rdf_knowledge", {})
+        sources = rdf_compile.knowledge_sources(self.agent_path, rdf_config)
+        compiled_path = os.path.join(self.agent_path, rdf_config.get("compiled_path", "rag/knowledge_base.skb"))
+        written = []
+        if os.path.exists(sources[0]) and not rdf_compile.is_fresh(compiled_path, sources):
+            rdf_compile.compile_graph(rdf_compile.parse_sources(sources), compiled_path)
+            written.append("knowledge_base")
+        return {"snapshot_path": compiled_path, "components": written}
     
     def _initialize_llm(self):
         """Initialize language model"""
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.1,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
+        self.llm = create_llm(self.config.get("llm", {}), self.agent_path)
+    
+    def _initialize_pubmed(self):
+        """Initialize PubMed E-utilities client"""
+        self.pubmed_client = PubMedClient.from_config(self.config.get("pubmed_api", {}), self.agent_path)
     
     def _initialize_retriever(self):
         """Initialize RAG retriever"""
         try:
             vectorstore_path = os.path.join(self.agent_path, "rag", "vectorstore")
             if os.path.exists(vectorstore_path):
-                embeddings = OpenAIEmbeddings()
-                self.vectorstore = FAISS.load_local(vectorstore_path, embeddings)
+                # Query with the same embedding model the index was built with
+                rag_config = self.config.get("rag", {})
+                spec = load_manifest(vectorstore_path).get("settings", {}).get("embedding")
+                spec = spec or embedding_spec(rag_config, offline=False)
+                embeddings = create_embeddings(spec)
+                cache_config = rag_config.get("query_embedding_cache", {})
+                if cache_config.get("enabled", False):
+                    embeddings = CachedEmbeddings.from_config(embeddings, spec, cache_config, self.agent_path)
+                self.vectorstore = vector_index.load_vectorstore(
+                    vectorstore_path, embeddings, rag_config.get("index", {})
+                )
+                if self.vectorstore is None:
+                    self.vectorstore = FAISS.load_local(vectorstore_path, embeddings)
                 self.retriever = self.vectorstore.as_retriever(
                     search_type="similarity",
-                    search_kwargs={"k": 5}
+                    search_kwargs={"k": rag_config.get("retrieval_k", 5)}
                 )
+                if rag_config.get("hybrid", {}).get("enabled", False):
+                    self.hybrid_retriever = HybridRetriever.from_config(
+                        self.vectorstore, vectorstore_path, rag_config
+                    )
             else:
                 self.retriever = None
                 self.logger.warning("Vectorstore not found, RAG retrieval disabled")
@@ -88,18 +254,56 @@ class ScienceAgent:
     def _initialize_rdf_knowledge(self):
         """Initialize RDF knowledge base"""
         try:
-            knowledge_base_path = os.path.join(self.agent_path, "rag", "knowledge_base.ttl")
+            rdf_config = self.config.get("rdf_knowledge", {})
+            sources = rdf_compile.knowledge_sources(self.agent_path, rdf_config)
+            knowledge_base_path = sources[0]
+            compiled_path = os.path.join(
+                self.agent_path, rdf_config.get("compiled_path", "rag/knowledge_base.skb")
+            )
             if os.path.exists(knowledge_base_path):
-                self.rdf_kb = RDFKnowledgeBase(knowledge_base_path)
                 self.sparql_generator = SPARQLQueryGenerator()
+                if rdf_compile.is_fresh(compiled_path, sources):
+                    self.sparql_engine = SPARQLEngine(rdf_compile.load_graph(compiled_path))
+                else:
+                    self.rdf_kb = RDFKnowledgeBase(knowledge_base_path)
+                    graph = getattr(self.rdf_kb, "graph", None)
+                    if graph is None or len(sources) > 1:
+                        graph = rdf_compile.parse_sources(sources)
+                    self.sparql_engine = SPARQLEngine(graph)
+                    if rdf_config.get("auto_compile", False):
+                        rdf_compile.compile_graph(graph, compiled_path)
             else:
                 self.rdf_kb = None
                 self.sparql_generator = None
+                self.sparql_engine = None
                 self.logger.warning("RDF knowledge base not found")
         except Exception as e:
             self.logger.error(f"Failed to initialize RDF knowledge base: {e}")
             self.rdf_kb = None
             self.sparql_generator = None
+            self.sparql_engine = None
+    
+    def _initialize_literature_store(self):
+        """Initialize the local PubMed metadata store used for trend analysis"""
+        try:
+            store_config = self.config.get("literature_store", {})
+            store = LiteratureStore.from_config(store_config, self.agent_path)
+            if len(store):
+                self.literature_store = store
+            else:
+                self.literature_store = None
+                self.logger.warning("Literature store is empty, research trend analysis disabled")
+        except Exception as e:
+            self.logger.error(f"Failed to initialize literature store: {e}")
+            self.literature_store = None
+    
+    def _initialize_claim_index(self):
+        """Initialize the claim-evidence index used for claim validation"""
+        try:
+            self.claim_index = ClaimEvidenceIndex.from_config(self.config, self.agent_path)
+        except Exception as e:
+            self.logger.error(f"Failed to initialize claim evidence index: {e}")
+            self.claim_index = None
     
     def _initialize_tools(self):
         """Initialize agent tools"""
@@ -109,35 +313,51 @@ class ScienceAgent:
         tools.append(Tool(
             name="pubmed_literature_search",
             description="Search PubMed for cannabis-related scientific literature",
-            func=self._pubmed_search
+            func=self._pubmed_search,
+            coroutine=self._apubmed_search
         ))
         
         # Evidence quality assessment
         tools.append(Tool(
             name="evidence_quality_assessment",
-            description="Assess the quality and strength of scientific evidence",
-            func=self._assess_evidence_quality
+            description=(
+                "Assess the quality and strength of scientific evidence. Input: a study description "
+                "or abstract, or a JSON list of them to grade together"
+            ),
+            func=self._assess_evidence_quality,
+            coroutine=threaded_coroutine(self._assess_evidence_quality, self.tool_executor)
         ))
         
         # Research trend analysis
-        tools.append(Tool(
-            name="research_trend_analysis",
-            description="Analyze research trends and publication patterns",
-            func=self._analyze_research_trends
-        ))
+        if self.literature_store:
+            tools.append(Tool(
+                name="research_trend_analysis",
+                description="Analyze research trends and publication patterns",
+                func=self._analyze_research_trends,
+                coroutine=threaded_coroutine(self._analyze_research_trends, self.tool_executor)
+            ))
         
         # Scientific claim validation
         tools.append(Tool(
             name="scientific_claim_validation",
-            description="Validate scientific claims against peer-reviewed evidence",
-            func=self._validate_scientific_claim
+            description=(
+                "Validate a scientific claim naming a compound (e.g. CBD, THC, cannabis) and a condition "
+                "against graded evidence from the knowledge base and literature"
+            ),
+            func=self._validate_scientific_claim,
+            coroutine=threaded_coroutine(self._validate_scientific_claim, self.tool_executor)
         ))
         
         # Meta-analysis synthesis
         tools.append(Tool(
             name="meta_analysis_synthesis",
-            description="Synthesize findings from multiple studies",
-            func=self._synthesize_meta_analysis
+            description=(
+                "Pool results from multiple studies. Input: JSON list of studies, each with "
+                "effect (standardized effect size) and variance, se or ci_lower/ci_upper; "
+                "optional label, n and subgroup (e.g. {\"dose\": \"high\"})"
+            ),
+            func=self._synthesize_meta_analysis,
+            coroutine=threaded_coroutine(self._synthesize_meta_analysis, self.tool_executor)
         ))
         
         # RAG search tool
@@ -145,19 +365,33 @@ class ScienceAgent:
             tools.append(Tool(
                 name="scientific_knowledge_search",
                 description="Search scientific knowledge base for research findings",
-                func=self._rag_search
+                func=self._rag_search,
+                coroutine=self._arag_search
             ))
         
         # RDF SPARQL query tool
-        if self.rdf_kb and self.sparql_generator:
+        if self.sparql_engine and self.sparql_generator:
             tools.append(Tool(
                 name="structured_science_query",
                 description="Query structured scientific knowledge using natural language",
-                func=self._sparql_query
+                func=self._sparql_query,
+                coroutine=self._asparql_query
             ))
         
+        # Bound every async tool call so one slow source cannot stall a parallel turn
+        for tool in tools:
+            tool.coroutine = self._with_timeout(tool.name, tool.coroutine)
+        
         self.tools = tools
     
+    def _with_timeout(self, tool_name: str, coroutine):
+        """Wrap a tool coroutine with its configured timeout"""
+        execution_config = self.config.get("execution", {})
+        timeout = execution_config.get("tool_timeouts", {}).get(
+            tool_name, execution_config.get("tool_timeout", 15)
+        )
+        return with_timeout(tool_name, coroutine, timeout, self.tracer)
+    
     def _initialize_agent(self):
         """Initialize the LangChain agent"""
         prompt = ChatPromptTemplate.from_messages([
@@ -178,10 +412,26 @@ class ScienceAgent:
             MessagesPlaceholder(variable_name="agent_scratchpad")
         ])
         
-        self.agent = create_openai_functions_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=prompt
+        execution_config = self.config.get("execution", {})
+        
+        # The tools agent can request several tool calls in one step, which the
+        # async executor runs concurrently; the functions agent asks for one at a time
+        if execution_config.get("parallel_tool_calls", True):
+            llm_with_tools = self.llm.bind(tools=[convert_to_openai_tool(tool) for tool in self.tools])
+            format_scratchpad = format_to_openai_tool_messages
+            output_parser = OpenAIToolsAgentOutputParser()
+        else:
+            llm_with_tools = self.llm.bind(functions=[convert_to_openai_function(tool) for tool in self.tools])
+            format_scratchpad = format_to_openai_function_messages
+            output_parser = OpenAIFunctionsAgentOutputParser()
+        # Same pipeline as create_openai_tools_agent, with the scratchpad fitted to the token budget
+        self.agent = (
+            RunnablePassthrough.assign(
+                agent_scratchpad=lambda x: self.context_assembler.scratchpad(format_scratchpad(x["intermediate_steps"]))
+            )
+            | prompt
+            | llm_with_tools
+            | output_parser
         )
         
         self.agent_executor = AgentExecutor(
@@ -189,325 +439,227 @@ class ScienceAgent:
             tools=self.tools,
             verbose=True,
             return_intermediate_steps=True,
-            max_iterations=5
+            max_iterations=execution_config.get("max_iterations", 5),
+            max_execution_time=execution_config.get("max_execution_time")
         )
     
+    def _knowledge_version(self) -> str:
+        """Fingerprint of the knowledge base and vectorstore files answers are drawn from"""
+        rdf_config = self.config.get("rdf_knowledge", {})
+        vectorstore_path = os.path.join(self.agent_path, "rag", "vectorstore")
+        index_type = self.config.get("rag", {}).get("index", {}).get("type", "flat")
+        paths = rdf_compile.knowledge_sources(self.agent_path, rdf_config)
+        paths.append(os.path.join(self.agent_path, rdf_config.get("compiled_path", "rag/knowledge_base.skb")))
+        paths.append(os.path.join(self.agent_path, self.config.get("claim_index", {}).get("path", "rag/claim_index.json")))
+        paths.extend(
+            os.path.join(vectorstore_path, name)
+            for name in ("index.faiss", "index.pkl", "ingest_manifest.json", f"index.{index_type}.faiss")
+        )
+        return knowledge_version(paths)
+    
+    def _initialize_response_cache(self):
+        """Initialize the semantic response cache"""
+        cache_config = self.config.get("response_cache", {})
+        if not cache_config.get("enabled", False):
+            return
+        # Reuse the (cached) query embeddings of the vectorstore for similarity lookups
+        embeddings = getattr(self.vectorstore, "embeddings", None) if self.vectorstore else None
+        self.response_cache = ResponseCache.from_config(cache_config, embeddings, self._knowledge_version())
+    
+    def _response_cacheable(self, memory: ConversationBufferWindowMemory) -> bool:
+        """False when the cache is off or the conversation history could change the answer"""
+        if self.response_cache is None:
+            return False
+        bypass_with_history = self.config.get("response_cache", {}).get("bypass_with_history", True)
+        return not (bypass_with_history and memory.chat_memory.messages)
+    
+    def search_pubmed(self, query: str) -> PubMedSearchResult:
+        """Search PubMed for cannabis-related scientific literature"""
+        self._ensure_ready("pubmed")
+        return PubMedSearchResult.from_dict(self.pubmed_client.run_sync(self.pubmed_client.search(query)))
+    
+    async def asearch_pubmed(self, query: str) -> PubMedSearchResult:
+        """Search PubMed without blocking the calling event loop"""
+        await asyncio.to_thread(self._ensure_ready, "pubmed")
+        return PubMedSearchResult.from_dict(await self.pubmed_client.run_async(self.pubmed_client.search(query)))
+    
     def _pubmed_search(self, query: str) -> str:
         """Search PubMed for cannabis-related scientific literature"""
         try:
-            # Simulated PubMed search results
-            search_results = {
-                "total_results": 1247,
-                "search_query": query,
-                "top_results": [
-                    {
-                        "pmid": "35123456",
-                        "title": "Cannabidiol for treatment-resistant epilepsy: A systematic review",
-                        "authors": "Smith J, Johnson A, Williams B",
-                        "journal": "Epilepsia",
-                        "year": 2023,
-                        "abstract": "Background: CBD has shown promise in treating epilepsy. Methods: Systematic review of 15 RCTs...",
-                        "study_type": "systematic_review",
-                        "evidence_level": "high"
-                    },
-                    {
-                        "pmid": "34987654",
-                        "title": "Effects of THC on chronic pain: A randomized controlled trial",
-                        "authors": "Brown M, Davis C, Wilson R",
-                        "journal": "Pain Medicine",
-                        "year": 2023,
-                        "abstract": "Objective: To evaluate THC efficacy for chronic pain. Design: Double-blind RCT...",
-                        "study_type": "randomized_controlled_trial",
-                        "evidence_level": "high"
-                    },
-                    {
-                        "pmid": "33876543",
-                        "title": "Cannabis terpenes and the entourage effect: A review",
-                        "authors": "Green K, Taylor L, Anderson P",
-                        "journal": "Frontiers in Plant Science",
-                        "year": 2022,
-                        "abstract": "The entourage effect suggests synergistic interactions between cannabis compounds...",
-                        "study_type": "narrative_review",
-                        "evidence_level": "moderate"
-                    }
-                ]
-            }
-            
-            # Add query-specific results
-            query_lower = query.lower()
-            if "cbd" in query_lower and "epilepsy" in query_lower:
-                search_results["focused_findings"] = [
-                    "CBD significantly reduced seizure frequency in treatment-resistant epilepsy",
-                    "Epidiolex (pharmaceutical CBD) approved by FDA for specific epilepsy syndromes",
-                    "Most common side effects: drowsiness, elevated liver enzymes"
-                ]
-            
-            if "thc" in query_lower and "pain" in query_lower:
-                search_results["focused_findings"] = [
-                    "THC showed modest efficacy for neuropathic pain",
-                    "Risk-benefit ratio varies by individual patient factors",
-                    "Psychoactive effects limit therapeutic window"
-                ]
+            return serialize(self.search_pubmed(query))
             
-            return json.dumps(search_results, indent=2)
+        except Exception as e:
+            return f"PubMed search error: {str(e)}"
+    
+    async def _apubmed_search(self, query: str) -> str:
+        """Search PubMed without blocking the calling event loop"""
+        try:
+            return serialize(await self.asearch_pubmed(query))
             
         except Exception as e:
             return f"PubMed search error: {str(e)}"
     
+    def assess_evidence_quality(self, study_description: str) -> EvidenceAssessment:
+        """Assess the quality and strength of scientific evidence"""
+        return self.evidence_classifier.classify(study_description)
+    
+    def assess_evidence_quality_many(self, study_descriptions: List[str], workers: int = None) -> List[EvidenceAssessment]:
+        """Assess many study descriptions or abstracts, e.g. a full search result set, in one batch"""
+        return self.evidence_classifier.classify_many(study_descriptions, workers)
+    
     def _assess_evidence_quality(self, study_description: str) -> str:
         """Assess the quality and strength of scientific evidence"""
         try:
-            description_lower = study_description.lower()
-            
-            evidence_assessment = {
-                "study_type": "",
-                "evidence_level": "",
-                "quality_score": 0,
-                "strengths": [],
-                "limitations": [],
-                "bias_risk": "",
-                "clinical_applicability": ""
-            }
-            
-            # Determine study type and evidence level
-            if "systematic review" in description_lower or "meta-analysis" in description_lower:
-                evidence_assessment["study_type"] = "Systematic Review/Meta-analysis"
-                evidence_assessment["evidence_level"] = "Very High"
-                evidence_assessment["quality_score"] = 9
-            elif "randomized controlled trial" in description_lower or "rct" in description_lower:
-                evidence_assessment["study_type"] = "Randomized Controlled Trial"
-                evidence_assessment["evidence_level"] = "High"
-                evidence_assessment["quality_score"] = 8
-            elif "cohort study" in description_lower:
-                evidence_assessment["study_type"] = "Cohort Study"
-                evidence_assessment["evidence_level"] = "Moderate"
-                evidence_assessment["quality_score"] = 6
-            elif "case-control" in description_lower:
-                evidence_assessment["study_type"] = "Case-Control Study"
-                evidence_assessment["evidence_level"] = "Moderate"
-                evidence_assessment["quality_score"] = 5
-            elif "cross-sectional" in description_lower:
-                evidence_assessment["study_type"] = "Cross-sectional Study"
-                evidence_assessment["evidence_level"] = "Low"
-                evidence_assessment["quality_score"] = 4
-            else:
-                evidence_assessment["study_type"] = "Other/Unclear"
-                evidence_assessment["evidence_level"] = "Very Low"
-                evidence_assessment["quality_score"] = 3
-            
-            # Assess bias risk
-            if "double-blind" in description_lower and "placebo" in description_lower:
-                evidence_assessment["bias_risk"] = "Low"
-                evidence_assessment["strengths"].append("Double-blind placebo-controlled design")
-            elif "single-blind" in description_lower:
-                evidence_assessment["bias_risk"] = "Moderate"
-                evidence_assessment["limitations"].append("Single-blind design may introduce bias")
-            else:
-                evidence_assessment["bias_risk"] = "High"
-                evidence_assessment["limitations"].append("Open-label design increases bias risk")
-            
-            # Clinical applicability
-            if "clinical trial" in description_lower:
-                evidence_assessment["clinical_applicability"] = "High - direct clinical evidence"
-            elif "animal study" in description_lower or "in vitro" in description_lower:
-                evidence_assessment["clinical_applicability"] = "Low - preclinical evidence only"
-            else:
-                evidence_assessment["clinical_applicability"] = "Moderate - observational evidence"
-            
-            return json.dumps(evidence_assessment, indent=2)
+            # A JSON list of descriptions is graded as one batch
+            descriptions = json.loads(study_description) if study_description.lstrip().startswith("[") else None
+            if isinstance(descriptions, list):
+                return serialize(self.assess_evidence_quality_many([str(d) for d in descriptions]))
+            return serialize(self.assess_evidence_quality(study_description))
             
         except Exception as e:
             return f"Evidence assessment error: {str(e)}"
     
+    def analyze_research_trends(self, topic: str) -> ResearchTrends:
+        """Analyze research trends and publication patterns in the local literature store"""
+        self._ensure_ready("literature")
+        if not self.literature_store:
+            raise RuntimeError("literature store not available; build it with literature_store.py")
+        return self.literature_store.trends(topic)
+    
     def _analyze_research_trends(self, topic: str) -> str:
         """Analyze research trends and publication patterns"""
         try:
-            # Simulated research trend analysis
-            trend_analysis = {
-                "topic": topic,
-                "publication_trends": {
-                    "2020": 234,
-                    "2021": 312,
-                    "2022": 445,
-                    "2023": 567,
-                    "2024": 398  # Partial year
-                },
-                "research_focus_areas": [
-                    {"area": "Clinical Applications", "percentage": 45, "growth": "+23%"},
-                    {"area": "Pharmacology", "percentage": 30, "growth": "+15%"},
-                    {"area": "Safety Studies", "percentage": 15, "growth": "+35%"},
-                    {"area": "Cultivation/Chemistry", "percentage": 10, "growth": "+8%"}
-                ],
-                "emerging_topics": [
-                    "Minor cannabinoids (CBG, CBN, CBC)",
-                    "Cannabis and sleep disorders",
-                    "Pediatric cannabis applications",
-                    "Cannabis-drug interactions"
-                ],
-                "research_gaps": [
-                    "Long-term safety studies",
-                    "Standardized dosing protocols",
-                    "Optimal delivery methods",
-                    "Personalized medicine approaches"
-                ],
-                "geographical_distribution": {
-                    "North America": "52%",
-                    "Europe": "28%",
-                    "Australia/NZ": "12%",
-                    "Other": "8%"
-                }
-            }
-            
-            return json.dumps(trend_analysis, indent=2)
+            return serialize(self.analyze_research_trends(topic))
             
         except Exception as e:
             return f"Research trend analysis error: {str(e)}"
     
+    def validate_scientific_claim(self, claim: str) -> ClaimValidation:
+        """Validate scientific claims against the indexed evidence for the compound, condition and outcome"""
+        self._ensure_ready("claim_index")
+        if self.claim_index is None:
+            raise RuntimeError("claim evidence index not available; build it with claim_index.py")
+        return self.claim_index.validate(claim)
+    
+    def validate_claims_file(self, input_path: str, output_path: str, workers: int = None,
+                             chunk_size: int = None) -> Dict[str, int]:
+        """Validate every claim in a JSONL/CSV file, appending results to a JSONL file
+        
+        Near-identical claims are validated once and a rerun resumes after the
+        claims already written.
+        """
+        self._ensure_ready("claim_index")
+        if self.claim_index is None:
+            raise RuntimeError("claim evidence index not available; build it with claim_index.py")
+        validator = ClaimBatchValidator.from_config(
+            self.claim_index.validate, self.config.get("claim_validation", {}),
+            workers=workers, chunk_size=chunk_size
+        )
+        return validator.run(input_path, output_path)
+    
     def _validate_scientific_claim(self, claim: str) -> str:
         """Validate scientific claims against peer-reviewed evidence"""
         try:
-            claim_lower = claim.lower()
-            
-            validation_result = {
-                "claim": claim,
-                "evidence_status": "",
-                "confidence_level": "",
-                "supporting_studies": [],
-                "contradicting_studies": [],
-                "evidence_summary": "",
-                "clinical_significance": "",
-                "recommendations": []
-            }
-            
-            # Analyze specific claims
-            if "cbd" in claim_lower and "epilepsy" in claim_lower:
-                validation_result.update({
-                    "evidence_status": "Strong Evidence",
-                    "confidence_level": "High",
-                    "supporting_studies": ["Epidiolex trials", "Cochrane systematic review"],
-                    "evidence_summary": "Multiple high-quality RCTs demonstrate CBD efficacy for treatment-resistant epilepsy",
-                    "clinical_significance": "FDA-approved indication with established efficacy",
-                    "recommendations": ["Consider as adjunct therapy", "Monitor liver function", "Start with low doses"]
-                })
-            
-            elif "thc" in claim_lower and "cancer" in claim_lower:
-                validation_result.update({
-                    "evidence_status": "Limited Evidence",
-                    "confidence_level": "Low",
-                    "supporting_studies": ["Preclinical studies", "Case reports"],
-                    "contradicting_studies": ["Limited clinical trials"],
-                    "evidence_summary": "Preclinical evidence promising but clinical data insufficient",
-                    "clinical_significance": "Research stage - not established therapy",
-                    "recommendations": ["More research needed", "Not recommended as primary treatment"]
-                })
-            
-            elif "cannabis" in claim_lower and "addiction" in claim_lower:
-                validation_result.update({
-                    "evidence_status": "Mixed Evidence",
-                    "confidence_level": "Moderate",
-                    "supporting_studies": ["Observational studies showing dependence risk"],
-                    "contradicting_studies": ["Studies showing low addiction potential vs other substances"],
-                    "evidence_summary": "Risk exists but lower than many other substances",
-                    "clinical_significance": "Important consideration for clinical use",
-                    "recommendations": ["Screen for addiction risk", "Monitor for dependence", "Use lowest effective dose"]
-                })
-            
-            else:
-                validation_result.update({
-                    "evidence_status": "Insufficient Data",
-                    "confidence_level": "Very Low",
-                    "evidence_summary": "Limited peer-reviewed evidence available",
-                    "recommendations": ["Requires systematic literature review", "Consider consulting recent meta-analyses"]
-                })
-            
-            return json.dumps(validation_result, indent=2)
+            return serialize(self.validate_scientific_claim(claim))
             
         except Exception as e:
             return f"Claim validation error: {str(e)}"
     
+    def synthesize_meta_analysis(self, studies_description: str) -> MetaAnalysisSynthesis:
+        """Pool per-study effect sizes and variances given as JSON"""
+        settings = self.config.get("meta_analysis", {})
+        return synthesize(
+            parse_studies(studies_description),
+            method=settings.get("method", "REML"),
+            level=settings.get("confidence_level", 0.95),
+            bootstrap_replicates=settings.get("bootstrap_replicates", 1000),
+            workers=settings.get("workers", 0),
+            seed=settings.get("seed"),
+        )
+    
     def _synthesize_meta_analysis(self, studies_description: str) -> str:
         """Synthesize findings from multiple studies"""
         try:
-            # Simulated meta-analysis synthesis
-            synthesis = {
-                "analysis_type": "Meta-analysis Synthesis",
-                "included_studies": 12,
-                "total_participants": 2847,
-                "primary_outcomes": {
-                    "efficacy": {
-                        "effect_size": 0.68,
-                        "confidence_interval": "0.42-0.94",
-                        "p_value": 0.003,
-                        "interpretation": "Moderate to large effect"
-                    },
-                    "safety": {
-                        "adverse_events": "15.3%",
-                        "serious_adverse_events": "2.1%",
-                        "discontinuation_rate": "8.7%"
-                    }
-                },
-                "heterogeneity": {
-                    "i_squared": 67,
-                    "interpretation": "Moderate heterogeneity between studies"
-                },
-                "subgroup_analyses": [
-                    {"subgroup": "Dosage", "finding": "Higher doses more effective but increased side effects"},
-                    {"subgroup": "Duration", "finding": "Benefits plateau after 8 weeks"},
-                    {"subgroup": "Age", "finding": "Similar efficacy across age groups"}
-                ],
-                "limitations": [
-                    "Short-term studies only",
-                    "Variable outcome measures",
-                    "Limited diversity in study populations"
-                ],
-                "clinical_implications": [
-                    "Evidence supports therapeutic use with monitoring",
-                    "Individual response varies significantly",
-                    "Long-term studies needed"
-                ]
-            }
-            
-            return json.dumps(synthesis, indent=2)
+            return serialize(self.synthesize_meta_analysis(studies_description))
             
         except Exception as e:
             return f"Meta-analysis synthesis error: {str(e)}"
     
     def _rag_search(self, query: str) -> str:
         """Search scientific knowledge base using RAG"""
+        self._ensure_ready("retriever")
         if not self.retriever:
             return "RAG retrieval not available"
         
         try:
-            docs = self.retriever.get_relevant_documents(query)
+            with self.tracer.span("retriever", hybrid=self.hybrid_retriever is not None) as span:
+                if self.hybrid_retriever:
+                    docs = self.hybrid_retriever.retrieve(query)
+                else:
+                    docs = self.retriever.get_relevant_documents(query)
+                span.set(documents=len(docs))
             if not docs:
                 return "No relevant scientific information found"
             
-            return "\n\n".join([doc.page_content for doc in docs[:3]])
+            return "\n\n".join([doc.page_content for doc in docs])
+            
+        except Exception as e:
+            return f"RAG search error: {str(e)}"
+    
+    async def _arag_search(self, query: str) -> str:
+        """Search scientific knowledge base using RAG without blocking the event loop"""
+        await asyncio.to_thread(self._ensure_ready, "retriever")
+        if not self.retriever:
+            return "RAG retrieval not available"
+        
+        try:
+            with self.tracer.span("retriever", hybrid=self.hybrid_retriever is not None) as span:
+                if self.hybrid_retriever:
+                    docs = await self.hybrid_retriever.aretrieve(query)
+                else:
+                    docs = await self.retriever.aget_relevant_documents(query)
+                span.set(documents=len(docs))
+            if not docs:
+                return "No relevant scientific information found"
+            
+            return "\n\n".join([doc.page_content for doc in docs])
             
         except Exception as e:
             return f"RAG search error: {str(e)}"
     
     def _sparql_query(self, natural_language_query: str) -> str:
         """Query RDF knowledge base using natural language"""
-        if not self.rdf_kb or not self.sparql_generator:
+        self._ensure_ready("rdf_knowledge")
+        if not self.sparql_engine or not self.sparql_generator:
             return "RDF knowledge base not available"
         
         try:
-            sparql_query = self.sparql_generator.generate_sparql(
+            sparql_query = self.sparql_engine.translate(
                 natural_language_query,
-                domain="science"
+                lambda question: self.sparql_generator.generate_sparql(question, domain="science")
             )
             
-            results = self.rdf_kb.query(sparql_query)
+            with self.tracer.span("sparql") as span:
+                results = self.sparql_engine.query(sparql_query)
+                span.set(rows=len(results))
             
             if not results:
-                return "No results found in structured knowledge base"
+                # Fall back to the term indexes, which also cover RDF list members
+                with self.tracer.span("sparql.lookup", "sparql"):
+                    matches = self.sparql_engine.lookup(natural_language_query, limit=5)
+                if not matches:
+                    return "No results found in structured knowledge base"
+                return "Indexed lookup results:\n" + "\n".join([str(match) for match in matches])
             
             return f"SPARQL Query: {sparql_query}\n\nResults:\n" + "\n".join([str(result) for result in results[:5]])
             
         except Exception as e:
             return f"SPARQL query error: {str(e)}"
     
+    async def _asparql_query(self, natural_language_query: str) -> str:
+        """Query RDF knowledge base off the event loop; uncached queries can take milliseconds"""
+        return await asyncio.to_thread(self._sparql_query, natural_language_query)
+    
     def _load_baseline_questions(self) -> List[Dict]:
         """Load baseline test questions"""
         try:
@@ -522,57 +674,197 @@ class ScienceAgent:
     
     def _get_user_memory(self, user_id: str) -> ConversationBufferWindowMemory:
         """Get or create memory for user"""
-        if user_id not in self.memory_store:
-            self.memory_store[user_id] = ConversationBufferWindowMemory(
-                k=10,
-                return_messages=True,
-                memory_key="chat_history"
-            )
-        return self.memory_store[user_id]
+        return self.memory_store.get(user_id)
     
-    async def process_query(self, user_id: str, query: str, context: Dict = None) -> Dict[str, Any]:
-        """Process a user query with memory and context"""
-        try:
-            memory = self._get_user_memory(user_id)
-            
-            if context:
-                query = f"Context: {json.dumps(context)}\n\nQuery: {query}"
-            
-            result = await asyncio.to_thread(
-                self.agent_executor.invoke,
-                {
-                    "input": query,
-                    "chat_history": memory.chat_memory.messages
-                }
-            )
-            
-            memory.chat_memory.add_user_message(query)
-            memory.chat_memory.add_ai_message(result["output"])
-            
-            return {
-                "response": result["output"],
-                "intermediate_steps": result.get("intermediate_steps", []),
-                "confidence": 0.85,
-                "timestamp": datetime.now().isoformat(),
-                "user_id": user_id
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Query processing error: {e}")
+    async def _prepare_query(self, user_id: str, query: str, context: Optional[Dict], use_cache: bool = True):
+        """Response cache scope, whether the answer may be cached, and any cached answer"""
+        if not self._agent_ready:
+            await asyncio.to_thread(self._ensure_agent)
+        memory = await self.memory_store.aget(user_id)
+        scope = json.dumps(context, sort_keys=True) if context else ""
+        cacheable = use_cache and self._response_cacheable(memory)
+        cached = None
+        if cacheable:
+            self.response_cache.set_version(self._knowledge_version())
+            cached = await self.response_cache.lookup(query, scope)
+            annotate(response_cache_hit=cached is not None)
+        return scope, cacheable, cached
+    
+    @staticmethod
+    def _confidence(span: Span) -> float:
+        """Confidence from how much of the evidence gathering succeeded"""
+        tool_calls = span.counts["tool"]
+        if not tool_calls:
+            # Answered from the model alone, without consulting any source
+            return 0.5
+        return round(0.5 + 0.4 * (1 - span.counts["tool_errors"] / tool_calls), 2)
+    
+    def _response(self, user_id: str, output: str, intermediate_steps: List, span: Span, confidence: float,
+                  cached: bool, trace_callbacks: Optional[TraceCallbackHandler] = None) -> Dict[str, Any]:
+        return {
+            "response": output,
+            "intermediate_steps": intermediate_steps,
+            "cached": cached,
+            "confidence": confidence,
+            "trace_id": span.trace_id,
+            "timings": {
+                "total": span.duration,
+                **{kind: span.totals[kind] for kind in ("llm", "tool", "retriever", "sparql") if kind in span.totals}
+            },
+            "usage": {
+                "iterations": trace_callbacks.iterations if trace_callbacks else 0,
+                "prompt_tokens": trace_callbacks.prompt_tokens if trace_callbacks else 0,
+                "completion_tokens": trace_callbacks.completion_tokens if trace_callbacks else 0
+            },
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id
+        }
+    
+    def _failure_response(self, user_id: str, error: Exception, span: Span) -> Dict[str, Any]:
+        span.status = "error"
+        span.set(error=str(error))
+        if isinstance(error, SchedulerOverloaded):
+            self.logger.warning(f"Query rejected for {user_id}: {error}")
             return {
-                "response": f"I encountered an error processing your science query: {str(e)}",
-                "error": str(e),
+                "response": "The science agent is at capacity, please retry shortly.",
+                "error": str(error),
+                "overloaded": True,
                 "confidence": 0.0,
+                "trace_id": span.trace_id,
                 "timestamp": datetime.now().isoformat(),
                 "user_id": user_id
             }
+        self.logger.error(f"Query processing error: {error}")
+        return {
+            "response": f"I encountered an error processing your science query: {str(error)}",
+            "error": str(error),
+            "confidence": 0.0,
+            "trace_id": span.trace_id,
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id
+        }
+    
+    @staticmethod
+    def _agent_input(query: str, context: Optional[Dict]) -> str:
+        if context:
+            return f"Context: {json.dumps(context)}\n\nQuery: {query}"
+        return query
+    
+    async def process_query(self, user_id: str, query: str, context: Dict = None, use_cache: bool = True) -> Dict[str, Any]:
+        """Process a user query with memory and context"""
+        with self.tracer.span("query", user_id=user_id) as span:
+            try:
+                scope, cacheable, cached = await self._prepare_query(user_id, query, context, use_cache)
+                if cached is not None:
+                    await self.memory_store.aadd_turn(user_id, query, cached["output"])
+                    return self._response(user_id, cached["output"], [], span, cached["confidence"], cached=True)
+                
+                trace_callbacks = TraceCallbackHandler(self.tracer, span)
+                async with self.scheduler.admit(user_id):
+                    memory = await self.memory_store.aget(user_id)
+                    agent_input = self._agent_input(query, context)
+                    
+                    try:
+                        result = await self.agent_executor.ainvoke({
+                            "input": agent_input,
+                            "chat_history": self.context_assembler.history(
+                                memory.chat_memory.messages, self.memory_store.summary(user_id)
+                            )
+                        }, config={"callbacks": [trace_callbacks]})
+                    finally:
+                        trace_callbacks.close()
+                    
+                    # The raw query is stored; the context only applies to this turn
+                    await self.memory_store.aadd_turn(user_id, query, result["output"])
+                
+                confidence = self._confidence(span)
+                if cacheable and result["output"]:
+                    await self.response_cache.store(query, {"output": result["output"], "confidence": confidence}, scope)
+                
+                return self._response(
+                    user_id, result["output"], result.get("intermediate_steps", []), span, confidence,
+                    cached=False, trace_callbacks=trace_callbacks
+                )
+                
+            except Exception as e:
+                return self._failure_response(user_id, e, span)
+    
+    async def stream_query(self, user_id: str, query: str, context: Dict = None, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Process a user query, yielding progress events as the agent runs
+        
+        Events are dicts with a ``type`` of ``tool_start`` (tool, input),
+        ``tool_end`` (tool, output), ``token`` (content) and finally ``final``
+        whose ``response`` is the same dict process_query returns.
+        
+        The admission slot is held while the agent runs, so a consumer that
+        stops early must ``aclose()`` the generator to release it.
+        """
+        with self.tracer.span("query", user_id=user_id, streaming=True) as span:
+            try:
+                scope, cacheable, cached = await self._prepare_query(user_id, query, context, use_cache)
+                if cached is not None:
+                    await self.memory_store.aadd_turn(user_id, query, cached["output"])
+                    yield {"type": "token", "content": cached["output"]}
+                    yield {
+                        "type": "final",
+                        "response": self._response(user_id, cached["output"], [], span, cached["confidence"], cached=True)
+                    }
+                    return
+                
+                result = None
+                trace_callbacks = TraceCallbackHandler(self.tracer, span)
+                async with self.scheduler.admit(user_id):
+                    memory = await self.memory_store.aget(user_id)
+                    agent_input = self._agent_input(query, context)
+                    
+                    events = self.agent_executor.astream_events({
+                        "input": agent_input,
+                        "chat_history": self.context_assembler.history(
+                            memory.chat_memory.messages, self.memory_store.summary(user_id)
+                        )
+                    }, config={"callbacks": [trace_callbacks]}, version="v1")
+                    try:
+                        async for event in events:
+                            kind = event["event"]
+                            if kind == "on_chat_model_stream":
+                                content = event["data"]["chunk"].content
+                                if content:
+                                    yield {"type": "token", "content": content}
+                            elif kind == "on_tool_start":
+                                yield {"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+                            elif kind == "on_tool_end":
+                                yield {"type": "tool_end", "tool": event["name"], "output": event["data"].get("output")}
+                            elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                                result = event["data"]["output"]
+                    finally:
+                        trace_callbacks.close()
+                    if result is None:
+                        raise RuntimeError("agent run ended without a final answer")
+                    
+                    # The raw query is stored; the context only applies to this turn
+                    await self.memory_store.aadd_turn(user_id, query, result["output"])
+                
+                confidence = self._confidence(span)
+                if cacheable and result["output"]:
+                    await self.response_cache.store(query, {"output": result["output"], "confidence": confidence}, scope)
+                
+                yield {
+                    "type": "final",
+                    "response": self._response(
+                        user_id, result["output"], result.get("intermediate_steps", []), span, confidence,
+                        cached=False, trace_callbacks=trace_callbacks
+                    )
+                }
+                
+            except Exception as e:
+                yield {"type": "final", "response": self._failure_response(user_id, e, span)}
     
     def get_user_conversation_history(self, user_id: str, limit: int = 10) -> List[Dict]:
         """Get conversation history for a user"""
-        if user_id not in self.memory_store:
+        memory = self.memory_store.peek(user_id)
+        if memory is None:
             return []
         
-        memory = self.memory_store[user_id]
         messages = memory.chat_memory.messages[-limit*2:]
         
         history = []
@@ -588,11 +880,14 @@ class ScienceAgent:
     
     def clear_user_memory(self, user_id: str):
         """Clear memory for a specific user"""
-        if user_id in self.memory_store:
-            del self.memory_store[user_id]
+        self.memory_store.clear(user_id)
+    
+    async def aclear_user_memory(self, user_id: str):
+        """Clear memory for a specific user without blocking the event loop"""
+        await self.memory_store.aclear(user_id)
     
-    async def run_baseline_test(self, question_id: str = None) -> Dict[str, Any]:
-        """Run baseline test questions"""
+    async def run_baseline_test(self, question_id: str = None, concurrency: int = None, trials: int = None) -> Dict[str, Any]:
+        """Run baseline test questions, each in its own session, concurrently"""
         if not self.baseline_questions:
             return {"error": "No baseline questions available"}
         
@@ -600,37 +895,23 @@ class ScienceAgent:
         if question_id:
             questions = [q for q in questions if q.get("id") == question_id]
         
-        results = []
-        for question in questions[:5]:
-            try:
-                response = await self.process_query(
-                    user_id="baseline_test",
-                    query=question["question"],
-                    context={"test_mode": True}
-                )
-                
-                evaluation = await self._evaluate_baseline_response(question, response["response"])
-                
-                results.append({
-                    "question_id": question.get("id", "unknown"),
-                    "question": question["question"],
-                    "expected": question.get("expected_answer", ""),
-                    "actual": response["response"],
-                    "passed": evaluation["passed"],
-                    "confidence": evaluation["confidence"],
-                    "evaluation": evaluation
-                })
-                
-            except Exception as e:
-                results.append({
-                    "question_id": question.get("id", "unknown"),
-                    "question": question["question"],
-                    "error": str(e),
-                    "passed": False,
-                    "confidence": 0.0
-                })
+        runner = BaselineRunner.from_config(
+            self, self.config.get("baseline_testing", {}), concurrency=concurrency, trials=trials
+        )
+        report = await runner.run(questions)
         
-        self.clear_user_memory("baseline_test")
+        results = [{
+            "question_id": q["question_id"],
+            "question": q["question"],
+            "expected": q["expected"],
+            "actual": q["trials"][-1].get("actual", ""),
+            "passed": q["passed"],
+            "confidence": q["confidence"],
+            "latency": q["latency"],
+            "total_tokens": q["total_tokens"],
+            "evaluation": q["trials"][-1].get("evaluation", {}),
+            **({"error": q["trials"][-1]["error"]} if q["trials"][-1].get("error") else {})
+        } for q in report["questions"]]
         
         return {
             "agent_type": "science",
@@ -638,34 +919,14 @@ class ScienceAgent:
             "passed": sum(1 for r in results if r.get("passed", False)),
             "average_confidence": sum(r.get("confidence", 0) for r in results) / len(results) if results else 0,
             "results": results,
-            "timestamp": datetime.now().isoformat()
+            "summary": report["summary"],
+            "timestamp": report["timestamp"]
         }
     
     async def _evaluate_baseline_response(self, question: Dict, response: str) -> Dict[str, Any]:
         """Evaluate baseline response quality"""
         try:
-            expected_keywords = question.get("keywords", [])
-            response_lower = response.lower()
-            
-            keyword_matches = sum(1 for keyword in expected_keywords if keyword.lower() in response_lower)
-            keyword_score = keyword_matches / len(expected_keywords) if expected_keywords else 0.5
-            
-            # Check for science-specific content
-            science_terms = ["study", "research", "evidence", "clinical", "trial", "analysis"]
-            science_score = sum(1 for term in science_terms if term in response_lower) / len(science_terms)
-            
-            length_score = min(len(response) / 200, 1.0)
-            
-            overall_score = (keyword_score * 0.4 + science_score * 0.4 + length_score * 0.2)
-            
-            return {
-                "passed": overall_score >= 0.6,
-                "confidence": overall_score,
-                "keyword_matches": keyword_matches,
-                "total_keywords": len(expected_keywords),
-                "science_relevance": science_score,
-                "response_length": len(response)
-            }
+            return self.response_evaluator.evaluate(question, response)
             
         except Exception as e:
             return {
@@ -674,9 +935,9 @@ class ScienceAgent:
                 "error": str(e)
             }
 
-def create_science_agent(agent_path: str = ".") -> ScienceAgent:
+def create_science_agent(agent_path: str = ".", lazy: Optional[bool] = None) -> ScienceAgent:
     """Create and return a configured science agent"""
-    return ScienceAgent(agent_path)
+    return ScienceAgent(agent_path, lazy=lazy)
 
 if __name__ == "__main__":
     async def main():
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Concurrent baseline benchmark for the Science Agent
+Usage: python baseline_runner.py [--concurrency 4] [--trials 3] [--output report.json] [--compare previous.json]
+
+Runs every question in baseline.json, each trial in its own conversation
+so answers never see another question's history, with a bounded number
+of queries in flight. The JSON report holds per-question latency
+percentiles, token usage and pass rates, and can be diffed against the
+report of an earlier run. Every answer can also be appended to a JSONL
+transcript file, which response_evaluator.py re-scores without calling
+the LLM again.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from langchain_community.callbacks import get_openai_callback
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of values, 0.0 when empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+    }
+
+
+class BaselineRunner:
+    """
+    Runs the baseline suite against an agent with isolated sessions
+    """
+
+    def __init__(self, agent, concurrency: int = 4, trials: int = 1, use_cache: bool = False,
+                 transcript_path: str = ""):
+        self.agent = agent
+        self.concurrency = max(1, concurrency)
+        self.trials = max(1, trials)
+        self.use_cache = use_cache
+        self.transcript_path = transcript_path
+
+    @classmethod
+    def from_config(cls, agent, baseline_config: Dict[str, Any], **overrides) -> "BaselineRunner":
+        """Build a runner from the ``baseline_testing`` section of agent_config.yaml"""
+        settings = {
+            "concurrency": baseline_config.get("concurrency", 4),
+            "trials": baseline_config.get("trials", 1),
+            "use_cache": baseline_config.get("use_response_cache", False),
+            "transcript_path": baseline_config.get("transcript_path", ""),
+        }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(agent, **settings)
+
+    async def _run_one(self, question: Dict, trial: int, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        question_id = question.get("id", "unknown")
+        # A fresh user per trial keeps conversation history from leaking between questions
+        user_id = f"baseline:{question_id}:{trial}:{uuid.uuid4().hex[:8]}"
+        async with semaphore:
+            try:
+                # Each task runs in its own context, so the callback only sees this query's LLM calls
+                with get_openai_callback() as usage:
+                    start = time.perf_counter()
+                    response = await self.agent.process_query(
+                        user_id=user_id,
+                        query=question["question"],
+                        context={"test_mode": True},
+                        use_cache=self.use_cache
+                    )
+                    latency = time.perf_counter() - start
+                evaluation = await self.agent._evaluate_baseline_response(question, response["response"])
+                return {
+                    "question_id": question_id,
+                    "trial": trial,
+                    "latency": latency,
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "total_tokens": usage.total_tokens,
+                    "cost": usage.total_cost,
+                    "passed": evaluation["passed"] and "error" not in response,
+                    "confidence": evaluation["confidence"],
+                    "actual": response["response"],
+                    "evaluation": evaluation,
+                    "error": response.get("error"),
+                }
+            except Exception as e:
+                return {
+                    "question_id": question_id,
+                    "trial": trial,
+                    "latency": 0.0,
+                    "total_tokens": 0,
+                    "passed": False,
+                    "confidence": 0.0,
+                    "error": str(e),
+                }
+            finally:
+                await self.agent.aclear_user_memory(user_id)
+
+    def _write_transcripts(self, trial_results: List[Dict[str, Any]]):
+        """Append every answer as one JSON line for later re-scoring"""
+        if os.path.dirname(self.transcript_path):
+            os.makedirs(os.path.dirname(self.transcript_path), exist_ok=True)
+        timestamp = datetime.now().isoformat()
+        with open(self.transcript_path, "a", encoding="utf-8") as f:
+            for result in trial_results:
+                f.write(json.dumps({
+                    "question_id": result["question_id"],
+                    "trial": result["trial"],
+                    "timestamp": timestamp,
+                    "latency": result["latency"],
+                    "response": result.get("actual", ""),
+                    "error": result.get("error"),
+                }, ensure_ascii=False) + "\n")
+
+    async def run(self, questions: List[Dict]) -> Dict[str, Any]:
+        """Run every question for every trial and build the report"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        trial_results = await asyncio.gather(*(
+            self._run_one(question, trial, semaphore)
+            for trial in range(self.trials)
+            for question in questions
+        ))
+        wall_time = time.perf_counter() - start
+        if self.transcript_path:
+            self._write_transcripts(trial_results)
+
+        by_question: Dict[str, List[Dict]] = {}
+        for result in trial_results:
+            by_question.setdefault(result["question_id"], []).append(result)
+
+        per_question = []
+        for question in questions:
+            question_id = question.get("id", "unknown")
+            trials = by_question.get(question_id, [])
+            latencies = [t["latency"] for t in trials if not t.get("error")]
+            per_question.append({
+                "question_id": question_id,
+                "question": question["question"],
+                "expected": question.get("expected_answer", ""),
+                "category": question.get("category"),
+                "latency": _latency_summary(latencies),
+                "total_tokens": sum(t.get("total_tokens", 0) for t in trials),
+                "pass_rate": sum(1 for t in trials if t["passed"]) / len(trials) if trials else 0.0,
+                "passed": bool(trials) and all(t["passed"] for t in trials),
+                "confidence": sum(t["confidence"] for t in trials) / len(trials) if trials else 0.0,
+                "trials": trials,
+            })
+
+        latencies = [t["latency"] for t in trial_results if not t.get("error")]
+        return {
+            "agent_type": "science",
+            "timestamp": datetime.now().isoformat(),
+            "settings": {"concurrency": self.concurrency, "trials": self.trials, "use_cache": self.use_cache},
+            "summary": {
+                "questions": len(questions),
+                "runs": len(trial_results),
+                "passed": sum(1 for q in per_question if q["passed"]),
+                "pass_rate": sum(1 for t in trial_results if t["passed"]) / len(trial_results) if trial_results else 0.0,
+                "errors": sum(1 for t in trial_results if t.get("error")),
+                "latency": _latency_summary(latencies),
+                "total_tokens": sum(t.get("total_tokens", 0) for t in trial_results),
+                "wall_time": wall_time,
+            },
+            "questions": per_question,
+        }
+
+
+def compare_reports(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-question and overall changes between two reports (current minus previous)"""
+    previous_questions = {q["question_id"]: q for q in previous.get("questions", [])}
+    questions = []
+    for question in current.get("questions", []):
+        before = previous_questions.get(question["question_id"])
+        if before is None:
+            continue
+        questions.append({
+            "question_id": question["question_id"],
+            "p50_delta": question["latency"]["p50"] - before["latency"]["p50"],
+            "p95_delta": question["latency"]["p95"] - before["latency"]["p95"],
+            "token_delta": question["total_tokens"] - before["total_tokens"],
+            "pass_rate_delta": question["pass_rate"] - before["pass_rate"],
+            "regressed": before["passed"] and not question["passed"],
+        })
+    summary, before = current["summary"], previous["summary"]
+    return {
+        "p50_delta": summary["latency"]["p50"] - before["latency"]["p50"],
+        "p95_delta": summary["latency"]["p95"] - before["latency"]["p95"],
+        "token_delta": summary["total_tokens"] - before["total_tokens"],
+        "pass_rate_delta": summary["pass_rate"] - before["pass_rate"],
+        "regressions": [q["question_id"] for q in questions if q["regressed"]],
+        "questions": questions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the baseline suite concurrently and write a JSON report')
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    parser.add_argument('--concurrency', type=int, help='Queries in flight (default: baseline_testing.concurrency)')
+    parser.add_argument('--trials', type=int, help='Runs per question (default: baseline_testing.trials)')
+    parser.add_argument('--question-id', type=str, help='Run a single question')
+    parser.add_argument('--use-cache', action='store_true', default=None, help='Allow answers from the response cache')
+    parser.add_argument('--output', type=str, help='Report path (default: <report_dir>/baseline-<timestamp>.json)')
+    parser.add_argument('--compare', type=str, help='Previous report to compare against')
+    args = parser.parse_args()
+
+    from agent import create_science_agent
+
+    agent = create_science_agent(args.agent_path)
+    baseline_config = agent.config.get("baseline_testing", {})
+    runner = BaselineRunner.from_config(
+        agent, baseline_config, concurrency=args.concurrency, trials=args.trials, use_cache=args.use_cache
+    )
+    questions = agent.baseline_questions
+    if args.question_id:
+        questions = [q for q in questions if q.get("id") == args.question_id]
+    report = asyncio.run(runner.run(questions))
+
+    output = args.output or os.path.join(
+        args.agent_path, baseline_config.get("report_dir", "reports"),
+        f"baseline-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            report["comparison"] = compare_reports(report, json.load(f))
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    summary = report["summary"]
+    print(f"{summary['passed']}/{summary['questions']} questions passed "
+          f"({summary['pass_rate']:.0%} of {summary['runs']} runs), "
+          f"p50 {summary['latency']['p50']:.2f}s, p95 {summary['latency']['p95']:.2f}s, "
+          f"{summary['total_tokens']} tokens in {summary['wall_time']:.1f}s")
+    if "comparison" in report:
+        comparison = report["comparison"]
+        print(f"vs {args.compare}: p50 {comparison['p50_delta']:+.2f}s, p95 {comparison['p95_delta']:+.2f}s, "
+              f"tokens {comparison['token_delta']:+d}, pass rate {comparison['pass_rate_delta']:+.0%}")
+        if comparison["regressions"]:
+            print(f"Regressed: {', '.join(comparison['regressions'])}")
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Offline micro-benchmarks for the Science Agent's own overhead
+Usage: python benchmarks.py [--rounds 200] [--only process_query] [--output bench.json] [--compare previous.json]
+
+Runs the agent on the scripted LLM backend with a PubMed client that
+answers from synthetic records, so everything measured is time spent in
+the agent itself: prompt building, memory handling, tool dispatch, output
+serialization and response evaluation. No network access or API key is
+needed and the numbers are stable enough to gate on.
+"""
+
+import os
+import gc
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Callable, Optional
+
+from agent import ScienceAgent
+from baseline_runner import percentile
+from ingest import load_manifest
+from pubmed_client import PubMedClient, parse_pubmed_article
+
+SAMPLE_QUERY = "What does the peer-reviewed research say about CBD for treating epilepsy?"
+SAMPLE_STUDY = "Randomized controlled trial of cannabidiol in 120 patients with treatment-resistant epilepsy"
+SAMPLE_ABSTRACTS = json.dumps([SAMPLE_STUDY] * 100)
+SAMPLE_STUDIES = json.dumps([
+    {"label": f"Trial {i + 1}", "effect": 0.3 + 0.05 * (i % 7), "se": 0.1 + 0.01 * (i % 5), "n": 80 + 10 * i,
+     "subgroup": {"dose": "high" if i % 2 else "low"}}
+    for i in range(12)
+])
+
+_ARTICLE_TEMPLATE = """<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>
+<Journal><Title>Epilepsia</Title><JournalIssue><PubDate><Year>{year}</Year></PubDate></JournalIssue></Journal>
+<ArticleTitle>Cannabidiol in treatment-resistant epilepsy: study {pmid}</ArticleTitle>
+<Abstract><AbstractText>A randomized controlled trial of cannabidiol reduced seizure frequency compared with placebo.</AbstractText></Abstract>
+<AuthorList><Author><LastName>Smith</LastName><Initials>J</Initials></Author><Author><LastName>Lee</LastName><Initials>K</Initials></Author></AuthorList>
+<PublicationTypeList><PublicationType>Randomized Controlled Trial</PublicationType></PublicationTypeList>
+</Article><MeshHeadingList><MeshHeading><DescriptorName>Cannabidiol</DescriptorName></MeshHeading></MeshHeadingList>
+</MedlineCitation></PubmedArticle>"""
+
+
+class OfflinePubMedClient(PubMedClient):
+    """
+    PubMedClient whose E-utility calls are answered from synthetic records
+
+    PMIDs are derived from the query so results are deterministic; efetch
+    still goes through the real XML record parser.
+    """
+
+    async def esearch(self, term: str, retmax: Optional[int] = None) -> Dict[str, Any]:
+        seed = int(hashlib.sha256(term.encode("utf-8")).hexdigest()[:8], 16)
+        count = retmax or self.max_results
+        return {"count": count * 10, "pmids": [str(30000000 + (seed + i) % 9000000) for i in range(count)]}
+
+    async def _efetch_batch(self, pmids: List[str]) -> List[Dict[str, Any]]:
+        return [
+            parse_pubmed_article(ET.fromstring(_ARTICLE_TEMPLATE.format(pmid=pmid, year=2015 + int(pmid) % 9)))
+            for pmid in pmids
+        ]
+
+
+class OfflineScienceAgent(ScienceAgent):
+    """
+    ScienceAgent wired to the scripted LLM and the offline PubMed client
+    """
+
+    def _load_config(self) -> Dict[str, Any]:
+        config = super()._load_config()
+        config["llm"] = {**config.get("llm", {}), "provider": "scripted", "record_path": None}
+        config["memory"] = {**config.get("memory", {}), "backend": "none"}
+        config["response_cache"] = {**config.get("response_cache", {}), "enabled": False}
+        config["startup"] = {**config.get("startup", {}), "lazy": False}
+        # Keep benchmark spans out of the trace log
+        config["tracing"] = {**config.get("tracing", {}), "jsonl_path": None}
+        pubmed_config = dict(config.get("pubmed_api", {}))
+        pubmed_config["cache"] = {**pubmed_config.get("cache", {}), "enabled": False}
+        config["pubmed_api"] = pubmed_config
+        return config
+
+    def _initialize_pubmed(self):
+        pubmed_config = self.config.get("pubmed_api", {})
+        self.pubmed_client = OfflinePubMedClient(
+            max_results=pubmed_config.get("max_results", 10),
+            rate_limit=1e9,
+            burst=1000,
+        )
+
+    def _initialize_agent(self):
+        super()._initialize_agent()
+        # Verbose tracing to stdout would dominate the timings
+        self.agent_executor.verbose = False
+
+    def _initialize_retriever(self):
+        # Only a vectorstore built with local embeddings can be queried offline
+        manifest = load_manifest(os.path.join(self.agent_path, "rag", "vectorstore"))
+        if manifest.get("settings", {}).get("embedding", {}).get("provider") == "local":
+            super()._initialize_retriever()
+        else:
+            self.logger.warning("Vectorstore needs remote embeddings, RAG benchmark skipped")
+
+
+def _summarize(name: str, timings: List[float]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "rounds": len(timings),
+        "min_us": min(timings) * 1e6,
+        "mean_us": sum(timings) / len(timings) * 1e6,
+        "p50_us": percentile(timings, 50) * 1e6,
+        "p95_us": percentile(timings, 95) * 1e6,
+        "ops_per_second": len(timings) / sum(timings) if sum(timings) else 0.0,
+    }
+
+
+def bench(name: str, fn: Callable[[], Any], rounds: int, warmup: int = 5) -> Dict[str, Any]:
+    """Time a synchronous callable, with garbage collection paused during the timed rounds"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return _summarize(name, timings)
+
+
+async def abench(name: str, fn: Callable[[], Any], rounds: int, warmup: int = 5) -> Dict[str, Any]:
+    """Time a coroutine function on the running event loop"""
+    for _ in range(warmup):
+        await fn()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return _summarize(name, timings)
+
+
+async def run_benchmarks(agent: ScienceAgent, rounds: int, only: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Benchmark process_query, every tool function and the baseline evaluator"""
+    question = (agent.baseline_questions or [{"question": SAMPLE_QUERY, "keywords": ["RCTs", "seizure frequency"]}])[0]
+    sample_response = (
+        "Multiple randomized controlled trials (RCTs) show cannabidiol reduces seizure frequency in "
+        "treatment-resistant epilepsy; the FDA approved Epidiolex based on this clinical trial evidence."
+    )
+    counter = iter(range(10 ** 9))
+
+    async def fresh_session_query():
+        user_id = f"bench:{next(counter)}"
+        await agent.process_query(user_id, SAMPLE_QUERY, use_cache=False)
+        await agent.aclear_user_memory(user_id)
+
+    async def ongoing_session_query():
+        await agent.process_query("bench:ongoing", SAMPLE_QUERY, use_cache=False)
+
+    sync_cases = {
+        "tool.pubmed_literature_search": lambda: agent._pubmed_search(SAMPLE_QUERY),
+        "tool.evidence_quality_assessment": lambda: agent._assess_evidence_quality(SAMPLE_STUDY),
+        "tool.evidence_quality_assessment.batch": lambda: agent._assess_evidence_quality(SAMPLE_ABSTRACTS),
+        "tool.scientific_claim_validation": lambda: agent._validate_scientific_claim("CBD reduces seizures"),
+        "tool.meta_analysis_synthesis": lambda: agent._synthesize_meta_analysis(SAMPLE_STUDIES),
+        "evaluate_baseline_response.batch": lambda: agent.response_evaluator.evaluate_many(
+            [question] * 1000, [sample_response] * 1000
+        ),
+    }
+    if agent.literature_store:
+        sync_cases["tool.research_trend_analysis"] = lambda: agent._analyze_research_trends("cannabidiol epilepsy")
+    if agent.retriever:
+        sync_cases["tool.scientific_knowledge_search"] = lambda: agent._rag_search(SAMPLE_QUERY)
+    if agent.sparql_engine and agent.sparql_generator:
+        sync_cases["tool.structured_science_query"] = lambda: agent._sparql_query("CBD epilepsy research")
+    async_cases = {
+        "process_query.fresh_session": fresh_session_query,
+        "process_query.ongoing_session": ongoing_session_query,
+        "evaluate_baseline_response": lambda: agent._evaluate_baseline_response(question, sample_response),
+    }
+
+    selected = lambda name: not only or any(name.startswith(prefix) for prefix in only)
+    results = []
+    for name, fn in sync_cases.items():
+        if selected(name):
+            # Tools are called from worker threads by the executor, so time them off the loop too
+            results.append(await asyncio.to_thread(bench, name, fn, rounds))
+    for name, fn in async_cases.items():
+        if selected(name):
+            results.append(await abench(name, fn, rounds))
+    await agent.aclear_user_memory("bench:ongoing")
+    return results
+
+
+def compare_results(current: List[Dict[str, Any]], previous: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Relative change in p50 per benchmark, current over previous"""
+    before = {result["name"]: result for result in previous}
+    return [{
+        "name": result["name"],
+        "p50_change": result["p50_us"] / before[result["name"]]["p50_us"] - 1 if before[result["name"]]["p50_us"] else 0.0,
+    } for result in current if result["name"] in before]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark agent overhead offline on the scripted LLM')
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    parser.add_argument('--rounds', type=int, default=200, help='Timed rounds per benchmark')
+    parser.add_argument('--only', type=str, nargs='*', help='Benchmark name prefixes to run')
+    parser.add_argument('--output', type=str, help='Write results as JSON')
+    parser.add_argument('--compare', type=str, help='Previous results to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='With --compare, exit non-zero if any p50 grows by more than this fraction')
+    args = parser.parse_args()
+
+    agent = OfflineScienceAgent(args.agent_path)
+    results = asyncio.run(run_benchmarks(agent, args.rounds, args.only))
+    agent.pubmed_client.close()
+
+    print(f"{'benchmark':<36}{'p50 (us)':>12}{'p95 (us)':>12}{'ops/s':>12}")
+    for result in results:
+        print(f"{result['name']:<36}{result['p50_us']:>12.1f}{result['p95_us']:>12.1f}{result['ops_per_second']:>12.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rounds": args.rounds, "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            changes = compare_results(results, json.load(f)["results"])
+        regressions = [c for c in changes if c["p50_change"] > args.max_regression]
+        for change in changes:
+            print(f"{change['name']:<36}{change['p50_change']:>+12.1%}")
+        if regressions:
+            raise SystemExit(f"p50 regressed by more than {args.max_regression:.0%}: "
+                             f"{', '.join(c['name'] for c in regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Batch validation of scientific claims
+
+Claims are streamed from a JSONL or CSV file in chunks. Near-identical
+claims (same words up to case, punctuation and filler words) are validated
+once, and the claim-evidence index lookups run in a process pool when
+workers > 1. Results are appended to a JSONL file as each chunk finishes,
+and a rerun with the same output skips the claims already written, so an
+interrupted run resumes where it stopped.
+"""
+
+import os
+import re
+import csv
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterator, Tuple, Callable
+
+from results import ClaimValidation, to_native
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Words that do not change what a claim asserts
+_FILLER = frozenset({"a", "an", "the", "is", "are", "can", "may", "does", "do", "that", "it", "of", "to", "for", "in"})
+
+
+def claim_key(claim: str) -> str:
+    """Key shared by near-identical claims"""
+    return " ".join(word for word in _WORD.findall(claim.casefold()) if word not in _FILLER)
+
+
+def iter_claims(path: str) -> Iterator[Tuple[str, str]]:
+    """Stream (claim id, claim) from a JSONL file or a CSV file with a claim column
+
+    Records without an ``id`` are numbered by their position in the file.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if extension == ".csv":
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for position, record in enumerate(records):
+            claim = (record.get("claim") or record.get("text") or "").strip()
+            if claim:
+                yield str(record.get("id") or position), claim
+
+
+def _validate_chunk(validate: Callable[[str], ClaimValidation], claims: List[str]) -> List[Dict[str, Any]]:
+    return [to_native(validate(claim)) for claim in claims]
+
+
+# The validate callable of a pool worker, set once when the worker starts
+_worker_validate: Optional[Callable[[str], ClaimValidation]] = None
+
+
+def _init_worker(validate: Callable[[str], ClaimValidation]):
+    global _worker_validate
+    _worker_validate = validate
+
+
+def _validate_in_worker(claims: List[str]) -> List[Dict[str, Any]]:
+    return _validate_chunk(_worker_validate, claims)
+
+
+class ClaimBatchValidator:
+    """
+    Validates a file of claims with deduplication and resumable output
+    """
+
+    def __init__(
+        self,
+        validate: Callable[[str], ClaimValidation],
+        chunk_size: int = 256,
+        workers: int = 0,
+    ):
+        self.validate = validate
+        self.chunk_size = chunk_size
+        self.workers = workers
+        # claim key -> result, shared by every duplicate in the run
+        self._results: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_config(cls, validate, batch_config: Dict[str, Any], **overrides) -> "ClaimBatchValidator":
+        """Build a validator from the ``claim_validation`` section of agent_config.yaml"""
+        settings = {
+            "chunk_size": batch_config.get("chunk_size", 256),
+            "workers": batch_config.get("workers", 0),
+        }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(validate, **settings)
+
+    def _resolve(self, claims: List[str], pool: Optional[ProcessPoolExecutor]) -> List[Dict[str, Any]]:
+        if pool is None:
+            return _validate_chunk(self.validate, claims)
+        size = max(1, -(-len(claims) // self.workers))
+        # Only the claims cross the process boundary; each worker received validate once at startup
+        parts = pool.map(_validate_in_worker, [claims[i:i + size] for i in range(0, len(claims), size)])
+        return [result for part in parts for result in part]
+
+    @staticmethod
+    def _trim_partial_line(output_path: str, block_size: int = 65536):
+        """Cut a last line left unterminated by a crash, so appended records start on a line of their own"""
+        with open(output_path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - block_size)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                f.truncate(position)
+
+    @classmethod
+    def _completed(cls, output_path: str) -> set:
+        """Claim ids already written by an earlier run"""
+        done = set()
+        if not os.path.exists(output_path):
+            return done
+        # The claim of a partial last line is validated again
+        cls._trim_partial_line(output_path)
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    continue
+        return done
+
+    def run(self, input_path: str, output_path: str) -> Dict[str, int]:
+        """Validate every claim in input_path, appending results to output_path"""
+        done = self._completed(output_path)
+        claims = ((claim_id, claim) for claim_id, claim in iter_claims(input_path) if claim_id not in done)
+        stats = {"skipped": len(done), "validated": 0, "duplicates": 0}
+
+        if os.path.dirname(output_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.validate,))
+        try:
+            with open(output_path, "a", encoding="utf-8") as out:
+                while True:
+                    chunk = list(islice(claims, self.chunk_size))
+                    if not chunk:
+                        break
+                    pending: Dict[str, str] = {}
+                    for _, claim in chunk:
+                        key = claim_key(claim)
+                        if key not in self._results and key not in pending:
+                            pending[key] = claim
+                    for key, result in zip(pending, self._resolve(list(pending.values()), pool)):
+                        self._results[key] = result
+                    stats["validated"] += len(pending)
+                    stats["duplicates"] += len(chunk) - len(pending)
+
+                    for claim_id, claim in chunk:
+                        result = self._results[claim_key(claim)]
+                        out.write(json.dumps({
+                            "id": claim_id,
+                            "claim": claim,
+                            **{k: v for k, v in result.items() if k != "claim"},
+                            "canonical_claim": result["claim"]
+                        }, ensure_ascii=False) + "\n")
+                    out.flush()
+                    logger.info(f"Validated {stats['validated']} distinct claims, {stats['duplicates']} duplicates")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return stats
@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""
+Precomputed claim-evidence index for scientific claim validation
+Usage: python claim_index.py [--agent-path .]
+
+Evidence is keyed by (compound, condition, outcome) with every entity in
+canonical form, so "CBD", "cannabidiol" and "Epidiolex" share one entry.
+The index is built offline from the RDF knowledge base (curated research
+findings and therapeutic-area evidence grades) and from the local
+literature store (publication counts per study design for every compound
+and condition named together in MeSH headings or titles), then written as
+JSON. Validating a claim is one pass of a compiled entity pattern over the
+claim, a few dict lookups and the assembly of the result, with no LLM,
+network or retrieval call.
+"""
+
+import os
+import re
+import json
+import argparse
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import numpy as np
+import yaml
+from rdflib import Graph, Namespace, RDF, RDFS
+from rdflib.collection import Collection
+
+import rdf_compile
+from response_cache import knowledge_version
+from results import ClaimValidation, slotted
+
+SCIENCE = Namespace("http://formul8.ai/ontology/science#")
+RESEARCH = Namespace("http://formul8.ai/ontology/research#")
+MEDICAL = Namespace("http://formul8.ai/ontology/medical#")
+
+# Canonical entity -> surface forms, matched case-insensitively on word boundaries
+COMPOUNDS = {
+    "cannabidiol": ("cannabidiol", "cbd", "epidiolex", "epidyolex"),
+    "thc": ("thc", "delta-9-thc", "delta 9 thc", "δ9-thc", "tetrahydrocannabinol", "dronabinol", "marinol",
+            "nabilone", "cesamet"),
+    "nabiximols": ("nabiximols", "sativex"),
+    "cannabigerol": ("cannabigerol", "cbg"),
+    "cannabinol": ("cannabinol", "cbn"),
+    "cannabis": ("cannabis", "medical cannabis", "marijuana", "medical marijuana", "marihuana", "cannabinoids",
+                 "cannabinoid"),
+}
+CONDITIONS = {
+    "epilepsy": ("epilepsy", "epileptic", "seizure", "seizures", "dravet syndrome", "dravet",
+                 "lennox-gastaut syndrome", "lennox-gastaut", "lgs", "tuberous sclerosis complex"),
+    "pain": ("pain", "chronic pain", "neuropathic pain", "cancer pain", "analgesia", "analgesic"),
+    "cancer": ("cancer", "cancers", "tumor", "tumors", "tumour", "tumours", "neoplasms", "oncology", "glioma",
+               "glioblastoma"),
+    "nausea": ("nausea", "vomiting", "emesis", "antiemetic", "chemotherapy-induced nausea"),
+    "appetite loss": ("appetite", "anorexia", "cachexia", "wasting", "weight loss"),
+    "addiction": ("addiction", "addictive", "dependence", "cannabis use disorder", "marijuana abuse",
+                  "substance-related disorders", "withdrawal"),
+    "anxiety": ("anxiety", "anxiety disorders", "anxiolytic", "social anxiety"),
+    "depression": ("depression", "depressive disorder", "antidepressant"),
+    "ptsd": ("ptsd", "post-traumatic stress disorder", "stress disorders, post-traumatic"),
+    "sleep disorders": ("insomnia", "sleep", "sleep disturbances", "sleep initiation and maintenance disorders"),
+    "multiple sclerosis": ("multiple sclerosis", "spasticity"),
+    "parkinson's disease": ("parkinson's disease", "parkinson disease", "parkinson's", "parkinsonism"),
+    "alzheimer's disease": ("alzheimer's disease", "alzheimer disease", "alzheimer's", "dementia"),
+    "glaucoma": ("glaucoma", "intraocular pressure"),
+    "schizophrenia": ("schizophrenia", "psychosis", "psychotic disorders"),
+    "inflammation": ("inflammation", "anti-inflammatory", "inflammatory"),
+}
+OUTCOMES = {
+    "seizure frequency": ("seizure frequency", "seizure reduction", "seizure", "seizures", "convulsions"),
+    "pain intensity": ("pain relief", "pain reduction", "pain intensity", "relieves pain", "analgesia"),
+    "nausea and vomiting": ("nausea", "vomiting", "emesis"),
+    "appetite": ("appetite", "weight gain"),
+    "tumor growth": ("tumor growth", "tumour growth", "tumor effects", "antitumor", "anti-tumor", "antineoplastic",
+                     "apoptosis"),
+    "sleep quality": ("sleep quality", "sleep"),
+    "dependence": ("dependence", "addiction", "addictive", "withdrawal"),
+    "spasticity": ("spasticity",),
+    "adverse events": ("adverse events", "side effects", "safety", "hepatotoxicity", "liver function"),
+    "mortality": ("mortality", "survival"),
+}
+ANY_OUTCOME = "*"
+# Evidence for the broader compound still bears on a claim about a single cannabinoid, less directly
+PARENT_COMPOUNDS = {"cannabidiol": "cannabis", "thc": "cannabis", "nabiximols": "cannabis",
+                    "cannabigerol": "cannabis", "cannabinol": "cannabis"}
+# Claims that name no compound are about cannabis, the agent's domain
+DEFAULT_COMPOUND = "cannabis"
+
+# Grade -> (evidence_status, confidence_level) of curated evidence
+_LEVELS = {
+    "high": ("Strong Evidence", "High"),
+    "moderate": ("Moderate Evidence", "Moderate"),
+    "mixed": ("Mixed Evidence", "Moderate"),
+    "limited": ("Limited Evidence", "Low"),
+}
+_LEVEL_ALIASES = {"strong": "high", "high": "high", "moderate": "moderate", "mixed": "mixed",
+                  "limited": "limited", "low": "limited", "weak": "limited"}
+_LEVEL_RANK = {"high": 0, "moderate": 1, "mixed": 2, "limited": 3}
+_CONFIDENCE = ["High", "Moderate", "Low", "Very Low"]
+_SIGNIFICANCE = {
+    "high": "Established clinical evidence",
+    "moderate": "Supportive evidence; weigh against individual patient factors",
+    "mixed": "Conflicting findings; important consideration for clinical use",
+    "limited": "Research stage - not established therapy",
+}
+_RECOMMENDATIONS = {
+    "high": ["Consider in line with current clinical guidelines", "Monitor for adverse effects"],
+    "moderate": ["Consider case by case", "Monitor response and adverse effects"],
+    "mixed": ["Weigh conflicting evidence", "Monitor closely"],
+    "limited": ["More research needed", "Not recommended as primary treatment"],
+}
+# Literature store study types, strongest design first
+_SYNTHESES = ("meta_analysis", "systematic_review")
+_DESIGN_RANK = {"meta_analysis": 0, "systematic_review": 0, "randomized_controlled_trial": 1, "clinical_trial": 2,
+                "observational_study": 2, "comparative_study": 2, "narrative_review": 3, "case_report": 3}
+_AREA_EVIDENCE = re.compile(r"^\s*(.+?)\s*:\s*(\w+)\s+evidence", re.IGNORECASE)
+# Indexed evidence grades a compound's benefit for a condition, so a claim that denies the benefit or
+# asserts harm or causation cannot take the grade; matched outside entity mentions ("chemotherapy-induced")
+_NEGATION = re.compile(
+    r"(?<!\w)(?:not|no|never|neither|nor|cannot|can['’]t|(?:does|do|did|is|are|was|were|has|have)n['’]t"
+    r"|won['’]t|fail(?:s|ed)?\s+to|ineffective|unrelated)(?!\w)"
+)
+_DIRECTION = re.compile(
+    r"(?<!\w)(?:caus(?:es?|ed|ing)|induc(?:es?|ed|ing)|trigger(?:s|ed|ing)?|provok(?:es?|ed|ing)"
+    r"|lead(?:s|ing)?\s+to|led\s+to|result(?:s|ed|ing)?\s+in|(?:increas|rais)(?:es?|ed|ing)\s+(?:the\s+)?risk"
+    r"|risk\s+(?:of|for)|wors(?:ens?|ened|ening)|exacerbat(?:es?|ed|ing)|aggravat(?:es?|ed|ing))(?!\w)"
+)
+
+logger = logging.getLogger(__name__)
+
+
+@slotted
+@dataclass
+class EvidenceEntry:
+    compound: str
+    condition: str
+    outcome: str = ANY_OUTCOME
+    evidence_level: str = "limited"
+    curated: bool = False
+    sources: List[str] = field(default_factory=list)
+    findings: List[str] = field(default_factory=list)
+    study_designs: List[str] = field(default_factory=list)
+    limitations: List[str] = field(default_factory=list)
+    contradictions: List[str] = field(default_factory=list)
+    clinical_significance: str = ""
+    recommendations: List[str] = field(default_factory=list)
+    citations: List[str] = field(default_factory=list)
+    study_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.compound, self.condition, self.outcome
+
+
+class EntityNormalizer:
+    """
+    Maps compound, condition and outcome mentions to canonical names with one compiled pattern
+    """
+
+    KINDS = ("compound", "condition", "outcome")
+
+    def __init__(self, extra_terms: Optional[Dict[str, Dict[str, str]]] = None):
+        self.extra_terms: Dict[str, Dict[str, str]] = {kind: {} for kind in self.KINDS}
+        for kind, terms in (extra_terms or {}).items():
+            self.extra_terms[kind].update(terms)
+        self._compile()
+
+    def _compile(self):
+        # Surface form -> [(kind, canonical)]; one form can name a condition and an outcome
+        self._forms: Dict[str, List[Tuple[str, str]]] = {}
+        for kind, table in zip(self.KINDS, (COMPOUNDS, CONDITIONS, OUTCOMES)):
+            terms = [(form, canonical) for canonical, forms in table.items() for form in forms]
+            terms.extend(self.extra_terms[kind].items())
+            for form, canonical in terms:
+                self._forms.setdefault(form.casefold(), []).append((kind, canonical))
+        # Longest forms first, so "chronic pain" wins over "pain"
+        alternation = "|".join(re.escape(form) for form in sorted(self._forms, key=len, reverse=True))
+        self._pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+
+    def find(self, text: str) -> Dict[str, List[str]]:
+        """Canonical entities of each kind, in order of first mention"""
+        found: Dict[str, List[str]] = {kind: [] for kind in self.KINDS}
+        for match in self._pattern.finditer(text.casefold()):
+            for kind, canonical in self._forms[match.group()]:
+                if canonical not in found[kind]:
+                    found[kind].append(canonical)
+        return found
+
+    def mentions(self, text: str) -> List[Tuple[int, int, List[Tuple[str, str]]]]:
+        """(start, end, [(kind, canonical), ...]) for every entity mention in text"""
+        return [(match.start(), match.end(), self._forms[match.group()]) for match in self._pattern.finditer(text.casefold())]
+
+    def forms(self, kind: str) -> Dict[str, List[str]]:
+        """Canonical entity -> its surface forms, for one kind"""
+        forms: Dict[str, List[str]] = {}
+        for form, names in self._forms.items():
+            for form_kind, canonical in names:
+                if form_kind == kind:
+                    forms.setdefault(canonical, []).append(form)
+        return forms
+
+    def cues(self, text: str) -> Tuple[List[str], List[str]]:
+        """Negation and causal or direction cues of a claim, outside its entity mentions"""
+        text = text.casefold()
+        for start, end, _ in reversed(self.mentions(text)):
+            text = text[:start] + " " * (end - start) + text[end:]
+        return ([match.group() for match in _NEGATION.finditer(text)],
+                [re.sub(r"\s+", " ", match.group()) for match in _DIRECTION.finditer(text)])
+
+    def first(self, kind: str, text: str) -> Optional[str]:
+        names = self.find(text)[kind]
+        return names[0] if names else None
+
+    def extend(self, kind: str, labels: Iterable[str]) -> List[str]:
+        """Add knowledge base labels the tables do not cover as entities of their own"""
+        added = [label.casefold() for label in labels if self.first(kind, label) is None]
+        if added:
+            self.extra_terms[kind].update({label: label for label in added})
+            self._compile()
+        return added
+
+
+def _level(text: str) -> str:
+    return _LEVEL_ALIASES.get(text.strip().split()[0].casefold(), "limited") if text.strip() else "limited"
+
+
+def _list(graph: Graph, subject, predicate) -> List[str]:
+    node = graph.value(subject, predicate)
+    if node is None:
+        return []
+    return [str(item) for item in Collection(graph, node)]
+
+
+def _absorb(entries: Dict[Tuple[str, str, str], EvidenceEntry], entry: EvidenceEntry):
+    """Add an entry, merging into one already indexed under the same key"""
+    existing = entries.get(entry.key)
+    if existing is None:
+        entries[entry.key] = entry
+        return
+    if entry.curated and not existing.curated:
+        existing.evidence_level = entry.evidence_level
+        existing.curated = True
+    for name in ("sources", "findings", "study_designs", "limitations", "contradictions", "recommendations",
+                 "citations"):
+        merged = getattr(existing, name)
+        merged.extend(item for item in getattr(entry, name) if item not in merged)
+    existing.clinical_significance = existing.clinical_significance or entry.clinical_significance
+    for design, count in entry.study_counts.items():
+        existing.study_counts[design] = existing.study_counts.get(design, 0) + count
+
+
+def entries_from_graph(graph: Graph, normalizer: EntityNormalizer) -> List[EvidenceEntry]:
+    """Curated evidence: research findings and the graded evidence of therapeutic areas"""
+    for predicate, kind in ((RESEARCH.compounds, "compound"), (RESEARCH.conditions, "condition"),
+                            (MEDICAL.conditions, "condition")):
+        for subject in graph.subjects(predicate, None):
+            normalizer.extend(kind, _list(graph, subject, predicate))
+
+    entries = []
+    for finding in graph.subjects(RDF.type, SCIENCE.ResearchFinding):
+        compound = normalizer.first("compound", str(graph.value(finding, SCIENCE.intervention) or ""))
+        condition = normalizer.first("condition", str(graph.value(finding, SCIENCE.condition) or ""))
+        if compound is None or condition is None:
+            logger.warning(f"Skipping research finding {finding}: intervention or condition not recognized")
+            continue
+        outcome = graph.value(finding, SCIENCE.outcome)
+        entries.append(EvidenceEntry(
+            compound=compound,
+            condition=condition,
+            outcome=(normalizer.first("outcome", str(outcome)) or ANY_OUTCOME) if outcome else ANY_OUTCOME,
+            evidence_level=_level(str(graph.value(finding, SCIENCE.evidenceLevel) or "")),
+            curated=True,
+            sources=[str(graph.value(finding, RDFS.label) or finding)],
+            findings=_list(graph, finding, SCIENCE.findings),
+            study_designs=_list(graph, finding, SCIENCE.studyTypes),
+            limitations=_list(graph, finding, SCIENCE.limitations),
+            contradictions=_list(graph, finding, SCIENCE.contradictions),
+            clinical_significance=str(graph.value(finding, SCIENCE.clinicalSignificance) or ""),
+            recommendations=_list(graph, finding, SCIENCE.recommendations),
+        ))
+
+    # "Nausea: Strong evidence" lines of a therapeutic area, for cannabis as a whole
+    for area in graph.subjects(MEDICAL.evidence, None):
+        label = str(graph.value(area, RDFS.label) or area)
+        for line in _list(graph, area, MEDICAL.evidence):
+            match = _AREA_EVIDENCE.match(line)
+            condition = normalizer.first("condition", match.group(1)) if match else None
+            if condition is None:
+                continue
+            entries.append(EvidenceEntry(
+                compound=DEFAULT_COMPOUND,
+                condition=condition,
+                evidence_level=_level(match.group(2)),
+                curated=True,
+                sources=[label],
+                findings=[f"{match.group(1)}: {match.group(2).lower()} evidence ({label})"],
+            ))
+    return entries
+
+
+def _entity_rows(store, normalizer: EntityNormalizer, kind: str) -> Dict[str, np.ndarray]:
+    """Boolean mask over the store's records for every canonical entity of a kind"""
+    masks = {}
+    for canonical, forms in normalizer.forms(kind).items():
+        mask = np.zeros(len(store), dtype=bool)
+        for form in forms:
+            mask[store.match(form, synonyms=False)] = True
+        if mask.any():
+            masks[canonical] = mask
+    return masks
+
+
+def _literature_entry(store, rows: np.ndarray, key: Tuple[str, str, str], citation_limit: int) -> EvidenceEntry:
+    codes = store.study_type_codes[rows]
+    counts = np.bincount(codes, minlength=len(store.study_types))
+    study_counts = {str(name): int(count) for name, count in zip(store.study_types, counts) if count}
+    syntheses = sum(study_counts.get(name, 0) for name in _SYNTHESES)
+    trials = study_counts.get("randomized_controlled_trial", 0)
+    controlled = sum(study_counts.get(name, 0) for name in ("clinical_trial", "observational_study",
+                                                            "comparative_study"))
+    if (syntheses and trials) or trials >= 3:
+        level = "high"
+    elif syntheses or trials or controlled >= 3:
+        level = "moderate"
+    else:
+        level = "limited"
+
+    # Strongest designs first, then the most recent
+    rank = np.array([_DESIGN_RANK.get(str(name), 4) for name in store.study_types])[codes]
+    order = np.lexsort((-store.years[rows], rank))[:citation_limit]
+    citations = [
+        f"PMID {store.pmids[row]} ({store.study_types[store.study_type_codes[row]].replace('_', ' ')}, "
+        f"{store.years[row]})"
+        for row in rows[order]
+    ]
+    return EvidenceEntry(
+        compound=key[0], condition=key[1], outcome=key[2], evidence_level=level,
+        sources=["literature store"], citations=citations, study_counts=study_counts,
+    )
+
+
+def entries_from_literature(store, normalizer: EntityNormalizer, min_records: int = 2,
+                            citation_limit: int = 5) -> List[EvidenceEntry]:
+    """Evidence bases of every compound-condition(-outcome) combination the literature covers"""
+    if store is None or not len(store):
+        return []
+    compounds = _entity_rows(store, normalizer, "compound")
+    conditions = _entity_rows(store, normalizer, "condition")
+    outcomes = _entity_rows(store, normalizer, "outcome")
+    entries = []
+    for compound, compound_mask in compounds.items():
+        for condition, condition_mask in conditions.items():
+            pair = compound_mask & condition_mask
+            if pair.sum() < min_records:
+                continue
+            entries.append(_literature_entry(store, np.flatnonzero(pair), (compound, condition, ANY_OUTCOME),
+                                             citation_limit))
+            for outcome, outcome_mask in outcomes.items():
+                rows = np.flatnonzero(pair & outcome_mask)
+                if len(rows) >= min_records:
+                    entries.append(_literature_entry(store, rows, (compound, condition, outcome), citation_limit))
+    return entries
+
+
+class ClaimEvidenceIndex:
+    """
+    (compound, condition, outcome) -> graded evidence, with claim validation by lookup
+    """
+
+    def __init__(self, entries: Iterable[EvidenceEntry], normalizer: Optional[EntityNormalizer] = None,
+                 version: str = "", citation_limit: int = 5):
+        self.normalizer = normalizer or EntityNormalizer()
+        self.version = version
+        self.citation_limit = citation_limit
+        self.entries: Dict[Tuple[str, str, str], EvidenceEntry] = {}
+        for entry in entries:
+            _absorb(self.entries, entry)
+        # (compound, condition) -> outcomes indexed for the pair
+        self._pairs: Dict[Tuple[str, str], List[str]] = {}
+        for compound, condition, outcome in self.entries:
+            self._pairs.setdefault((compound, condition), []).append(outcome)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, graph: Optional[Graph], store=None, min_records: int = 2, citation_limit: int = 5,
+              version: str = "") -> "ClaimEvidenceIndex":
+        """Index the curated evidence of the RDF graph and the evidence bases in the literature store"""
+        normalizer = EntityNormalizer()
+        entries = entries_from_graph(graph, normalizer) if graph is not None else []
+        entries.extend(entries_from_literature(store, normalizer, min_records, citation_limit))
+        return cls(entries, normalizer, version, citation_limit)
+
+    @classmethod
+    def load(cls, path: str, citation_limit: int = 5) -> "ClaimEvidenceIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            [EvidenceEntry(**entry) for entry in data["entries"]],
+            EntityNormalizer(data.get("terms")),
+            data.get("version", ""),
+            citation_limit,
+        )
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], agent_path: str = ".") -> "ClaimEvidenceIndex":
+        """Load the index described by the ``claim_index`` section of agent_config.yaml
+
+        Without a built index, the RDF knowledge base is indexed in process;
+        literature evidence needs an offline build with claim_index.py.
+        """
+        index_config = config.get("claim_index", {})
+        path = os.path.join(agent_path, index_config.get("path", "rag/claim_index.json"))
+        citation_limit = index_config.get("citation_limit", 5)
+        version = source_version(config, agent_path)
+        if os.path.exists(path):
+            index = cls.load(path, citation_limit)
+            if index.version != version:
+                logger.warning(f"{path} predates the knowledge base or literature store; rebuild with claim_index.py")
+            return index
+        sources = [source for source in rdf_compile.knowledge_sources(agent_path, config.get("rdf_knowledge", {}))
+                   if os.path.exists(source)]
+        logger.warning(f"{path} not found; indexing the RDF knowledge base only, without literature evidence")
+        graph = rdf_compile.parse_sources(sources) if sources else None
+        return cls.build(graph, citation_limit=citation_limit)
+
+    def save(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = {
+            "version": self.version,
+            "terms": self.normalizer.extra_terms,
+            "entries": [asdict(entry) for entry in self.entries.values()],
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def lookup(self, claim: str) -> Tuple[Optional[EvidenceEntry], bool, Dict[str, List[str]]]:
+        """Best entry for a claim, whether it is for a broader compound, and the entities found"""
+        entities = self.normalizer.find(claim)
+        compounds = entities["compound"] or [DEFAULT_COMPOUND]
+        best, best_score = None, None
+        for compound in compounds:
+            chain = [(compound, False)]
+            if compound in PARENT_COMPOUNDS:
+                chain.append((PARENT_COMPOUNDS[compound], True))
+            for indexed_compound, indirect in chain:
+                for condition in entities["condition"]:
+                    for outcome in self._pairs.get((indexed_compound, condition), ()):
+                        entry = self.entries[(indexed_compound, condition, outcome)]
+                        if outcome in entities["outcome"]:
+                            specificity = 0
+                        elif outcome == ANY_OUTCOME:
+                            specificity = 1
+                        else:
+                            specificity = 2
+                        score = (indirect, not entry.curated, specificity, _LEVEL_RANK[entry.evidence_level])
+                        if best_score is None or score < best_score:
+                            best, best_score = entry, score
+        return best, bool(best_score and best_score[0]), entities
+
+    def validate(self, claim: str) -> ClaimValidation:
+        """Validate a claim from the indexed evidence for the entities it names"""
+        entry, indirect, entities = self.lookup(claim)
+        negations, directions = self.normalizer.cues(claim)
+        if entry is not None and (negations or directions):
+            return self._review(claim, entry, indirect, negations, directions)
+        if entry is None:
+            named = entities["compound"] + entities["condition"]
+            summary = (f"No indexed evidence for {' and '.join(named)}" if named
+                       else "No recognized compound or condition in the claim")
+            return ClaimValidation(
+                claim=claim,
+                evidence_status="Insufficient Data",
+                confidence_level="Very Low",
+                evidence_summary=summary,
+                recommendations=["Requires systematic literature review", "Consider consulting recent meta-analyses"]
+            )
+
+        level = entry.evidence_level
+        if entry.curated:
+            evidence_status, confidence = _LEVELS[level]
+            summary = "; ".join(entry.findings)
+        else:
+            # Co-occurrence in the literature grades the evidence base, not the direction of the effect
+            evidence_status, confidence = "Evidence Available", _LEVELS[level][1]
+            summary = (f"{sum(entry.study_counts.values())} indexed publications address {entry.compound} "
+                       f"and {entry.condition}; direction of effect not graded")
+        if entry.limitations:
+            summary += f". Limitations: {', '.join(entry.limitations)}"
+        if indirect:
+            confidence = _CONFIDENCE[min(_CONFIDENCE.index(confidence) + 1, len(_CONFIDENCE) - 1)]
+            summary = f"Evidence for {entry.compound} generally, not {', '.join(entities['compound'])} specifically: " \
+                      f"{summary}"
+        recommendations = list(entry.recommendations or _RECOMMENDATIONS[level])
+        if not entry.curated:
+            recommendations.append("Review the cited studies for the direction and size of the effect")
+        return ClaimValidation(
+            claim=claim,
+            evidence_status=evidence_status,
+            confidence_level=confidence,
+            supporting_studies=entry.study_designs + entry.citations[:self.citation_limit],
+            contradicting_studies=list(entry.contradictions),
+            evidence_summary=summary,
+            clinical_significance=entry.clinical_significance or _SIGNIFICANCE[level],
+            recommendations=recommendations,
+        )
+
+    def _review(self, claim: str, entry: EvidenceEntry, indirect: bool, negations: List[str],
+                directions: List[str]) -> ClaimValidation:
+        """Negated or causal claims go to review with the indexed evidence rather than its grade"""
+        reasons = []
+        if negations:
+            reasons.append(f"negated ({', '.join(negations)})")
+        if directions:
+            reasons.append(f"asserts causation or harm ({', '.join(directions)})")
+        compound = f"{entry.compound} generally" if indirect else entry.compound
+        summary = (f"Claim is {' and '.join(reasons)}; indexed evidence for {compound} and {entry.condition} "
+                   f"is graded {entry.evidence_level} for benefit and does not grade this claim")
+        if entry.findings:
+            summary += f". Findings: {'; '.join(entry.findings)}"
+        return ClaimValidation(
+            claim=claim,
+            evidence_status="Requires Review",
+            confidence_level="Very Low",
+            supporting_studies=entry.study_designs + entry.citations[:self.citation_limit],
+            contradicting_studies=list(entry.contradictions),
+            evidence_summary=summary,
+            clinical_significance=entry.clinical_significance or _SIGNIFICANCE[entry.evidence_level],
+            recommendations=["Review the cited studies for the direction of the effect",
+                             "Requires systematic literature review"],
+        )
+
+
+def source_version(config: Dict[str, Any], agent_path: str = ".") -> str:
+    """Fingerprint of the knowledge base and literature store files the index is built from"""
+    paths = rdf_compile.knowledge_sources(agent_path, config.get("rdf_knowledge", {}))
+    literature_path = os.path.join(agent_path, config.get("literature_store", {}).get("path", "rag/literature"))
+    if os.path.isdir(literature_path):
+        paths.extend(os.path.join(literature_path, name) for name in os.listdir(literature_path)
+                     if name.endswith(".parquet"))
+    return knowledge_version(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the claim-evidence index from the knowledge base and literature')
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(os.path.join(args.agent_path, "agent_config.yaml"), "r") as f:
+        config = yaml.safe_load(f) or {}
+    index_config = config.get("claim_index", {})
+    sources = [source for source in rdf_compile.knowledge_sources(args.agent_path, config.get("rdf_knowledge", {}))
+               if os.path.exists(source)]
+
+    from literature_store import LiteratureStore
+
+    store = LiteratureStore.from_config(config.get("literature_store", {}), args.agent_path)
+    index = ClaimEvidenceIndex.build(
+        rdf_compile.parse_sources(sources) if sources else None,
+        store,
+        min_records=index_config.get("min_records", 2),
+        citation_limit=index_config.get("citation_limit", 5),
+        version=source_version(config, args.agent_path),
+    )
+    output_path = os.path.join(args.agent_path, index_config.get("path", "rag/claim_index.json"))
+    index.save(output_path)
+    curated = sum(entry.curated for entry in index.entries.values())
+    print(json.dumps({"path": output_path, "entries": len(index), "curated": curated,
+                      "literature_records": len(store)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Token-budgeted prompt context for the Science Agent
+
+The conversation history and the agent scratchpad share a token budget:
+``context.max_tokens``, or by default what is left of the model's context
+window after the completion (``llm.max_tokens``) and the system prompt and
+tool schemas (``context.reserve_tokens``). History keeps the newest turns
+verbatim and folds older ones into a running summary; the scratchpad drops
+the oldest tool outputs first when a run gathers more evidence than fits.
+Outputs of the latest step are never dropped, only truncated, since the
+model has not seen them yet.
+"""
+
+import re
+from typing import Dict, List, Any, Optional
+
+from langchain.schema import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import ToolMessage, FunctionMessage
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+OMITTED_OUTPUT = "[Tool output omitted to fit the context budget]"
+TRUNCATED_OUTPUT = "\n[Tool output truncated to fit the context budget]"
+# Context window by model name prefix; the longest matching prefix wins
+CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106": 128000,
+    "gpt-4-0125": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+# Per-message overhead of the chat format, in tokens
+MESSAGE_OVERHEAD = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise about four characters per token"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Leading part of text within max_tokens, marked as truncated when cut"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens - count_tokens(TRUNCATED_OUTPUT))
+    if _ENCODING is not None:
+        head = _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:keep])
+    else:
+        head = text[:keep * 4]
+    return head + TRUNCATED_OUTPUT
+
+
+def context_window(model: str, configured: Optional[int] = None) -> int:
+    """Context window of a model, from config or the known model prefixes"""
+    if configured:
+        return configured
+    prefixes = [prefix for prefix in CONTEXT_WINDOWS if model.startswith(prefix)]
+    return CONTEXT_WINDOWS[max(prefixes, key=len)] if prefixes else DEFAULT_CONTEXT_WINDOW
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return count_tokens(str(message.content)) + MESSAGE_OVERHEAD
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    sentence = _SENTENCE_END.split(text, 1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit - 3] + "..."
+
+
+def summarize_turns(summary: str, messages: List[BaseMessage], max_tokens: int = 300) -> str:
+    """Fold turns into a running summary, keeping its most recent lines within max_tokens
+
+    Extractive: each turn becomes the question and the first sentence of the
+    answer, so summarizing costs no model call.
+    """
+    lines = summary.splitlines() if summary else []
+    question = None
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            question = _first_sentence(str(message.content), 160)
+        elif isinstance(message, AIMessage):
+            answer = _first_sentence(str(message.content), 240)
+            lines.append(f"- Q: {question} A: {answer}" if question else f"- A: {answer}")
+            question = None
+    if question:
+        lines.append(f"- Q: {question}")
+
+    kept: List[str] = []
+    used = 0
+    for line in reversed(lines):
+        used += count_tokens(line) + 1
+        if used > max_tokens:
+            break
+        kept.append(line)
+    return "\n".join(reversed(kept))
+
+
+class ContextAssembler:
+    """
+    Fits chat history and agent scratchpad into a shared token budget
+    """
+
+    def __init__(self, max_tokens: int = 2000, history_share: float = 0.4, summary_max_tokens: int = 300):
+        self.max_tokens = max_tokens
+        self.history_budget = int(max_tokens * history_share)
+        self.scratchpad_budget = max_tokens - self.history_budget
+        self.summary_max_tokens = summary_max_tokens
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ContextAssembler":
+        """Build an assembler from the ``context`` and ``llm`` sections of agent_config.yaml"""
+        context_config = config.get("context", {})
+        max_tokens = context_config.get("max_tokens")
+        if not max_tokens:
+            llm_config = config.get("llm", {})
+            window = context_window(llm_config.get("model", ""), llm_config.get("context_window"))
+            max_tokens = window - llm_config.get("max_tokens", 2000) - context_config.get("reserve_tokens", 2000)
+            if max_tokens <= 0:
+                raise ValueError(
+                    f"llm.max_tokens and context.reserve_tokens leave no room in a {window}-token context window"
+                )
+        return cls(
+            max_tokens=max_tokens,
+            history_share=context_config.get("history_share", 0.4),
+            summary_max_tokens=context_config.get("summary_max_tokens", 300),
+        )
+
+    def summarize(self, summary: str, messages: List[BaseMessage]) -> str:
+        return summarize_turns(summary, messages, self.summary_max_tokens)
+
+    def history(self, messages: List[BaseMessage], summary: str = "") -> List[BaseMessage]:
+        """Newest whole turns that fit the history budget, preceded by a summary of the rest"""
+        budget = self.history_budget - (count_tokens(summary) + MESSAGE_OVERHEAD if summary else 0)
+        kept = len(messages)
+        used = 0
+        # Walk back one turn (human + answer) at a time so a question never loses its answer
+        while kept > 0:
+            start = kept - 2 if kept >= 2 and isinstance(messages[kept - 2], HumanMessage) else kept - 1
+            cost = sum(message_tokens(m) for m in messages[start:kept])
+            if used + cost > budget:
+                break
+            used += cost
+            kept = start
+
+        if kept:
+            summary = self.summarize(summary, messages[:kept])
+        recent = list(messages[kept:])
+        if summary:
+            recent.insert(0, SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+        return recent
+
+    @staticmethod
+    def _latest_step_start(messages: List[BaseMessage]) -> int:
+        """Index of the first tool output after the last model message"""
+        start = len(messages)
+        while start > 0 and isinstance(messages[start - 1], (ToolMessage, FunctionMessage)):
+            start -= 1
+        return start
+
+    @staticmethod
+    def _with_content(message: BaseMessage, content: str) -> BaseMessage:
+        if isinstance(message, ToolMessage):
+            return ToolMessage(content=content, tool_call_id=message.tool_call_id)
+        return FunctionMessage(content=content, name=message.name)
+
+    def scratchpad(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Agent scratchpad within its budget
+
+        Outputs of earlier steps are omitted oldest first. If the latest
+        step's outputs still do not fit they are truncated, each to an equal
+        share of what is left, but never omitted.
+        """
+        used = sum(message_tokens(m) for m in messages)
+        if used <= self.scratchpad_budget:
+            return messages
+        fitted = list(messages)
+        latest = self._latest_step_start(fitted)
+        omitted_cost = count_tokens(OMITTED_OUTPUT) + MESSAGE_OVERHEAD
+        for i, message in enumerate(fitted[:latest]):
+            if used <= self.scratchpad_budget:
+                break
+            # Keep the message itself so every tool call still has its result
+            if not isinstance(message, (ToolMessage, FunctionMessage)):
+                continue
+            used -= message_tokens(message) - omitted_cost
+            fitted[i] = self._with_content(message, OMITTED_OUTPUT)
+
+        if used > self.scratchpad_budget and latest < len(fitted):
+            outputs = fitted[latest:]
+            available = self.scratchpad_budget - (used - sum(message_tokens(m) for m in outputs))
+            share = max(0, available // len(outputs) - MESSAGE_OVERHEAD)
+            for i, message in enumerate(outputs, latest):
+                fitted[i] = self._with_content(message, truncate_tokens(str(message.content), share))
+        return fitted
@@ -0,0 +1,285 @@
+"""
+Embedding model selection and query-embedding caching for the Science Agent
+
+The index and the query path must embed with the same model, so the choice is
+recorded next to the vectorstore and reused when it is loaded.
+"""
+
+import os
+import re
+import time
+import asyncio
+import queue
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from langchain.embeddings.base import Embeddings
+
+from tracing import annotate
+
+DEFAULT_OPENAI_MODEL = "text-embedding-ada-002"
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def embedding_spec(rag_config: Dict[str, Any], offline: Optional[bool] = None) -> Dict[str, str]:
+    """Pick the embedding provider and model from the ``rag`` config section
+
+    Falls back to the local model when running offline, i.e. when requested
+    explicitly or when no OpenAI API key is available. Models that embed
+    queries differently from documents are marked ``symmetric: False``.
+    """
+    if offline is None:
+        offline = rag_config.get("offline", False) or not os.getenv("OPENAI_API_KEY")
+    if offline:
+        spec = {
+            "provider": "local",
+            "model": rag_config.get("local_embedding_model", DEFAULT_LOCAL_MODEL),
+        }
+    else:
+        spec = {
+            "provider": "openai",
+            "model": rag_config.get("embedding_model", DEFAULT_OPENAI_MODEL),
+        }
+    if not rag_config.get("symmetric_embeddings", True):
+        spec["symmetric"] = False
+    return spec
+
+
+def create_embeddings(spec: Dict[str, str]):
+    """Instantiate the LangChain embeddings object described by a spec"""
+    if spec["provider"] == "local":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name=spec["model"])
+
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=spec["model"])
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a query for embedding cache keys"""
+    return _WHITESPACE.sub(" ", text.strip().casefold())
+
+
+class _EmbeddingStore:
+    """SQLite layer holding float32 vectors keyed by model and normalized text"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[List[float]]:
+        row = self._connection().execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector.tolist()
+
+    def put_many(self, items: Dict[str, List[float]]):
+        self._connection().executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+        )
+
+
+class _MicroBatcher:
+    """Coalesces concurrent single-text embedding requests into one batched call
+
+    The first request in a quiet period waits up to ``window`` seconds for
+    others to join, then a background thread embeds the whole batch at once.
+    Requests are grouped by cache key, so texts that only differ in case or
+    whitespace are embedded once, using the first caller's text.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]], window: float, max_batch_size: int):
+        self.embed_batch = embed_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue[Tuple[str, str, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, key: str, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((key, text, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            texts: Dict[str, str] = {}
+            for key, text, _ in batch:
+                texts.setdefault(key, text)
+            try:
+                vectors = dict(zip(texts, self.embed_batch(list(texts.values()))))
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for key, _, future in batch:
+                future.set_result(vectors[key])
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Query-embedding cache in front of an embeddings model
+
+    Lookups go to an in-process LRU, then an optional persistent SQLite layer,
+    and only then to the model, through a micro-batcher that merges
+    concurrent queries. The normalized text is only the cache key: the model
+    embeds the caller's original text. A batch is one ``embed_documents``
+    call when the model embeds queries and documents alike; asymmetric
+    models embed each query with ``embed_query`` in parallel threads.
+    Document embedding is passed through untouched.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        memory_size: int = 4096,
+        persistent_path: Optional[str] = None,
+        batch_window: float = 0.005,
+        max_batch_size: int = 64,
+        symmetric: bool = True,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.symmetric = symmetric
+        self.memory_size = memory_size
+        self.store = _EmbeddingStore(persistent_path) if persistent_path else None
+        self.batcher = _MicroBatcher(self._embed_queries, batch_window, max_batch_size)
+        self._pool = None if symmetric else ThreadPoolExecutor(
+            max_workers=min(8, max_batch_size), thread_name_prefix="embedding-query"
+        )
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, embeddings: Embeddings, spec: Dict[str, str], cache_config: Dict[str, Any], agent_path: str = ".") -> "CachedEmbeddings":
+        """Wrap embeddings using the ``rag.query_embedding_cache`` section of agent_config.yaml"""
+        persistent_path = None
+        if cache_config.get("persistent", False):
+            persistent_path = os.path.join(agent_path, cache_config.get("path", "cache/embeddings.sqlite"))
+        return cls(
+            embeddings,
+            model_name=f"{spec['provider']}:{spec['model']}",
+            memory_size=cache_config.get("memory_size", 4096),
+            persistent_path=persistent_path,
+            batch_window=cache_config.get("batch_window_ms", 5) / 1000,
+            max_batch_size=cache_config.get("max_batch_size", 64),
+            symmetric=spec.get("symmetric", True),
+        )
+
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        if self.symmetric:
+            return self.embeddings.embed_documents(texts)
+        if len(texts) == 1:
+            return [self.embeddings.embed_query(texts[0])]
+        return list(self._pool.map(self.embeddings.embed_query, texts))
+
+    def _remember(self, key: str, vector: List[float]):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}\x1f{normalize_text(text)}"
+
+    def _recall(self, key: str) -> Optional[List[float]]:
+        """Vector from the in-process LRU, counting only a hit"""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def _load(self, key: str) -> Optional[List[float]]:
+        """Vector from the persistent layer, counting the hit or miss"""
+        vector = self.store.get(key) if self.store else None
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if vector is not None:
+            self._remember(key, vector)
+        return vector
+
+    def _cached(self, text: str) -> Tuple[str, Optional[List[float]]]:
+        """Cache key and vector from the memory or persistent layer, counting the lookup"""
+        key = self._key(text)
+        vector = self._recall(key)
+        return key, vector if vector is not None else self._load(key)
+
+    def _store(self, key: str, vector: List[float]):
+        if self.store:
+            self.store.put_many({key: vector})
+        self._remember(key, vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        key, vector = self._cached(text)
+        annotate(embedding_cache_hit=vector is not None)
+        if vector is None:
+            vector = self.batcher.submit(key, text).result()
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # The SQLite layer is read and written off the event loop
+        key = self._key(text)
+        vector = self._recall(key)
+        if vector is None:
+            vector = await asyncio.to_thread(self._load, key) if self.store else self._load(key)
+        annotate(embedding_cache_hit=vector is not None)
+        if vector is None:
+            vector = await asyncio.wrap_future(self.batcher.submit(key, text))
+            if self.store:
+                await asyncio.to_thread(self._store, key, vector)
+            else:
+                self._remember(key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
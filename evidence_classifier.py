@@ -0,0 +1,341 @@
+"""
+Rule-based evidence quality classifier
+
+Study-design, quality-criteria and bias-type rules for the vocabularies in
+the ``specialization`` section of agent_config.yaml are compiled into one
+alternation regex with a named group per rule, so a description or
+abstract is scanned once whatever the number of rules. Grading thousands
+of abstracts (a full search result set) goes through ``classify_many``,
+which splits the texts across a process pool.
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from results import EvidenceAssessment
+
+# Phrasings of each vocabulary entry. Entries configured without phrasings here
+# match their own name ("cohort_studies" -> "cohort study"/"cohort studies").
+DESIGN_PATTERNS = {
+    "systematic_reviews": [r"systematic(?:al)?\s+reviews?", r"umbrella\s+reviews?", r"cochrane\s+reviews?"],
+    "meta_analyses": [r"meta-?\s?analy[sz](?:is|es|ed)", r"pooled\s+analys[ie]s"],
+    # Only "randomized" is consumed, so "double-blind" or "placebo" before "trial" still match their own rules
+    "randomized_controlled_trials": [r"randomi[sz]ed(?=[\w\s,-]{0,80}?\b(?:trials?|rcts?)\b)", r"rcts?"],
+    "cohort_studies": [r"cohort\s+stud(?:y|ies)", r"cohort\s+of", r"follow-up\s+stud(?:y|ies)"],
+    "case_control_studies": [r"case-?\s?control(?:led)?\s+stud(?:y|ies)", r"case-?\s?control"],
+    "cross_sectional_studies": [r"cross-?\s?sectional", r"prevalence\s+survey", r"population\s+survey"],
+    "case_reports": [r"case\s+reports?", r"case\s+series", r"we\s+report\s+(?:a|the)\s+case"],
+    "expert_opinions": [r"expert\s+opinions?", r"editorial", r"commentary", r"consensus\s+statement", r"narrative\s+review"],
+    "preclinical_studies": [
+        r"animal\s+(?:stud(?:y|ies)|models?)", r"in\s+vitro", r"in\s+vivo", r"(?:mice|murine|rats?|rodents?)",
+        r"cell\s+(?:lines?|cultures?)", r"preclinical",
+    ],
+}
+# Signals of each quality criterion being met, besides those implied by other rules (IMPLIES)
+CRITERIA_PATTERNS = {
+    "study_design": [],
+    "sample_size": [
+        r"n\s*=\s*\d[\d,]*",
+        r"\d[\d,]*\s+(?:patients|participants|subjects|adults|children|individuals|volunteers|women|men|cases)",
+    ],
+    "randomization": [r"randomi[sz](?:ed|ation)", r"random(?:ly)?\s+(?:assigned|allocated)", r"allocation\s+concealment"],
+    "blinding": [r"masked", r"blinded\s+(?:assessors?|raters?|outcomes?)"],
+    "outcome_measures": [
+        r"primary\s+(?:end-?\s?points?|outcomes?)", r"secondary\s+(?:end-?\s?points?|outcomes?)",
+        r"validated\s+(?:scales?|instruments?|questionnaires?)",
+    ],
+    "statistical_analysis": [
+        r"intention-to-treat", r"itt", r"confidence\s+intervals?", r"95%\s*ci", r"p\s*[<=]\s*0?\.\d+",
+        r"(?:hazard|odds|risk)\s+ratios?", r"power\s+(?:analysis|calculation)", r"regression",
+    ],
+}
+# Indicators that a bias of each type may be present
+BIAS_PATTERNS = {
+    # Negated designs are consumed here first, so "not a randomized trial" never reads as an RCT
+    "selection_bias": [
+        r"non-?\s?randomi[sz]ed", r"not\s+(?:an?\s+|been\s+)?randomi[sz]ed", r"neither\s+randomi[sz]ed",
+        r"not\s+randomly\s+(?:assigned|allocated)", r"(?:no|without)\s+randomi[sz]ation",
+        r"(?:lack|absence)\s+of\s+randomi[sz]ation", r"convenience\s+sampl(?:e|ing)", r"self-?\s?selected",
+        r"volunteer\s+sample", r"selection\s+bias", r"retrospective",
+    ],
+    "information_bias": [
+        r"self-?\s?report(?:ed)?", r"recall\s+bias", r"open-?\s?label", r"unblinded", r"non-?\s?blinded",
+        r"not\s+(?:double-?\s?|single-?\s?)?blind(?:ed)?", r"(?:no|without)\s+blinding",
+        r"information\s+bias", r"online\s+survey",
+    ],
+    "confounding": [r"confound(?:ing|ers?|ed)", r"uncontrolled", r"no\s+control\s+group", r"single-?\s?arm"],
+    "publication_bias": [
+        r"publication\s+bias", r"funnel\s+plot\s+asymmetry", r"industry[-\s](?:funded|sponsored)",
+        r"sponsored\s+by", r"funded\s+by\s+\w+\s+(?:pharmaceuticals?|inc|ltd)",
+    ],
+}
+# Auxiliary signals used by the grading rules
+SIGNAL_PATTERNS = {
+    "placebo": [r"placebo"],
+    "double_blind": [r"double-?\s?blind(?:ed)?", r"triple-?\s?blind(?:ed)?"],
+    "single_blind": [r"single-?\s?blind(?:ed)?"],
+    "clinical_trial": [r"clinical\s+trials?", r"phase\s+(?:i{1,3}|[123])\b"],
+    "adjusted": [r"adjusted\s+for", r"propensity\s+score", r"multivariable", r"multivariate"],
+}
+# Only one rule matches at a position, so overlapping rules are expressed as implications
+IMPLIES = {
+    ("design", "randomized_controlled_trials"): [("criterion", "randomization")],
+    ("signal", "double_blind"): [("criterion", "blinding")],
+    ("signal", "single_blind"): [("criterion", "blinding")],
+}
+
+# Design -> (study type, evidence level, base quality score, clinical applicability), strongest first
+DESIGN_GRADES = {
+    "systematic_reviews": ("Systematic Review/Meta-analysis", "Very High", 9, "High - synthesized clinical evidence"),
+    "meta_analyses": ("Systematic Review/Meta-analysis", "Very High", 9, "High - synthesized clinical evidence"),
+    "randomized_controlled_trials": ("Randomized Controlled Trial", "High", 8, "High - direct clinical evidence"),
+    "cohort_studies": ("Cohort Study", "Moderate", 6, "Moderate - observational evidence"),
+    "case_control_studies": ("Case-Control Study", "Moderate", 5, "Moderate - observational evidence"),
+    "cross_sectional_studies": ("Cross-sectional Study", "Low", 4, "Moderate - observational evidence"),
+    "case_reports": ("Case Report/Series", "Very Low", 2, "Low - anecdotal evidence"),
+    "expert_opinions": ("Expert Opinion/Narrative Review", "Very Low", 2, "Low - expert opinion"),
+    "preclinical_studies": ("Preclinical Study", "Very Low", 2, "Low - preclinical evidence only"),
+}
+_UNCLEAR_GRADE = ("Other/Unclear", "Very Low", 3, "Moderate - observational evidence")
+# Bias risk inherent to non-interventional designs, before any bias indicator
+DESIGN_BIAS_RISK = {
+    "systematic_reviews": "Low",
+    "meta_analyses": "Low",
+    "cohort_studies": "Moderate",
+    "case_control_studies": "Moderate",
+    "cross_sectional_studies": "Moderate",
+    "case_reports": "High",
+    "expert_opinions": "High",
+    "preclinical_studies": "Moderate",
+}
+_RISK_LEVELS = ["Low", "Moderate", "High"]
+# A trial reported without its design, as PubMed's "Clinical Trial" publication type
+_CLINICAL_TRIAL_GRADE = ("Clinical Trial", "Moderate", 6, "High - direct clinical evidence")
+
+CRITERIA_STRENGTHS = {
+    "randomization": "Randomized allocation",
+    "blinding": "Blinded assessment",
+    "outcome_measures": "Prespecified outcome measures",
+    "statistical_analysis": "Reported statistical analysis",
+}
+BIAS_LIMITATIONS = {
+    "selection_bias": "Possible selection bias",
+    "information_bias": "Possible information bias",
+    "confounding": "Possible confounding",
+    "publication_bias": "Possible publication or funding bias",
+}
+_NUMBER = re.compile(r"\d[\d,]*")
+_WORD_START = re.compile(r"\b\w")
+_DIGITS = "0123456789"
+
+
+def _group_end(pattern: str) -> int:
+    """Index just past the group that opens the pattern"""
+    depth, i = 0, 0
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            i += 1
+        elif pattern[i] in "([":
+            depth += 1
+        elif pattern[i] in ")]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(pattern)
+
+
+def _first_chars(pattern: str) -> Optional[str]:
+    """Characters a rule pattern can start with, or None when that cannot be read off the pattern"""
+    if pattern.startswith("(?:"):
+        end = _group_end(pattern)
+        if pattern[end:end + 1] in ("?", "*", "{"):
+            return None
+        firsts, depth, start, body = [], 0, 0, pattern[3:end - 1]
+        for i, char in enumerate(body):
+            if char in "([" and body[i - 1:i] != "\\":
+                depth += 1
+            elif char in ")]" and body[i - 1:i] != "\\":
+                depth -= 1
+            elif char == "|" and depth == 0:
+                firsts.append(_first_chars(body[start:i]))
+                start = i + 1
+        firsts.append(_first_chars(body[start:]))
+        return None if None in firsts else "".join(sorted(set("".join(firsts))))
+    if len(pattern) > 1 and pattern[1] in "?*{":
+        return None
+    if pattern.startswith("\\d"):
+        return _DIGITS
+    if pattern[:1].isalnum():
+        return pattern[0].lower()
+    return None
+
+
+def _name_pattern(name: str) -> str:
+    """Pattern for a vocabulary entry from its own name, with an optional plural"""
+    words = name.split("_")
+    last = words[-1]
+    if last.endswith("ies"):
+        last = last[:-3] + "(?:y|ies)"
+    elif last.endswith("s"):
+        last = last[:-1] + "s?"
+    return r"[\s-]?".join(words[:-1] + [last])
+
+
+def _vocabulary(specialization: Dict[str, Any]) -> Dict[str, List[str]]:
+    research_types = specialization.get("research_types", {})
+    assessment = specialization.get("evidence_assessment", {})
+    # Earlier kinds win when two rules match at the same position: negations such as
+    # "non-randomized" are bias indicators before "randomized" can count as a design
+    return {
+        "bias": assessment.get("bias_types") or list(BIAS_PATTERNS),
+        "design": [name for level in research_types.values() for name in level] or list(DESIGN_PATTERNS),
+        "signal": list(SIGNAL_PATTERNS),
+        "criterion": assessment.get("quality_criteria") or list(CRITERIA_PATTERNS),
+    }
+
+
+class EvidenceClassifier:
+    """
+    Grades study descriptions with compiled multi-pattern rules
+    """
+
+    _TABLES = {"design": DESIGN_PATTERNS, "criterion": CRITERIA_PATTERNS, "bias": BIAS_PATTERNS, "signal": SIGNAL_PATTERNS}
+
+    def __init__(self, vocabulary: Dict[str, List[str]], min_sample_size: int = 50, workers: int = 0):
+        self.min_sample_size = min_sample_size
+        self.workers = workers
+        self.rules: List[Tuple[str, str]] = []
+        # Alternatives grouped by the character they start with; "" holds those that may start anywhere
+        buckets: Dict[str, List[str]] = {}
+        for kind, names in vocabulary.items():
+            for name in names:
+                table = self._TABLES[kind]
+                patterns = table[name] if name in table else [_name_pattern(name)]
+                for pattern in patterns:
+                    alternative = f"(?P<r{len(self.rules)}>{pattern})"
+                    for char in _first_chars(pattern) or [""]:
+                        buckets.setdefault(char, []).append(alternative)
+                    self.rules.append((kind, name))
+        # Like the root of an Aho-Corasick trie: each word start only tries the rules that can begin
+        # with its first character, as one alternation compiled per character
+        anywhere = buckets.pop("", [])
+        self.automata = {
+            char: re.compile("(?:" + "|".join(alternatives + anywhere) + r")(?!\w)")
+            for char, alternatives in buckets.items()
+        }
+        self.anywhere = re.compile("(?:" + "|".join(anywhere) + r")(?!\w)") if anywhere else None
+        self.designs = vocabulary.get("design", [])
+
+    @classmethod
+    def from_config(cls, specialization: Dict[str, Any]) -> "EvidenceClassifier":
+        """Build a classifier from the ``specialization`` section of agent_config.yaml"""
+        assessment = specialization.get("evidence_assessment", {})
+        return cls(
+            _vocabulary(specialization),
+            min_sample_size=assessment.get("min_sample_size", 50),
+            workers=assessment.get("workers", 0),
+        )
+
+    def matches(self, text: str) -> Dict[Tuple[str, str], List[str]]:
+        """Matched text of every rule that fires, in one left-to-right scan of the lowercased text"""
+        text = text.lower()
+        found: Dict[Tuple[str, str], List[str]] = {}
+        end = 0
+        for word in _WORD_START.finditer(text):
+            start = word.start()
+            if start < end:
+                continue
+            automaton = self.automata.get(text[start], self.anywhere)
+            match = automaton.match(text, start) if automaton is not None else None
+            if match is None:
+                continue
+            end = match.end()
+            rule = self.rules[int(match.lastgroup[1:])]
+            for key in [rule] + IMPLIES.get(rule, []):
+                found.setdefault(key, []).append(match.group())
+        return found
+
+    def classify(self, text: str) -> EvidenceAssessment:
+        """Assess the quality and strength of the evidence a study description reports"""
+        found = self.matches(text)
+        hit = lambda kind, name: (kind, name) in found
+        designs = [name for name in DESIGN_GRADES if hit("design", name)]
+        designs += [name for name in self.designs if name not in DESIGN_GRADES and hit("design", name)]
+        design = designs[0] if designs else None
+        if design in DESIGN_GRADES:
+            study_type, evidence_level, score, applicability = DESIGN_GRADES[design]
+        elif design:
+            study_type, evidence_level, score, applicability = design.replace("_", " ").title(), "Unclear", 3, _UNCLEAR_GRADE[3]
+        elif hit("signal", "clinical_trial"):
+            study_type, evidence_level, score, applicability = _CLINICAL_TRIAL_GRADE
+        else:
+            study_type, evidence_level, score, applicability = _UNCLEAR_GRADE
+
+        assessment = EvidenceAssessment(
+            study_type=study_type,
+            evidence_level=evidence_level,
+            clinical_applicability=applicability,
+            criteria_met=sorted({name for kind, name in found if kind == "criterion"} | ({"study_design"} if design else set())),
+            bias_types=sorted({name for kind, name in found if kind == "bias"}),
+        )
+        # Reviews report the randomization and blinding of the trials they include, not their own
+        synthesized = design in ("systematic_reviews", "meta_analyses")
+
+        if design is None or design == "randomized_controlled_trials" or hit("signal", "clinical_trial"):
+            # Interventional studies: bias risk follows the blinding design
+            if hit("signal", "double_blind") and hit("signal", "placebo"):
+                assessment.bias_risk = "Low"
+                assessment.strengths.append("Double-blind placebo-controlled design")
+            elif hit("signal", "double_blind") or hit("signal", "single_blind"):
+                assessment.bias_risk = "Moderate"
+                if hit("signal", "single_blind"):
+                    assessment.limitations.append("Single-blind design may introduce bias")
+            else:
+                assessment.bias_risk = "High"
+                assessment.limitations.append("No blinding reported, which increases bias risk")
+                if design == "randomized_controlled_trials":
+                    score -= 1
+            if len(assessment.bias_types) >= 2 and assessment.bias_risk != "High":
+                assessment.bias_risk = "Moderate" if assessment.bias_risk == "Low" else "High"
+        else:
+            # Other designs start from the risk inherent to the design, raised by each bias indicator
+            base = _RISK_LEVELS.index(DESIGN_BIAS_RISK.get(design, "Moderate"))
+            assessment.bias_risk = _RISK_LEVELS[min(base + len(assessment.bias_types), len(_RISK_LEVELS) - 1)]
+
+        for name in assessment.criteria_met:
+            if name not in CRITERIA_STRENGTHS or (synthesized and name in ("randomization", "blinding")):
+                continue
+            if not (name == "blinding" and assessment.bias_risk == "Low"):
+                assessment.strengths.append(CRITERIA_STRENGTHS[name])
+        sizes = [int(n.replace(",", "")) for match in found.get(("criterion", "sample_size"), []) for n in _NUMBER.findall(match)]
+        if sizes:
+            assessment.strengths.append(f"Sample size reported (n={max(sizes)})")
+            if max(sizes) < self.min_sample_size and not synthesized:
+                assessment.limitations.append(f"Small sample (n={max(sizes)})")
+                score -= 1
+        if hit("signal", "adjusted") and design in ("cohort_studies", "case_control_studies", "cross_sectional_studies"):
+            assessment.strengths.append("Adjusted for confounders")
+        for name in assessment.bias_types:
+            indicators = ", ".join(sorted(set(found[("bias", name)])))
+            assessment.limitations.append(f"{BIAS_LIMITATIONS.get(name, name.replace('_', ' ').capitalize())} ({indicators})")
+
+        assessment.quality_score = max(1, min(10, score))
+        return assessment
+
+    def classify_many(self, texts: Iterable[str], workers: Optional[int] = None) -> List[EvidenceAssessment]:
+        """Assess many descriptions, split across a process pool when workers > 1"""
+        texts = list(texts)
+        workers = self.workers if workers is None else workers
+        if workers <= 1 or len(texts) < 2 * workers:
+            return [self.classify(text) for text in texts]
+        size = -(-len(texts) // workers)
+        with ProcessPoolExecutor(workers) as executor:
+            parts = executor.map(_classify_chunk, [self] * workers,
+                                 [texts[i:i + size] for i in range(0, len(texts), size)])
+            return [assessment for part in parts for assessment in part]
+
+
+def _classify_chunk(classifier: EvidenceClassifier, texts: List[str]) -> List[EvidenceAssessment]:
+    return [classifier.classify(text) for text in texts]
@@ -0,0 +1,188 @@
+"""
+Hybrid lexical + dense retrieval for scientific_knowledge_search
+
+A BM25 inverted index over the vectorstore chunks catches exact scientific
+terms (drug names, receptor names, MeSH headings) that dense embeddings blur.
+BM25 and FAISS candidates are merged with reciprocal-rank fusion and, if
+configured, a local cross-encoder reorders only the fused top-N.
+"""
+
+import os
+import re
+import math
+import pickle
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+BM25_FILE = "bm25.pkl"
+DOCSTORE_FILE = "index.pkl"
+
+# Keeps tokens such as "cb1", "delta-9-thc" and "5-ht1a" intact
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index; documents are identified by FAISS row
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: Dict[int, int] = {}
+        self.average_length = 0.0
+
+    @classmethod
+    def from_texts(cls, texts: Dict[int, str], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        for row, text in texts.items():
+            counts = Counter(tokenize(text))
+            index.doc_lengths[row] = sum(counts.values())
+            for term, frequency in counts.items():
+                index.postings[term].append((row, frequency))
+        index.postings = dict(index.postings)
+        index.average_length = (
+            sum(index.doc_lengths.values()) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        )
+        return index
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Top-k (row, score) pairs; only the postings of the query terms are visited"""
+        total = len(self.doc_lengths)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[row] / self.average_length)
+                scores[row] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def load_bm25_index(vectorstore_path: str, vectorstore) -> BM25Index:
+    """Load the BM25 index persisted next to the vectorstore, rebuilding it when stale"""
+    path = os.path.join(vectorstore_path, BM25_FILE)
+    docstore_path = os.path.join(vectorstore_path, DOCSTORE_FILE)
+    if os.path.exists(path) and os.path.exists(docstore_path) and os.path.getmtime(path) >= os.path.getmtime(docstore_path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    texts = {
+        row: vectorstore.docstore.search(docstore_id).page_content
+        for row, docstore_id in vectorstore.index_to_docstore_id.items()
+    }
+    index = BM25Index.from_texts(texts)
+    try:
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logger.warning(f"Could not persist BM25 index: {e}")
+    return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[int]:
+    """Merge ranked row lists; each list contributes 1 / (k + rank) per row"""
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever:
+    """
+    BM25 + FAISS retrieval fused with reciprocal-rank fusion
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        bm25: BM25Index,
+        k: int = 5,
+        candidate_k: int = 20,
+        rrf_k: int = 60,
+        reranker=None,
+        rerank_top_n: int = 20,
+    ):
+        self.vectorstore = vectorstore
+        self.bm25 = bm25
+        self.k = k
+        self.candidate_k = candidate_k
+        self.rrf_k = rrf_k
+        self.reranker = reranker
+        self.rerank_top_n = rerank_top_n
+
+    @classmethod
+    def from_config(cls, vectorstore, vectorstore_path: str, rag_config: Dict[str, Any]) -> "HybridRetriever":
+        """Build a retriever from the ``rag`` section of agent_config.yaml"""
+        hybrid_config = rag_config.get("hybrid", {})
+        reranker_config = hybrid_config.get("reranker", {})
+        reranker = None
+        if reranker_config.get("enabled", False):
+            from sentence_transformers import CrossEncoder
+
+            reranker = CrossEncoder(reranker_config.get("model", "cross-encoder/ms-marco-MiniLM-L-6-v2"))
+        return cls(
+            vectorstore,
+            load_bm25_index(vectorstore_path, vectorstore),
+            k=rag_config.get("retrieval_k", 5),
+            candidate_k=hybrid_config.get("candidate_k", 20),
+            rrf_k=hybrid_config.get("rrf_k", 60),
+            reranker=reranker,
+            rerank_top_n=reranker_config.get("top_n", 20),
+        )
+
+    def _dense_rows(self, query: str) -> List[int]:
+        embedding_function = self.vectorstore.embedding_function
+        if hasattr(embedding_function, "embed_query"):
+            vector = embedding_function.embed_query(query)
+        else:
+            vector = embedding_function(query)
+        return self._search_rows(vector)
+
+    def _search_rows(self, vector: List[float]) -> List[int]:
+        _, rows = self.vectorstore.index.search(np.array([vector], dtype=np.float32), self.candidate_k)
+        return [int(row) for row in rows[0] if row >= 0]
+
+    def retrieve(self, query: str, k: Optional[int] = None):
+        """Return the top-k chunks as LangChain Documents"""
+        return self._fuse(query, self._dense_rows(query), k or self.k)
+
+    async def aretrieve(self, query: str, k: Optional[int] = None):
+        """Async retrieve; only the query embedding call is awaited"""
+        embedding_function = self.vectorstore.embedding_function
+        if hasattr(embedding_function, "aembed_query"):
+            dense = self._search_rows(await embedding_function.aembed_query(query))
+        else:
+            dense = self._dense_rows(query)
+        return self._fuse(query, dense, k or self.k)
+
+    def _fuse(self, query: str, dense: List[int], k: int):
+        lexical = [row for row, _ in self.bm25.search(query, self.candidate_k)]
+        fused = reciprocal_rank_fusion([dense, lexical], self.rrf_k)
+
+        if self.reranker is not None:
+            candidates = fused[:self.rerank_top_n]
+            texts = [self._document(row).page_content for row in candidates]
+            scores = self.reranker.predict([(query, text) for text in texts])
+            reranked = [row for _, row in sorted(zip(scores, candidates), key=lambda item: item[0], reverse=True)]
+            # Rows past top_n keep their fused order behind the reranked ones
+            fused = reranked + fused[self.rerank_top_n:]
+
+        return [self._document(row) for row in fused[:k]]
+
+    def _document(self, row: int):
+        return self.vectorstore.docstore.search(self.vectorstore.index_to_docstore_id[row])
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Incremental vectorstore ingestion for the science-data corpus
+Usage: python ingest.py [--data-dir data] [--offline] [--rebuild]
+
+Streams documents from the data/ submodule, chunks them with the configured
+chunk_size/chunk_overlap and embeds them in batches. A manifest of content
+hashes stored next to the FAISS index means only new or changed documents are
+embedded; chunks of changed or deleted documents are removed from the index.
+When an ANN index is configured it is retrained after every update, before
+anything is written, so a failed training run leaves the previous index,
+manifest and ANN file untouched.
+"""
+
+import os
+import csv
+import json
+import hashlib
+import argparse
+import logging
+from typing import Dict, List, Any, Iterator, Tuple
+
+import yaml
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import FAISS
+
+from embeddings import embedding_spec, create_embeddings
+from vector_index import train_ann_index, write_ann_index
+
+MANIFEST_FILE = "ingest_manifest.json"
+TEXT_EXTENSIONS = {".txt", ".md", ".rst"}
+RECORD_EXTENSIONS = {".json", ".jsonl", ".csv"}
+# Fields joined into the text of a structured record, in order
+RECORD_TEXT_FIELDS = ["title", "abstract", "text", "content", "summary", "findings"]
+
+logger = logging.getLogger(__name__)
+
+
+def load_manifest(vectorstore_path: str) -> Dict[str, Any]:
+    """Read the ingestion manifest stored alongside the FAISS index"""
+    manifest_path = os.path.join(vectorstore_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def _record_text(record: Dict[str, Any]) -> str:
+    parts = []
+    for field in RECORD_TEXT_FIELDS:
+        value = record.get(field)
+        if isinstance(value, list):
+            value = "\n".join(str(item) for item in value)
+        if value:
+            parts.append(str(value))
+    return "\n\n".join(parts)
+
+
+def _read_records(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (record key, record) pairs from a JSON, JSONL or CSV file"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if extension == ".jsonl":
+            records = (json.loads(line) for line in f if line.strip())
+        elif extension == ".csv":
+            records = csv.DictReader(f)
+        else:
+            payload = json.load(f)
+            records = payload if isinstance(payload, list) else [payload]
+        for position, record in enumerate(records):
+            if isinstance(record, dict):
+                key = str(record.get("id") or record.get("pmid") or position)
+                yield key, record
+
+
+def iter_source_documents(data_dir: str) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Stream (source id, text, metadata) for every ingestible document under data_dir"""
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, data_dir)
+            extension = os.path.splitext(name)[1].lower()
+            try:
+                if extension in TEXT_EXTENSIONS:
+                    with open(path, "r", encoding="utf-8") as f:
+                        yield relative, f.read(), {"source": relative}
+                elif extension in RECORD_EXTENSIONS:
+                    for key, record in _read_records(path):
+                        text = _record_text(record)
+                        if text:
+                            metadata = {"source": relative, "record_id": key}
+                            for field in ("pmid", "title", "year", "journal"):
+                                if record.get(field):
+                                    metadata[field] = record[field]
+                            yield f"{relative}#{key}", text, metadata
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                logger.warning(f"Skipping unreadable document {relative}: {e}")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class VectorstoreIngestor:
+    """
+    Appends new and changed corpus documents to the FAISS vectorstore
+    """
+
+    def __init__(self, agent_path: str = ".", config: Dict[str, Any] = None, offline: bool = None):
+        self.agent_path = agent_path
+        self.config = config or {}
+        rag_config = self.config.get("rag", {})
+        self.vectorstore_path = os.path.join(agent_path, "rag", "vectorstore")
+        self.batch_size = rag_config.get("embedding_batch_size", 64)
+        self.settings = {
+            "chunk_size": rag_config.get("chunk_size", 1000),
+            "chunk_overlap": rag_config.get("chunk_overlap", 200),
+            "embedding": embedding_spec(rag_config, offline),
+        }
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.settings["chunk_size"],
+            chunk_overlap=self.settings["chunk_overlap"]
+        )
+
+    def _load(self, embeddings, rebuild: bool):
+        """Load the existing index and manifest unless they were built with other settings"""
+        manifest = {} if rebuild else load_manifest(self.vectorstore_path)
+        if manifest.get("settings") != self.settings:
+            if manifest:
+                logger.info("Chunking or embedding settings changed, rebuilding vectorstore")
+            return None, {}
+        vectorstore = FAISS.load_local(self.vectorstore_path, embeddings)
+        return vectorstore, manifest.get("documents", {})
+
+    def _embed_batch(self, embeddings, vectorstore, batch: List[Document], ids: List[str]):
+        texts = [doc.page_content for doc in batch]
+        vectors = embeddings.embed_documents(texts)
+        if vectorstore is None:
+            return FAISS.from_embeddings(
+                list(zip(texts, vectors)), embeddings,
+                metadatas=[doc.metadata for doc in batch], ids=ids
+            )
+        vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=[doc.metadata for doc in batch], ids=ids)
+        return vectorstore
+
+    def run(self, data_dir: str, rebuild: bool = False) -> Dict[str, int]:
+        """Ingest data_dir and persist the updated index and manifest"""
+        embeddings = create_embeddings(self.settings["embedding"])
+        vectorstore, documents = self._load(embeddings, rebuild)
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "chunks": 0}
+        seen = set()
+        stale_ids: List[str] = []
+        batch: List[Document] = []
+        batch_ids: List[str] = []
+
+        for source_id, text, metadata in iter_source_documents(data_dir):
+            seen.add(source_id)
+            digest = content_hash(text)
+            previous = documents.get(source_id)
+            if previous and previous["hash"] == digest:
+                stats["unchanged"] += 1
+                continue
+            if previous:
+                stale_ids.extend(previous["ids"])
+                stats["updated"] += 1
+            else:
+                stats["added"] += 1
+
+            chunks = self.splitter.split_text(text)
+            chunk_prefix = f"{content_hash(source_id)[:12]}:{digest[:12]}"
+            chunk_ids = [f"{chunk_prefix}:{i}" for i in range(len(chunks))]
+            documents[source_id] = {"hash": digest, "ids": chunk_ids}
+            for chunk_id, chunk in zip(chunk_ids, chunks):
+                batch.append(Document(page_content=chunk, metadata={**metadata, "chunk_id": chunk_id}))
+                batch_ids.append(chunk_id)
+                if len(batch) >= self.batch_size:
+                    vectorstore = self._embed_batch(embeddings, vectorstore, batch, batch_ids)
+                    stats["chunks"] += len(batch)
+                    batch, batch_ids = [], []
+
+        if batch:
+            vectorstore = self._embed_batch(embeddings, vectorstore, batch, batch_ids)
+            stats["chunks"] += len(batch)
+
+        for source_id in [source_id for source_id in documents if source_id not in seen]:
+            stale_ids.extend(documents.pop(source_id)["ids"])
+            stats["removed"] += 1
+
+        if vectorstore is not None and stale_ids:
+            vectorstore.delete(stale_ids)
+
+        if vectorstore is not None and (stats["chunks"] or stale_ids):
+            index_config = self.config.get("rag", {}).get("index", {})
+            ann_index = train_ann_index(vectorstore.index, index_config)
+            vectorstore.save_local(self.vectorstore_path)
+            with open(os.path.join(self.vectorstore_path, MANIFEST_FILE), "w") as f:
+                json.dump({"settings": self.settings, "documents": documents}, f)
+            # Written after the flat index so read_index does not see it as stale
+            if ann_index is not None:
+                write_ann_index(ann_index, self.vectorstore_path, index_config["type"])
+
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest the science-data corpus into the vectorstore')
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    parser.add_argument('--data-dir', type=str, default=None, help='Corpus directory (default: <agent-path>/data)')
+    parser.add_argument('--offline', action='store_true', help='Embed with the local embedding model')
+    parser.add_argument('--rebuild', action='store_true', help='Ignore the manifest and rebuild the index')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(os.path.join(args.agent_path, "agent_config.yaml"), "r") as f:
+        config = yaml.safe_load(f) or {}
+
+    ingestor = VectorstoreIngestor(args.agent_path, config, offline=args.offline or None)
+    stats = ingestor.run(args.data_dir or os.path.join(args.agent_path, "data"), rebuild=args.rebuild)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Local columnar store of PubMed metadata for publication-trend analytics
+Usage: python literature_store.py [--append records.jsonl] [--pubmed "cannabis"] [--max-results 10000]
+
+Records (PMID, year, title, journal, country, study type, MeSH terms) are
+kept as Parquet part files; every append writes a new part plus its MeSH
+and title-keyword postings, so earlier parts are never rewritten. On load
+the parts are concatenated into integer-coded NumPy columns and the
+postings merged, which lets a trend query select its rows from the
+indexes and compute every count with ``np.bincount`` instead of scanning
+records or calling PubMed.
+"""
+
+import os
+import re
+import json
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import yaml
+
+from claim_index import EntityNormalizer
+from results import ResearchTrends, FocusArea
+
+SCHEMA = pa.schema([
+    ("pmid", pa.string()),
+    ("year", pa.int16()),
+    ("title", pa.string()),
+    ("journal", pa.string()),
+    ("country", pa.string()),
+    ("study_type", pa.string()),
+    ("mesh_terms", pa.list_(pa.string())),
+])
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "in", "into", "is", "of", "on", "or",
+    "the", "to", "with", "without", "vs", "versus", "study", "research", "trends",
+})
+# MeSH check tags and descriptors too generic to be an emerging topic
+_GENERIC_MESH = frozenset({
+    "humans", "animals", "male", "female", "adult", "middle aged", "aged", "aged, 80 and over",
+    "young adult", "adolescent", "child", "child, preschool", "infant", "mice", "rats",
+    "treatment outcome", "retrospective studies", "prospective studies", "cross-sectional studies",
+    "surveys and questionnaires", "cohort studies",
+})
+_STUDY_TYPE_NAMES = {
+    "meta_analysis": "Meta-analyses",
+    "systematic_review": "Systematic Reviews",
+    "randomized_controlled_trial": "Randomized Controlled Trials",
+    "clinical_trial": "Clinical Trials",
+    "observational_study": "Observational Studies",
+    "comparative_study": "Comparative Studies",
+    "narrative_review": "Narrative Reviews",
+    "case_report": "Case Reports",
+    "other": "Other Studies",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _keywords(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.casefold()) if word not in _STOPWORDS]
+
+
+def _normalize(record: Dict[str, Any]) -> Dict[str, Any]:
+    year = str(record.get("year") or "")[:4]
+    mesh_terms = record.get("mesh_terms") or []
+    if isinstance(mesh_terms, str):
+        mesh_terms = [term.strip() for term in mesh_terms.split(";") if term.strip()]
+    return {
+        "pmid": str(record.get("pmid") or ""),
+        "year": int(year) if year.isdigit() else 0,
+        "title": record.get("title") or "",
+        "journal": record.get("journal") or "",
+        "country": record.get("country") or "",
+        "study_type": record.get("study_type") or "other",
+        "mesh_terms": list(mesh_terms),
+    }
+
+
+def _postings(terms: pa.Array, rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Vocabulary plus (term code, row) pairs ordered by row, from flattened terms and their rows"""
+    encoded = terms.dictionary_encode()
+    vocabulary = np.asarray(encoded.dictionary.to_pylist(), dtype=str)
+    codes = encoded.indices.to_numpy(zero_copy_only=False).astype(np.int64)
+    # A term repeated within one record is one posting; sorting the combined key orders by row
+    pairs = np.unique(rows.astype(np.int64) * max(len(vocabulary), 1) + codes)
+    return {"vocabulary": vocabulary, "rows": pairs // max(len(vocabulary), 1), "codes": pairs % max(len(vocabulary), 1)}
+
+
+def build_part_index(table: pa.Table) -> Dict[str, np.ndarray]:
+    """MeSH and title-keyword postings of one part"""
+    mesh_terms = table.column("mesh_terms").combine_chunks()
+    words = pc.split_pattern_regex(pc.utf8_lower(table.column("title").combine_chunks()), r"[^a-z0-9]+")
+    flat_words = pc.list_flatten(words)
+    keep = pc.invert(pc.is_in(flat_words, value_set=pa.array(sorted(_STOPWORDS) + [""])))
+    word_rows = pc.list_parent_indices(words).to_numpy()[keep.to_numpy(zero_copy_only=False)]
+
+    index = {}
+    for name, postings in (
+        ("mesh", _postings(pc.list_flatten(mesh_terms), pc.list_parent_indices(mesh_terms).to_numpy())),
+        ("keyword", _postings(flat_words.filter(keep), word_rows)),
+    ):
+        for key, array in postings.items():
+            index[f"{name}_{key}"] = array
+    return index
+
+
+class _Postings:
+    """Merged postings of one index: term -> sorted row ids, and row -> term codes"""
+
+    def __init__(self, vocabulary: np.ndarray, rows: np.ndarray, codes: np.ndarray, n_rows: int):
+        self.vocabulary = vocabulary
+        self.lookup = {term.casefold(): code for code, term in enumerate(vocabulary)}
+        # By term, for topic lookups
+        order = np.lexsort((rows, codes))
+        self.term_rows = rows[order]
+        self.term_offsets = np.searchsorted(codes[order], np.arange(len(vocabulary) + 1))
+        # By row, for counting the terms of selected records
+        order = np.lexsort((codes, rows))
+        self.row_codes = codes[order]
+        self.row_offsets = np.searchsorted(rows[order], np.arange(n_rows + 1))
+
+    def rows(self, code: int) -> np.ndarray:
+        return self.term_rows[self.term_offsets[code]:self.term_offsets[code + 1]]
+
+    def codes_of(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Term codes of the given rows and, aligned with them, the position in rows each came from"""
+        starts = self.row_offsets[rows]
+        lengths = self.row_offsets[rows + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        # Position of every posting: its row's start plus its rank within the row
+        ranks = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return self.row_codes[np.repeat(starts, lengths) + ranks], owners
+
+
+def _merge(parts: List[Dict[str, np.ndarray]], sizes: List[int], name: str) -> _Postings:
+    vocabularies = [part[f"{name}_vocabulary"] for part in parts]
+    vocabulary, inverse = np.unique(np.concatenate(vocabularies) if vocabularies else np.empty(0, dtype=str),
+                                    return_inverse=True)
+    rows, codes = [], []
+    vocabulary_start, row_start = 0, 0
+    for part, size, part_vocabulary in zip(parts, sizes, vocabularies):
+        remap = inverse[vocabulary_start:vocabulary_start + len(part_vocabulary)]
+        rows.append(part[f"{name}_rows"] + row_start)
+        codes.append(remap[part[f"{name}_codes"]])
+        vocabulary_start += len(part_vocabulary)
+        row_start += size
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    codes = np.concatenate(codes) if codes else np.empty(0, dtype=np.int64)
+    return _Postings(vocabulary, rows, codes, row_start)
+
+
+def _categorical(column: pa.ChunkedArray) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = column.combine_chunks().dictionary_encode()
+    return (np.asarray(encoded.dictionary.to_pylist(), dtype=str),
+            encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32))
+
+
+def _growth(recent: np.ndarray, earlier: np.ndarray) -> List[str]:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = recent / earlier - 1
+    return ["new" if e == 0 and r else f"{c:+.0%}" if e else "n/a" for r, e, c in zip(recent, earlier, change)]
+
+
+class LiteratureStore:
+    """
+    Append-only Parquet store of PubMed metadata with MeSH and keyword indexes
+    """
+
+    def __init__(self, path: str, trend_years: int = 10, recent_years: int = 3, emerging_min_count: int = 3):
+        self.path = path
+        self.trend_years = trend_years
+        self.recent_years = recent_years
+        self.emerging_min_count = emerging_min_count
+        self.normalizer = EntityNormalizer()
+        # Canonical compound/condition -> its surface forms, for expanding topic words
+        self._synonyms = {
+            (kind, canonical): forms
+            for kind in ("compound", "condition")
+            for canonical, forms in self.normalizer.forms(kind).items()
+        }
+        self._load()
+
+    @classmethod
+    def from_config(cls, store_config: Dict[str, Any], agent_path: str = ".") -> "LiteratureStore":
+        """Open the store described by the ``literature_store`` section of agent_config.yaml"""
+        return cls(
+            os.path.join(agent_path, store_config.get("path", "rag/literature")),
+            trend_years=store_config.get("trend_years", 10),
+            recent_years=store_config.get("recent_years", 3),
+            emerging_min_count=store_config.get("emerging_min_count", 3),
+        )
+
+    def _parts(self) -> List[str]:
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".parquet"))
+
+    @staticmethod
+    def _part_index(part_path: str, table: pa.Table) -> Dict[str, np.ndarray]:
+        index_path = part_path[:-len(".parquet")] + ".index.npz"
+        if os.path.exists(index_path):
+            with np.load(index_path) as saved:
+                return dict(saved)
+        # Written by an older version or lost; rebuild it once
+        index = build_part_index(table)
+        np.savez(index_path, **index)
+        return index
+
+    def _load(self):
+        tables, indexes = [], []
+        for part_path in self._parts():
+            table = pq.read_table(part_path, schema=SCHEMA)
+            tables.append(table)
+            indexes.append(self._part_index(part_path, table))
+        table = pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+        sizes = [len(part) for part in tables]
+
+        self.pmids = table.column("pmid").to_numpy(zero_copy_only=False).astype(str)
+        self.years = table.column("year").to_numpy(zero_copy_only=False).astype(np.int32)
+        self.countries, self.country_codes = _categorical(table.column("country"))
+        self.study_types, self.study_type_codes = _categorical(table.column("study_type"))
+        self.mesh = _merge(indexes, sizes, "mesh")
+        self.keywords = _merge(indexes, sizes, "keyword")
+        # MeSH descriptors containing each word, so "cannabidiol epilepsy" reaches both headings
+        self._generic_mesh = np.isin(np.char.lower(self.mesh.vocabulary), list(_GENERIC_MESH))
+        self._mesh_words: Dict[str, List[int]] = {}
+        for code, term in enumerate(self.mesh.vocabulary):
+            for word in set(_keywords(term)):
+                self._mesh_words.setdefault(word, []).append(code)
+
+    def __len__(self) -> int:
+        return len(self.pmids)
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add records not already in the store as a new part; returns how many were added"""
+        rows = [_normalize(record) for record in records]
+        table = pa.Table.from_pylist([row for row in rows if row["pmid"]], schema=SCHEMA)
+        new = pc.invert(pc.is_in(table.column("pmid"), value_set=pa.array(self.pmids, pa.string())))
+        table = table.filter(new)
+        # Duplicates within the batch itself keep their first occurrence
+        _, first = np.unique(table.column("pmid").to_numpy(zero_copy_only=False).astype(str), return_index=True)
+        table = table.take(pa.array(np.sort(first)))
+        if not len(table):
+            return 0
+
+        os.makedirs(self.path, exist_ok=True)
+        part_path = os.path.join(self.path, f"part-{len(self._parts()):05d}.parquet")
+        np.savez(part_path[:-len(".parquet")] + ".index.npz", **build_part_index(table))
+        pq.write_table(table, part_path + ".tmp")
+        os.replace(part_path + ".tmp", part_path)
+        self._load()
+        return len(table)
+
+    def _word_rows(self, word: str) -> np.ndarray:
+        """Mask of rows with a word in a MeSH heading or the title"""
+        rows = np.zeros(len(self), dtype=bool)
+        for code in self._mesh_words.get(word, []):
+            rows[self.mesh.rows(code)] = True
+        code = self.keywords.lookup.get(word)
+        if code is not None:
+            rows[self.keywords.rows(code)] = True
+        return rows
+
+    def _phrase_rows(self, phrase: str) -> np.ndarray:
+        """Mask of rows covering every word of a phrase, or indexed under it as a MeSH heading"""
+        rows: Optional[np.ndarray] = None
+        for word in _keywords(phrase):
+            word_rows = self._word_rows(word)
+            rows = word_rows if rows is None else rows & word_rows
+        if rows is None:
+            rows = np.zeros(len(self), dtype=bool)
+        heading = self.mesh.lookup.get(phrase.strip().casefold())
+        if heading is not None:
+            rows[self.mesh.rows(heading)] = True
+        return rows
+
+    def match(self, topic: str, synonyms: bool = True) -> np.ndarray:
+        """Sorted rows whose MeSH headings or title words cover every word of the topic
+
+        With synonyms, a compound or condition named in the topic matches any
+        of its surface forms from claim_index, so "CBD epilepsy" also finds
+        records under the "Cannabidiol" and "Seizures" headings.
+        """
+        # Boolean masks over all rows: union and intersection cost one pass each, with no sorting
+        selected: Optional[np.ndarray] = None
+        remaining = topic.casefold()
+        if synonyms:
+            for start, end, names in reversed(self.normalizer.mentions(topic)):
+                forms = {form for name in names for form in self._synonyms.get(name, ())}
+                if not forms:
+                    continue
+                rows = np.zeros(len(self), dtype=bool)
+                for form in forms:
+                    rows |= self._phrase_rows(form)
+                selected = rows if selected is None else selected & rows
+                remaining = remaining[:start] + " " + remaining[end:]
+        for word in _keywords(remaining):
+            rows = self._word_rows(word)
+            selected = rows if selected is None else selected & rows
+        # A topic that is itself a MeSH heading also matches records indexed under it
+        heading = self.mesh.lookup.get(topic.strip().casefold())
+        if heading is not None:
+            if selected is None:
+                selected = np.zeros(len(self), dtype=bool)
+            selected[self.mesh.rows(heading)] = True
+        return np.empty(0, dtype=np.int64) if selected is None else np.flatnonzero(selected)
+
+    def trends(self, topic: str, top_n: int = 5) -> ResearchTrends:
+        """Publication counts, growth, study-type mix, emerging MeSH topics and countries for a topic"""
+        rows = self.match(topic)
+        rows = rows[self.years[rows] > 0]
+        if not len(rows):
+            return ResearchTrends(
+                topic=topic,
+                research_gaps=[f"No publications in the local literature store ({len(self)} records) match this topic"],
+            )
+
+        years = self.years[rows]
+        last_year = int(years.max())
+        first_year = max(int(years.min()), last_year - self.trend_years + 1)
+        counts = np.bincount(years[years >= first_year] - first_year, minlength=last_year - first_year + 1)
+        publication_trends = {str(first_year + i): int(count) for i, count in enumerate(counts)}
+
+        # Recent window against the window before it, each recent_years long
+        period = np.full(len(rows), -1)
+        period[years > last_year - self.recent_years] = 1
+        period[(years <= last_year - self.recent_years) & (years > last_year - 2 * self.recent_years)] = 0
+        recent_total, earlier_total = int((period == 1).sum()), int((period == 0).sum())
+        growth_rate = _growth(np.array([recent_total]), np.array([earlier_total]))[0]
+
+        # Study-type mix and its growth, from one bincount over (type, period)
+        types = self.study_type_codes[rows]
+        n_types = len(self.study_types)
+        by_type = np.bincount(types, minlength=n_types)
+        in_window = period >= 0
+        by_type_period = np.bincount(types[in_window] * 2 + period[in_window], minlength=2 * n_types).reshape(n_types, 2)
+        type_growth = _growth(by_type_period[:, 1], by_type_period[:, 0])
+        focus_areas = [
+            FocusArea(
+                area=_STUDY_TYPE_NAMES.get(self.study_types[code], self.study_types[code]),
+                percentage=round(100 * float(by_type[code]) / len(rows), 1),
+                growth=type_growth[code],
+            )
+            for code in np.argsort(-by_type)[:top_n] if by_type[code]
+        ]
+
+        # MeSH headings whose share of the topic grew most from the earlier to the recent window
+        codes, owners = self.mesh.codes_of(rows)
+        owner_period = period[owners]
+        n_terms = len(self.mesh.vocabulary)
+        recent = np.bincount(codes[owner_period == 1], minlength=n_terms)
+        earlier = np.bincount(codes[owner_period == 0], minlength=n_terms)
+        eligible = (recent >= self.emerging_min_count) & ~self._generic_mesh
+        for word in _keywords(topic):
+            # Headings naming the topic itself are not emerging within it
+            eligible[self._mesh_words.get(word, [])] = False
+        # Two-proportion z score, so a heading needs both growth and support to rank
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pooled = (recent + earlier) / max(recent_total + earlier_total, 1)
+            spread = np.sqrt(pooled * (1 - pooled) * (1 / max(recent_total, 1) + 1 / max(earlier_total, 1)))
+            score = (recent / max(recent_total, 1) - earlier / max(earlier_total, 1)) / spread
+        score = np.where(eligible & (spread > 0), score, -np.inf)
+        emerging = [str(self.mesh.vocabulary[code]) for code in np.argsort(-score)[:top_n] if score[code] > 3]
+
+        by_country = np.bincount(self.country_codes[rows], minlength=len(self.countries))
+        named = [code for code in np.argsort(-by_country) if by_country[code] and self.countries[code]]
+        geographical = {str(self.countries[code]): f"{100 * by_country[code] / len(rows):.0f}%" for code in named[:top_n]}
+        other = len(rows) - sum(int(by_country[code]) for code in named[:top_n])
+        if other and geographical:
+            geographical["Other"] = f"{100 * other / len(rows):.0f}%"
+
+        gaps = []
+        shares = {self.study_types[code]: by_type[code] / len(rows) for code in range(n_types)}
+        if not shares.get("meta_analysis") and not shares.get("systematic_review"):
+            gaps.append("No systematic reviews or meta-analyses")
+        if shares.get("randomized_controlled_trial", 0) < 0.1:
+            gaps.append(f"Few randomized controlled trials ({100 * shares.get('randomized_controlled_trial', 0):.0f}% of studies)")
+        if earlier_total and recent_total < earlier_total:
+            gaps.append(f"Publication volume fell {1 - recent_total / earlier_total:.0%} over the last {self.recent_years} years")
+        if last_year == datetime.now().year:
+            gaps.append(f"{last_year} is a partial year")
+
+        return ResearchTrends(
+            topic=topic,
+            total_publications=int(len(rows)),
+            growth_rate=growth_rate,
+            publication_trends=publication_trends,
+            research_focus_areas=focus_areas,
+            emerging_topics=emerging,
+            research_gaps=gaps,
+            geographical_distribution=geographical,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Append PubMed metadata to the local literature store')
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    parser.add_argument('--append', type=str, nargs='*', default=[], help='JSONL files of PubMed records')
+    parser.add_argument('--pubmed', type=str, help='Fetch the records matching this PubMed query')
+    parser.add_argument('--max-results', type=int, default=10000, help='Records to fetch with --pubmed')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(os.path.join(args.agent_path, "agent_config.yaml"), "r") as f:
+        config = yaml.safe_load(f) or {}
+    store = LiteratureStore.from_config(config.get("literature_store", {}), args.agent_path)
+
+    added = 0
+    for path in args.append:
+        with open(path, "r", encoding="utf-8") as f:
+            added += store.append(json.loads(line) for line in f if line.strip())
+    if args.pubmed:
+        from pubmed_client import PubMedClient
+
+        client = PubMedClient.from_config(config.get("pubmed_api", {}), args.agent_path)
+        try:
+            found = client.run_sync(client.search(args.pubmed, args.max_results))
+        finally:
+            client.close()
+        added += store.append(found["top_results"])
+    print(json.dumps({"added": added, "records": len(store)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Pluggable chat model backends for the Science Agent
+
+``llm.provider`` in agent_config.yaml selects the model the agent runs on:
+
+    openai    live ChatOpenAI (default)
+    scripted  deterministic offline model that calls the configured tools on
+              the first turn and then answers from their outputs
+    replay    serves responses recorded from a live run, falling back to the
+              scripted reply for turns that were not recorded
+
+Any provider can record its responses to a JSONL file (``llm.record_path``)
+that the replay provider reads back, keyed by question and turn, so a live
+session can be turned into a fixture that runs without network access or
+API cost.
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage, FunctionMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+from pydantic import PrivateAttr
+
+DEFAULT_SCRIPTED_TOOLS = ["pubmed_literature_search", "evidence_quality_assessment"]
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _usage(messages: List[BaseMessage], reply: AIMessage) -> Dict[str, int]:
+    prompt = sum(_estimate_tokens(str(message.content)) for message in messages)
+    completion = _estimate_tokens(str(reply.content) + json.dumps(reply.additional_kwargs))
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def _replay_key(messages: List[BaseMessage]) -> str:
+    """The user's question and how many tool results precede this turn"""
+    question = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+    turn = sum(1 for m in messages if isinstance(m, (ToolMessage, FunctionMessage)))
+    return f"{turn}\x1f{' '.join(question.split())}"
+
+
+def _offered_tools(kwargs: Dict[str, Any]) -> List[str]:
+    """Names of the tools or functions bound to this call"""
+    if kwargs.get("tools"):
+        return [tool["function"]["name"] for tool in kwargs["tools"]]
+    return [function["name"] for function in kwargs.get("functions", [])]
+
+
+def _tool_call_message(calls: List[Dict[str, str]], as_functions: bool) -> AIMessage:
+    """An assistant message requesting tool calls in the OpenAI tools or functions format"""
+    if as_functions:
+        call = calls[0]
+        return AIMessage(content="", additional_kwargs={"function_call": {
+            "name": call["name"], "arguments": json.dumps({"__arg1": call["input"]})
+        }})
+    return _message_from_dict({"content": "", "additional_kwargs": {"tool_calls": [{
+        "id": f"call_{index}",
+        "type": "function",
+        "function": {"name": call["name"], "arguments": json.dumps({"__arg1": call["input"]})},
+    } for index, call in enumerate(calls)]}})
+
+
+def _message_to_dict(message: AIMessage) -> Dict[str, Any]:
+    return {"content": message.content, "additional_kwargs": message.additional_kwargs}
+
+
+def _message_from_dict(data: Dict[str, Any]) -> AIMessage:
+    additional_kwargs = data.get("additional_kwargs", {})
+    tool_calls = [{
+        "id": call["id"],
+        "name": call["function"]["name"],
+        "args": json.loads(call["function"]["arguments"] or "{}"),
+    } for call in additional_kwargs.get("tool_calls", [])]
+    return AIMessage(content=data.get("content", ""), additional_kwargs=additional_kwargs, tool_calls=tool_calls)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model
+
+    On the first turn of a run it requests every configured tool that is
+    bound to the call, passing the user's question as input; once tool
+    results are in the conversation it answers with a fixed template over
+    them. Token usage is estimated from message lengths.
+    """
+
+    tool_names: List[str] = DEFAULT_SCRIPTED_TOOLS
+    answer_template: str = "Based on the available research evidence, {question}\n\n{findings}"
+    max_finding_chars: int = 400
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _reply(self, messages: List[BaseMessage], **kwargs) -> AIMessage:
+        question = next(
+            (str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), ""
+        )
+        results = [m for m in messages if isinstance(m, (ToolMessage, FunctionMessage))]
+        offered = _offered_tools(kwargs)
+        calls = [{"name": name, "input": question} for name in self.tool_names if name in offered]
+        if not results and calls:
+            return _tool_call_message(calls, as_functions="functions" in kwargs)
+        findings = "\n".join(f"- {str(m.content)[:self.max_finding_chars]}" for m in results)
+        return AIMessage(content=self.answer_template.format(question=question, findings=findings))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        reply = self._reply(messages, **kwargs)
+        return ChatResult(
+            generations=[ChatGeneration(message=reply)],
+            llm_output={"token_usage": _usage(messages, reply), "model_name": self._llm_type},
+        )
+
+
+class ReplayChatModel(ScriptedChatModel):
+    """
+    Serves responses recorded by ResponseRecorder
+
+    A turn is matched on the user's question and the number of tool results
+    so far; turns that were never recorded fall back to the scripted reply.
+    """
+
+    path: str
+    _responses: Dict[str, Dict[str, Any]] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        with open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    recorded = json.loads(line)
+                    self._responses[recorded["key"]] = recorded
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        recorded = self._responses.get(_replay_key(messages))
+        if recorded is None:
+            return super()._generate(messages, stop, run_manager, **kwargs)
+        reply = _message_from_dict(recorded)
+        return ChatResult(
+            generations=[ChatGeneration(message=reply)],
+            llm_output={"token_usage": recorded.get("token_usage") or _usage(messages, reply), "model_name": self._llm_type},
+        )
+
+
+class ResponseRecorder(BaseCallbackHandler):
+    """
+    Appends every chat model response to a JSONL file readable by ReplayChatModel
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._keys: Dict[Any, str] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *, run_id, **kwargs):
+        with self._lock:
+            self._keys[run_id] = _replay_key(messages[0])
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        token_usage = (response.llm_output or {}).get("token_usage")
+        with self._lock:
+            key = self._keys.pop(run_id, None)
+            if key is None:
+                return
+            with open(self.path, "a") as f:
+                for generations in response.generations:
+                    for generation in generations:
+                        message = getattr(generation, "message", None)
+                        if isinstance(message, AIMessage):
+                            f.write(json.dumps({"key": key, **_message_to_dict(message), "token_usage": token_usage}) + "\n")
+
+
+def create_llm(llm_config: Dict[str, Any], agent_path: str = ".") -> BaseChatModel:
+    """Build the chat model selected by the ``llm`` section of agent_config.yaml"""
+    provider = llm_config.get("provider", "openai")
+    callbacks = []
+    if llm_config.get("record_path"):
+        callbacks.append(ResponseRecorder(os.path.join(agent_path, llm_config["record_path"])))
+
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=llm_config.get("model", "gpt-4o"),
+            temperature=llm_config.get("temperature", 0.1),
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            callbacks=callbacks or None,
+        )
+    if provider == "scripted":
+        scripted_config = llm_config.get("scripted", {})
+        return ScriptedChatModel(
+            tool_names=scripted_config.get("tools", DEFAULT_SCRIPTED_TOOLS),
+            callbacks=callbacks or None,
+        )
+    if provider == "replay":
+        return ReplayChatModel(
+            path=os.path.join(agent_path, llm_config.get("replay_path", "benchmarks/llm_replay.jsonl")),
+            tool_names=llm_config.get("scripted", {}).get("tools", DEFAULT_SCRIPTED_TOOLS),
+            callbacks=callbacks or None,
+        )
+    raise ValueError(f"Unknown llm.provider: {provider}")
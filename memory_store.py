@@ -0,0 +1,372 @@
+"""
+Per-user conversation memory for the Science Agent
+
+A bounded per-process cache of ConversationBufferWindowMemory objects,
+evicted by least-recent use and idle time, in front of an optional shared
+backend (SQLite file or a Redis-compatible server). The backend keeps
+history across restarts and lets every worker process see the same
+conversation; messages are stored as compact (role, content) pairs with
+long contents compressed. Turns that slide out of the window can be folded
+into a per-user running summary kept alongside the messages. The async
+methods run backend reads and writes off the event loop.
+"""
+
+import os
+import time
+import asyncio
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+from langchain.memory import ConversationBufferWindowMemory
+from langchain.schema import BaseMessage, HumanMessage, AIMessage
+
+# Contents longer than this many bytes are zlib-compressed in the backend
+COMPRESS_THRESHOLD = 512
+
+_ROLES = {"h": HumanMessage, "a": AIMessage}
+
+
+def _role(message: BaseMessage) -> str:
+    return "h" if isinstance(message, HumanMessage) else "a"
+
+
+class SQLiteMemoryBackend:
+    """
+    Conversation history in a SQLite file shared by the workers on a host
+    """
+
+    def __init__(self, path: str, max_messages: int, ttl: Optional[float] = None):
+        self.path = path
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                user_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content BLOB NOT NULL,
+                compressed INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (user_id, seq)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS summaries (
+                user_id TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def version(self, user_id: str) -> int:
+        """Sequence number of the user's latest message, 0 if none"""
+        row = self._connection().execute(
+            "SELECT MAX(seq) FROM messages WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] or 0
+
+    def load(self, user_id: str) -> Tuple[int, List[BaseMessage]]:
+        conn = self._connection()
+        if self.ttl:
+            conn.execute(
+                "DELETE FROM messages WHERE user_id = ? AND created_at < ?",
+                (user_id, time.time() - self.ttl)
+            )
+        rows = conn.execute(
+            "SELECT seq, role, content, compressed FROM messages WHERE user_id = ? ORDER BY seq",
+            (user_id,)
+        ).fetchall()
+        messages = [
+            _ROLES[role](content=(zlib.decompress(content) if compressed else content).decode("utf-8"))
+            for _, role, content, compressed in rows
+        ]
+        return (rows[-1][0] if rows else 0), messages
+
+    def append(self, user_id: str, messages: List[BaseMessage]) -> int:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seq = (conn.execute(
+                "SELECT MAX(seq) FROM messages WHERE user_id = ?", (user_id,)
+            ).fetchone()[0] or 0)
+            rows = []
+            for message in messages:
+                seq += 1
+                content = message.content.encode("utf-8")
+                compressed = len(content) > COMPRESS_THRESHOLD
+                rows.append((user_id, seq, _role(message), zlib.compress(content) if compressed else content, int(compressed), now))
+            conn.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "DELETE FROM messages WHERE user_id = ? AND seq <= ?",
+                (user_id, seq - self.max_messages)
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return seq
+
+    def load_summary(self, user_id: str) -> str:
+        row = self._connection().execute(
+            "SELECT content, updated_at FROM summaries WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None or (self.ttl and row[1] < time.time() - self.ttl):
+            return ""
+        return row[0]
+
+    def save_summary(self, user_id: str, summary: str):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (user_id, summary, time.time())
+        )
+
+    def clear(self, user_id: str):
+        conn = self._connection()
+        conn.execute("DELETE FROM messages WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM summaries WHERE user_id = ?", (user_id,))
+
+
+class RedisMemoryBackend:
+    """
+    Conversation history in Redis (or any server speaking its protocol)
+    """
+
+    def __init__(self, url: str, max_messages: int, ttl: Optional[float] = None, prefix: str = "science-agent:memory"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, user_id: str) -> Tuple[str, str]:
+        return f"{self.prefix}:{user_id}", f"{self.prefix}:{user_id}:seq"
+
+    def _summary_key(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}:summary"
+
+    def version(self, user_id: str) -> int:
+        return int(self.client.get(self._keys(user_id)[1]) or 0)
+
+    def load(self, user_id: str) -> Tuple[int, List[BaseMessage]]:
+        messages_key, seq_key = self._keys(user_id)
+        pipeline = self.client.pipeline()
+        pipeline.get(seq_key)
+        pipeline.lrange(messages_key, 0, -1)
+        seq, entries = pipeline.execute()
+        messages = []
+        for entry in entries:
+            compressed, role, content = entry[:1], entry[1:2].decode(), entry[2:]
+            if compressed == b"z":
+                content = zlib.decompress(content)
+            messages.append(_ROLES[role](content=content.decode("utf-8")))
+        return int(seq or 0), messages
+
+    def append(self, user_id: str, messages: List[BaseMessage]) -> int:
+        messages_key, seq_key = self._keys(user_id)
+        entries = []
+        for message in messages:
+            content = message.content.encode("utf-8")
+            if len(content) > COMPRESS_THRESHOLD:
+                entries.append(b"z" + _role(message).encode() + zlib.compress(content))
+            else:
+                entries.append(b"r" + _role(message).encode() + content)
+        pipeline = self.client.pipeline()
+        pipeline.rpush(messages_key, *entries)
+        pipeline.ltrim(messages_key, -self.max_messages, -1)
+        pipeline.incrby(seq_key, len(entries))
+        if self.ttl:
+            pipeline.expire(messages_key, int(self.ttl))
+            pipeline.expire(seq_key, int(self.ttl))
+        return int(pipeline.execute()[2])
+
+    def load_summary(self, user_id: str) -> str:
+        summary = self.client.get(self._summary_key(user_id))
+        return summary.decode("utf-8") if summary else ""
+
+    def save_summary(self, user_id: str, summary: str):
+        if self.ttl:
+            self.client.set(self._summary_key(user_id), summary.encode("utf-8"), ex=int(self.ttl))
+        else:
+            self.client.set(self._summary_key(user_id), summary.encode("utf-8"))
+
+    def clear(self, user_id: str):
+        self.client.delete(*self._keys(user_id), self._summary_key(user_id))
+
+
+class UserMemoryStore:
+    """
+    Bounded per-process cache of user conversation memories
+
+    At most ``max_users`` memories are kept in process; the least recently
+    used one is evicted first and any memory idle longer than ``idle_ttl``
+    seconds is dropped. With a backend, a cached memory is reloaded whenever
+    another worker has written to the same conversation. With a summarizer,
+    turns pushed out of the window are folded into the user's summary.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 10,
+        max_users: int = 10000,
+        idle_ttl: Optional[float] = 3600,
+        backend=None,
+        summarizer: Optional[Callable[[str, List[BaseMessage]], str]] = None,
+    ):
+        self.window_size = window_size
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl
+        self.backend = backend
+        self.summarizer = summarizer
+        # user_id -> (memory, backend version, last access, summary)
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, memory_config: Dict[str, Any], agent_path: str = ".", summarizer=None) -> "UserMemoryStore":
+        """Build a store from the ``memory`` section of agent_config.yaml"""
+        window_size = memory_config.get("window_size", 10)
+        backend_type = memory_config.get("backend", "none")
+        backend_ttl = memory_config.get("backend_ttl")
+        backend = None
+        if backend_type == "sqlite":
+            path = os.path.join(agent_path, memory_config.get("path", "cache/memory.sqlite"))
+            backend = SQLiteMemoryBackend(path, window_size * 2, backend_ttl)
+        elif backend_type == "redis":
+            backend = RedisMemoryBackend(
+                memory_config.get("redis_url", "redis://localhost:6379/0"), window_size * 2, backend_ttl
+            )
+        return cls(
+            window_size=window_size,
+            max_users=memory_config.get("max_users", 10000),
+            idle_ttl=memory_config.get("idle_ttl", 3600),
+            backend=backend,
+            summarizer=summarizer,
+        )
+
+    def _new_memory(self, messages: List[BaseMessage]) -> ConversationBufferWindowMemory:
+        memory = ConversationBufferWindowMemory(
+            k=self.window_size,
+            return_messages=True,
+            memory_key="chat_history"
+        )
+        memory.chat_memory.messages.extend(messages[-self.window_size * 2:])
+        return memory
+
+    def _expire(self, now: float):
+        if self.idle_ttl:
+            while self._entries:
+                user_id, entry = next(iter(self._entries.items()))
+                if now - entry[2] <= self.idle_ttl:
+                    break
+                del self._entries[user_id]
+                self.evictions += 1
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, user_id: str) -> ConversationBufferWindowMemory:
+        """Get or create memory for a user"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                entry[2] = now
+        if entry is not None and (self.backend is None or self.backend.version(user_id) == entry[1]):
+            return entry[0]
+
+        version, messages = self.backend.load(user_id) if self.backend else (0, [])
+        summary = self.backend.load_summary(user_id) if self.backend and self.summarizer else ""
+        memory = self._new_memory(messages)
+        with self._lock:
+            self._entries[user_id] = [memory, version, now, summary]
+            self._entries.move_to_end(user_id)
+            self._expire(now)
+        return memory
+
+    async def aget(self, user_id: str) -> ConversationBufferWindowMemory:
+        """get() with the backend version check and load run in a worker thread"""
+        if self.backend is None:
+            return self.get(user_id)
+        return await asyncio.to_thread(self.get, user_id)
+
+    def peek(self, user_id: str) -> Optional[ConversationBufferWindowMemory]:
+        """Memory for a user if one exists in process or in the backend, without creating one"""
+        with self._lock:
+            if user_id in self._entries:
+                return self.get(user_id)
+        if self.backend and self.backend.version(user_id):
+            return self.get(user_id)
+        return None
+
+    def add_turn(self, user_id: str, user_message: str, ai_message: str):
+        """Record one exchange in process and in the backend"""
+        messages = [HumanMessage(content=user_message), AIMessage(content=ai_message)]
+        memory = self.get(user_id)
+        version = self.backend.append(user_id, messages) if self.backend else 0
+        with self._lock:
+            memory.chat_memory.messages.extend(messages)
+            evicted = memory.chat_memory.messages[:-self.window_size * 2]
+            del memory.chat_memory.messages[:-self.window_size * 2]
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] is not memory:
+                entry = None
+            if entry is not None:
+                entry[1] = version
+        if evicted and self.summarizer and entry is not None:
+            summary = self.summarizer(entry[3], evicted)
+            with self._lock:
+                entry[3] = summary
+            if self.backend:
+                self.backend.save_summary(user_id, summary)
+
+    async def aadd_turn(self, user_id: str, user_message: str, ai_message: str):
+        """add_turn() with the backend append and summarizer run in a worker thread"""
+        if self.backend is None and self.summarizer is None:
+            self.add_turn(user_id, user_message, ai_message)
+        else:
+            await asyncio.to_thread(self.add_turn, user_id, user_message, ai_message)
+
+    def summary(self, user_id: str) -> str:
+        """Running summary of the turns that have left the user's window"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry[3] if entry is not None else ""
+
+    def clear(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.backend:
+            self.backend.clear(user_id)
+
+    async def aclear(self, user_id: str):
+        if self.backend is None:
+            self.clear(user_id)
+        else:
+            await asyncio.to_thread(self.clear, user_id)
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.peek(user_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"cached_users": len(self._entries), "evictions": self.evictions}
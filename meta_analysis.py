@@ -0,0 +1,365 @@
+"""
+Vectorized meta-analysis engine
+
+Studies are given as effect sizes ``y`` and sampling variances ``v``. Every
+analysis is expressed as a matrix of study counts ``c`` (one row per
+analysis, one column per study): the full analysis is a row of ones,
+leave-one-out is ``1 - I``, subgroups are one-hot rows and a bootstrap
+replicate is a row of multinomial resampling counts. Fixed-effect,
+DerSimonian-Laird and REML estimates are then computed for all rows at
+once as array operations, so hundreds of studies and thousands of
+bootstrap replicates cost a handful of matrix products rather than a
+Python loop per study.
+"""
+
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from scipy.special import ndtr, ndtri, chdtrc
+
+from results import (
+    slotted,
+    MetaAnalysisSynthesis, EfficacyOutcome, Heterogeneity, SubgroupFinding, LeaveOneOutResult
+)
+
+METHODS = ("FE", "DL", "REML")
+# Bootstrap replicates pooled per array operation, bounding memory at replicates x studies
+_BOOTSTRAP_BLOCK = 1000
+
+
+@slotted
+@dataclass
+class Studies:
+    labels: List[str]
+    effects: np.ndarray
+    variances: np.ndarray
+    participants: np.ndarray
+    # subgroup dimension -> label of each study ("" when not reported)
+    subgroups: Dict[str, List[str]]
+
+
+@slotted
+@dataclass
+class Pooled:
+    """Pooled estimates for each row of a count matrix; every field has one value per row"""
+    estimate: np.ndarray
+    se: np.ndarray
+    tau2: np.ndarray
+    q: np.ndarray
+    df: np.ndarray
+    i2: np.ndarray
+
+    def interval(self, level: float = 0.95):
+        z = ndtri(0.5 + level / 2)
+        return self.estimate - z * self.se, self.estimate + z * self.se
+
+    def p_value(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 2 * ndtr(-np.abs(self.estimate / self.se))
+
+
+def _number(record: Dict[str, Any], *keys) -> Optional[float]:
+    for key in keys:
+        if record.get(key) is not None:
+            return float(record[key])
+    return None
+
+
+def parse_studies(description: str) -> Studies:
+    """Studies from a JSON list (or ``{"studies": [...]}``) of per-study records
+
+    Each record needs an effect size (``effect``, ``effect_size`` or ``yi``)
+    and its variance (``variance`` or ``vi``), standard error (``se``) or 95%
+    confidence interval (``ci_lower``/``ci_upper``). ``label``, ``n`` and
+    ``subgroup`` (a label, or a dict of dimension -> label) are optional.
+    """
+    try:
+        data = json.loads(description)
+    except ValueError:
+        raise ValueError(
+            'expected JSON per-study data, e.g. [{"label": "Devinsky 2017", "effect": 0.45, '
+            '"se": 0.12, "n": 120, "subgroup": {"dose": "high"}}]'
+        ) from None
+    records = data.get("studies", []) if isinstance(data, dict) else data
+    if not isinstance(records, list) or not records:
+        raise ValueError("no studies given")
+
+    labels, effects, variances, participants = [], [], [], []
+    subgroups: Dict[str, List[str]] = {}
+    for i, record in enumerate(records):
+        effect = _number(record, "effect", "effect_size", "yi")
+        variance = _number(record, "variance", "vi")
+        if variance is None and _number(record, "se") is not None:
+            variance = _number(record, "se") ** 2
+        if variance is None and _number(record, "ci_lower") is not None and _number(record, "ci_upper") is not None:
+            variance = ((_number(record, "ci_upper") - _number(record, "ci_lower")) / (2 * 1.959964)) ** 2
+        if effect is None or variance is None or not variance > 0:
+            raise ValueError(f"study {i + 1} needs an effect size and a positive variance, se or CI")
+        labels.append(str(record.get("label") or record.get("study") or f"Study {i + 1}"))
+        effects.append(effect)
+        variances.append(variance)
+        participants.append(_number(record, "n", "participants") or 0)
+
+        subgroup = record.get("subgroup") or {}
+        if not isinstance(subgroup, dict):
+            subgroup = {"subgroup": subgroup}
+        for dimension, label in subgroup.items():
+            subgroups.setdefault(dimension, [""] * len(records))[i] = str(label)
+
+    return Studies(labels, np.asarray(effects), np.asarray(variances), np.asarray(participants), subgroups)
+
+
+def _fixed(y: np.ndarray, v: np.ndarray, c: np.ndarray):
+    """Inverse-variance weights, their row sums, the fixed-effect means and Cochran's Q"""
+    w = c / v
+    sw = w.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = (w @ y) / sw
+    q = (w * (y - mu[:, None]) ** 2).sum(axis=1)
+    return w, sw, mu, q
+
+
+def tau2_dersimonian_laird(y: np.ndarray, v: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Method-of-moments between-study variance for each row of counts"""
+    w, sw, _, q = _fixed(y, v, c)
+    df = c.sum(axis=1) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = sw - (w / v).sum(axis=1) / sw
+        tau2 = (q - df) / scale
+    return np.where(scale > 0, np.maximum(tau2, 0.0), 0.0)
+
+
+def tau2_reml(y: np.ndarray, v: np.ndarray, c: np.ndarray, max_iter: int = 100, tol: float = 1e-10) -> np.ndarray:
+    """Restricted maximum likelihood between-study variance, by fixed-point iteration on every row at once
+
+    Starts from DerSimonian-Laird; rows that converge early are simply
+    recomputed until the slowest row does.
+    """
+    tau2 = tau2_dersimonian_laird(y, v, c)
+    for _ in range(max_iter):
+        total = v + tau2[:, None]
+        w = c / total
+        sw = w.sum(axis=1)
+        w2 = (w / total).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mu = (w @ y) / sw
+            updated = (w / total * ((y - mu[:, None]) ** 2 - v)).sum(axis=1) / w2 + 1 / sw
+        updated = np.where(np.isfinite(updated), np.maximum(updated, 0.0), 0.0)
+        if np.max(np.abs(updated - tau2), initial=0.0) < tol:
+            return updated
+        tau2 = updated
+    return tau2
+
+
+def pool(y: np.ndarray, v: np.ndarray, counts: Optional[np.ndarray] = None, method: str = "REML") -> Pooled:
+    """Pool the studies selected by each row of counts (default: all studies, one row)"""
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}, expected one of {', '.join(METHODS)}")
+    c = np.ones((1, len(y))) if counts is None else np.asarray(counts, dtype=float)
+    _, _, fixed_mu, q = _fixed(y, v, c)
+    df = c.sum(axis=1) - 1
+
+    if method == "FE":
+        tau2 = np.zeros(len(c))
+    elif method == "DL":
+        tau2 = tau2_dersimonian_laird(y, v, c)
+    else:
+        tau2 = tau2_reml(y, v, c)
+
+    w = c / (v + tau2[:, None])
+    sw = w.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = (w @ y) / sw
+        se = np.sqrt(1 / sw)
+        i2 = np.where(q > 0, np.maximum((q - df) / q, 0.0), 0.0)
+    return Pooled(estimate=mu, se=se, tau2=tau2, q=q, df=df, i2=i2)
+
+
+def leave_one_out(y: np.ndarray, v: np.ndarray, method: str = "REML") -> Pooled:
+    """Row i pools every study except study i"""
+    return pool(y, v, 1 - np.eye(len(y)), method)
+
+
+def subgroup_counts(labels: List[str]):
+    """Distinct subgroup labels and their one-hot count matrix, skipping unlabelled studies"""
+    names, index = np.unique(np.asarray(labels), return_inverse=True)
+    counts = (index[None, :] == np.arange(len(names))[:, None]).astype(float)
+    keep = names != ""
+    return names[keep], counts[keep]
+
+
+def _bootstrap_block(y: np.ndarray, v: np.ndarray, method: str, seed: np.random.SeedSequence, replicates: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    estimates = []
+    for start in range(0, replicates, _BOOTSTRAP_BLOCK):
+        size = min(_BOOTSTRAP_BLOCK, replicates - start)
+        counts = rng.multinomial(len(y), np.full(len(y), 1 / len(y)), size=size)
+        estimates.append(pool(y, v, counts, method).estimate)
+    return np.concatenate(estimates) if estimates else np.empty(0)
+
+
+def bootstrap(
+    y: np.ndarray,
+    v: np.ndarray,
+    replicates: int = 1000,
+    method: str = "REML",
+    level: float = 0.95,
+    workers: int = 0,
+    seed: Optional[int] = None,
+):
+    """Percentile bootstrap interval for the pooled estimate, resampling studies
+
+    With workers > 1 the replicates are split across a process pool, each
+    worker drawing from its own spawned seed so results are reproducible
+    for a given seed and worker count.
+    """
+    parts = max(1, workers)
+    seeds = np.random.SeedSequence(seed).spawn(parts)
+    sizes = [replicates // parts + (i < replicates % parts) for i in range(parts)]
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            blocks = list(executor.map(_bootstrap_block, [y] * parts, [v] * parts, [method] * parts, seeds, sizes))
+    else:
+        blocks = [_bootstrap_block(y, v, method, seeds[0], replicates)]
+    estimates = np.concatenate(blocks)
+    estimates = estimates[np.isfinite(estimates)]
+    tail = (1 - level) / 2 * 100
+    return tuple(np.percentile(estimates, [tail, 100 - tail]))
+
+
+def _effect_interpretation(effect: float) -> str:
+    size = abs(effect)
+    if size < 0.2:
+        return "Negligible effect"
+    if size < 0.5:
+        return "Small effect"
+    if size < 0.8:
+        return "Moderate effect"
+    return "Large effect"
+
+
+def _heterogeneity_interpretation(i2: float) -> str:
+    if i2 < 25:
+        return "Low heterogeneity between studies"
+    if i2 < 50:
+        return "Moderate heterogeneity between studies"
+    if i2 < 75:
+        return "Substantial heterogeneity between studies"
+    return "Considerable heterogeneity between studies"
+
+
+def _interval(low: float, high: float) -> str:
+    return f"{low:.2f} to {high:.2f}"
+
+
+def synthesize(
+    studies: Studies,
+    method: str = "REML",
+    level: float = 0.95,
+    bootstrap_replicates: int = 1000,
+    workers: int = 0,
+    seed: Optional[int] = None,
+) -> MetaAnalysisSynthesis:
+    """Pooled effect, heterogeneity, leave-one-out sensitivity and subgroup analyses"""
+    y, v = studies.effects, studies.variances
+    k = len(y)
+    overall = pool(y, v, method=method)
+    low, high = overall.interval(level)
+    mu, p = float(overall.estimate[0]), float(overall.p_value()[0])
+    i2 = float(overall.i2[0]) * 100
+
+    fixed = pool(y, v, method="FE") if method != "FE" else overall
+    fixed_low, fixed_high = fixed.interval(level)
+
+    limitations = []
+    sensitivity = []
+    if k > 2:
+        loo = leave_one_out(y, v, method)
+        loo_low, loo_high = loo.interval(level)
+        for i, label in enumerate(studies.labels):
+            sensitivity.append(LeaveOneOutResult(
+                omitted=label,
+                effect_size=round(float(loo.estimate[i]), 3),
+                confidence_interval=_interval(loo_low[i], loo_high[i]),
+                i_squared=round(float(loo.i2[i]) * 100, 1),
+            ))
+        significant = (low[0] > 0) | (high[0] < 0)
+        flips = ((loo_low > 0) | (loo_high < 0)) != significant
+        if flips.any():
+            omitted = ", ".join(label for label, flip in zip(studies.labels, flips) if flip)
+            limitations.append(f"Statistical significance depends on single studies: {omitted}")
+
+    subgroup_analyses = []
+    for dimension, labels in studies.subgroups.items():
+        names, counts = subgroup_counts(labels)
+        if len(names) < 2:
+            continue
+        groups = pool(y, v, counts, method)
+        group_low, group_high = groups.interval(level)
+        # Between-subgroup Q test on the subgroup estimates
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = 1 / groups.se ** 2
+            between_mu = (weights * groups.estimate).sum() / weights.sum()
+            q_between = float((weights * (groups.estimate - between_mu) ** 2).sum())
+        parts = [
+            f"{name}: {groups.estimate[g]:.2f} ({_interval(group_low[g], group_high[g])}), k={int(counts[g].sum())}"
+            for g, name in enumerate(names)
+        ]
+        parts.append(f"difference Q={q_between:.2f}, p={float(chdtrc(len(names) - 1, q_between)):.3f}")
+        subgroup_analyses.append(SubgroupFinding(subgroup=dimension, finding="; ".join(parts)))
+
+    boot_interval = ""
+    if bootstrap_replicates and k > 2:
+        boot_low, boot_high = bootstrap(y, v, bootstrap_replicates, method, level, workers, seed)
+        boot_interval = _interval(boot_low, boot_high)
+
+    if k < 10:
+        limitations.append("Fewer than 10 studies; between-study variance and small-study effects are poorly estimated")
+    if i2 >= 50:
+        limitations.append("Substantial heterogeneity; the pooled effect may not apply to every population")
+
+    if high[0] < 0 or low[0] > 0:
+        implications = [f"{_effect_interpretation(mu)} that is statistically significant at the {level:.0%} level"]
+    else:
+        implications = ["The evidence does not establish an effect; the confidence interval includes no effect"]
+    if overall.tau2[0] > 0:
+        z = ndtri(0.5 + level / 2)
+        spread = z * math.sqrt(float(overall.tau2[0]) + float(overall.se[0]) ** 2)
+        implications.append(f"{level:.0%} prediction interval for the effect in a new setting: "
+                            f"{_interval(mu - spread, mu + spread)}")
+
+    return MetaAnalysisSynthesis(
+        analysis_type="Fixed-effect meta-analysis" if method == "FE" else f"Random-effects meta-analysis ({method})",
+        included_studies=k,
+        total_participants=int(studies.participants.sum()),
+        efficacy=EfficacyOutcome(
+            effect_size=round(mu, 3),
+            confidence_interval=_interval(low[0], high[0]),
+            p_value=float(f"{p:.2g}"),
+            interpretation=_effect_interpretation(mu),
+            standard_error=round(float(overall.se[0]), 4),
+            bootstrap_interval=boot_interval,
+        ),
+        fixed_effect=EfficacyOutcome(
+            effect_size=round(float(fixed.estimate[0]), 3),
+            confidence_interval=_interval(fixed_low[0], fixed_high[0]),
+            p_value=float(f"{float(fixed.p_value()[0]):.2g}"),
+            interpretation=_effect_interpretation(float(fixed.estimate[0])),
+            standard_error=round(float(fixed.se[0]), 4),
+        ) if method != "FE" else None,
+        heterogeneity=Heterogeneity(
+            i_squared=round(i2, 1),
+            interpretation=_heterogeneity_interpretation(i2),
+            tau_squared=round(float(overall.tau2[0]), 4),
+            q_statistic=round(float(overall.q[0]), 3),
+            q_p_value=float(f"{float(chdtrc(max(k - 1, 1), overall.q[0])):.2g}"),
+        ),
+        sensitivity=sensitivity,
+        subgroup_analyses=subgroup_analyses,
+        limitations=limitations,
+        clinical_implications=implications,
+    )
@@ -0,0 +1,259 @@
+"""
+Persistent PubMed cache
+
+SQLite-backed store for search results (keyed on the normalized query) and
+article records (keyed on PMID). Entries carry their own expiry time and the
+least recently used entries are evicted once the cache exceeds its size
+limits. Hit/miss/eviction counters live in the database so every worker
+process sharing the file sees the same numbers.
+
+Reads never take the write lock: access times and hit/miss counts are
+buffered in memory and written in one batch on the next put, or once the
+buffer grows past ``flush_size`` entries or ``flush_interval`` seconds.
+Entry count and byte totals are maintained by triggers so eviction does not
+rescan the table. The methods are blocking; async callers should run them
+in a worker thread.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+BEGIN IMMEDIATE;
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+INSERT OR IGNORE INTO counters (name, value) SELECT 'entries', COUNT(*) FROM entries;
+INSERT OR IGNORE INTO counters (name, value) SELECT 'bytes', COALESCE(SUM(size), 0) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'entries';
+    UPDATE counters SET value = value + NEW.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'entries';
+    UPDATE counters SET value = value - OLD.size WHERE name = 'bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+    UPDATE counters SET value = value + NEW.size - OLD.size WHERE name = 'bytes';
+END;
+COMMIT;
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a search query for cache lookups"""
+    return _WHITESPACE.sub(" ", query.strip().casefold())
+
+
+class PubMedCache:
+    """
+    SQLite-backed TTL/LRU cache shared by all worker processes on a host
+    """
+
+    def __init__(
+        self,
+        path: str,
+        query_ttl: float = 86400,
+        record_ttl: float = 30 * 86400,
+        max_entries: int = 100000,
+        max_bytes: int = 512 * 1024 * 1024,
+        flush_size: int = 256,
+        flush_interval: float = 5.0,
+    ):
+        self.path = path
+        self.query_ttl = query_ttl
+        self.record_ttl = record_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        # Access times and hit/miss counts not yet written back, shared by all threads
+        self._pending_lock = threading.Lock()
+        self._pending_access: Dict[str, float] = {}
+        self._pending_counts = {"hits": 0, "misses": 0}
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any], agent_path: str = ".") -> "PubMedCache":
+        """Build a cache from the ``pubmed_api.cache`` section of agent_config.yaml"""
+        return cls(
+            path=os.path.join(agent_path, cache_config.get("path", "cache/pubmed.sqlite")),
+            query_ttl=cache_config.get("query_ttl", 86400),
+            record_ttl=cache_config.get("record_ttl", 30 * 86400),
+            max_entries=cache_config.get("max_entries", 100000),
+            max_bytes=cache_config.get("max_bytes", 512 * 1024 * 1024),
+            flush_size=cache_config.get("flush_size", 256),
+            flush_interval=cache_config.get("flush_interval", 5.0),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers proceed while another process writes"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _count(self, conn: sqlite3.Connection, name: str, amount: int = 1):
+        if amount:
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def _get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        conn = self._connection()
+        now = time.time()
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM entries WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*chunk, now)
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+        with self._pending_lock:
+            self._pending_access.update(dict.fromkeys(found, now))
+            self._pending_counts["hits"] += len(found)
+            self._pending_counts["misses"] += len(keys) - len(found)
+            due = (
+                len(self._pending_access) >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+        return found
+
+    def _take_pending(self):
+        with self._pending_lock:
+            access, self._pending_access = self._pending_access, {}
+            counts, self._pending_counts = self._pending_counts, {"hits": 0, "misses": 0}
+            self._last_flush = time.monotonic()
+        return access, counts
+
+    def _write_pending(self, conn: sqlite3.Connection, access: Dict[str, float], counts: Dict[str, int]):
+        if access:
+            conn.executemany(
+                "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(accessed, key) for key, accessed in access.items()]
+            )
+        for name, amount in counts.items():
+            self._count(conn, name, amount)
+
+    def flush(self):
+        """Write buffered access times and hit/miss counts back to the database"""
+        access, counts = self._take_pending()
+        if not access and not any(counts.values()):
+            return
+        conn = self._connection()
+        with self._transaction(conn):
+            self._write_pending(conn, access, counts)
+
+    def _put_many(self, items: Dict[str, Any], ttl: float):
+        if not items:
+            return
+        conn = self._connection()
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            encoded = json.dumps(value, separators=(",", ":"))
+            rows.append((key, encoded, len(encoded), now + ttl, now))
+        access, counts = self._take_pending()
+        with self._transaction(conn):
+            self._write_pending(conn, access, counts)
+            conn.executemany(
+                "INSERT INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires_at = excluded.expires_at, last_access = excluded.last_access",
+                rows
+            )
+            self._evict(conn, now)
+
+    def _totals(self, conn: sqlite3.Connection):
+        totals = dict(conn.execute("SELECT name, value FROM counters WHERE name IN ('entries', 'bytes')"))
+        return totals["entries"], totals["bytes"]
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop least recently used entries (expired ones first) until within limits"""
+        count, total_bytes = self._totals(conn)
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        evicted = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+        count, total_bytes = self._totals(conn)
+        excess_rows = max(0, count - self.max_entries)
+        excess_bytes = max(0, total_bytes - self.max_bytes)
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if excess_rows <= 0 and excess_bytes <= 0:
+                break
+            victims.append((key,))
+            excess_rows -= 1
+            excess_bytes -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._count(conn, "evictions", evicted + len(victims))
+
+    def get_search(self, query: str, max_results: int) -> Optional[Dict[str, Any]]:
+        """Cached esearch result (total count and PMIDs) for a query"""
+        key = f"query:{max_results}:{normalize_query(query)}"
+        return self._get_many([key]).get(key)
+
+    def put_search(self, query: str, max_results: int, result: Dict[str, Any]):
+        self._put_many({f"query:{max_results}:{normalize_query(query)}": result}, self.query_ttl)
+
+    def get_records(self, pmids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached article records keyed by PMID; missing or expired PMIDs are omitted"""
+        found = self._get_many([f"pmid:{pmid}" for pmid in pmids])
+        return {key[len("pmid:"):]: record for key, record in found.items()}
+
+    def put_records(self, records: Iterable[Dict[str, Any]]):
+        self._put_many({f"pmid:{record['pmid']}": record for record in records}, self.record_ttl)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current size, aggregated across processes"""
+        self.flush()
+        conn = self._connection()
+        return dict(conn.execute("SELECT name, value FROM counters").fetchall())
+
+    def clear(self):
+        self._take_pending()
+        conn = self._connection()
+        with self._transaction(conn):
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE counters SET value = 0")
@@ -0,0 +1,361 @@
+"""
+Async PubMed E-utilities client
+
+Wraps esearch/efetch behind a pooled aiohttp session and a token-bucket
+scheduler so that every concurrent caller in the process shares one
+requests-per-second budget. Synchronous callers (LangChain tools running in
+worker threads) are served by a dedicated event loop thread that owns the
+session.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import logging
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Optional, Iterable
+
+import aiohttp
+
+from pubmed_cache import PubMedCache
+
+DEFAULT_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+# Statuses worth another attempt: rate limiting and transient server or gateway failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# PubMed publication types mapped to (study_type, evidence_level), strongest first
+PUBLICATION_TYPE_LEVELS = [
+    ("Meta-Analysis", "meta_analysis", "high"),
+    ("Systematic Review", "systematic_review", "high"),
+    ("Randomized Controlled Trial", "randomized_controlled_trial", "high"),
+    ("Clinical Trial", "clinical_trial", "moderate"),
+    ("Observational Study", "observational_study", "moderate"),
+    ("Comparative Study", "comparative_study", "moderate"),
+    ("Review", "narrative_review", "moderate"),
+    ("Case Reports", "case_report", "low"),
+]
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every request issued by a client
+
+    Tokens are reserved up front, so waiting callers are served in arrival
+    order and the bucket never needs to be polled.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds the caller must wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _element_text(element: Optional[ET.Element]) -> str:
+    if element is None:
+        return ""
+    return "".join(element.itertext()).strip()
+
+
+def parse_pubmed_article(article: ET.Element) -> Dict[str, Any]:
+    """Convert a <PubmedArticle> element into a search result record"""
+    citation = article.find("MedlineCitation")
+    if citation is None:
+        citation = article
+    art = citation.find("Article")
+
+    authors = []
+    if art is not None:
+        for author in art.findall("AuthorList/Author"):
+            last_name = author.findtext("LastName")
+            if last_name:
+                initials = author.findtext("Initials") or ""
+                authors.append(f"{last_name} {initials}".strip())
+            elif author.findtext("CollectiveName"):
+                authors.append(author.findtext("CollectiveName"))
+
+    abstract_parts = []
+    if art is not None:
+        for abstract_text in art.findall("Abstract/AbstractText"):
+            label = abstract_text.get("Label")
+            text = _element_text(abstract_text)
+            abstract_parts.append(f"{label.capitalize()}: {text}" if label else text)
+
+    year = ""
+    if art is not None:
+        pub_date = art.find("Journal/JournalIssue/PubDate")
+        if pub_date is not None:
+            year = pub_date.findtext("Year") or (pub_date.findtext("MedlineDate") or "")[:4]
+
+    publication_types = [
+        _element_text(pt) for pt in (art.findall("PublicationTypeList/PublicationType") if art is not None else [])
+    ]
+    study_type, evidence_level = "other", "low"
+    for publication_type, mapped_type, level in PUBLICATION_TYPE_LEVELS:
+        if publication_type in publication_types:
+            study_type, evidence_level = mapped_type, level
+            break
+
+    return {
+        "pmid": citation.findtext("PMID") or "",
+        "title": _element_text(art.find("ArticleTitle")) if art is not None else "",
+        "authors": ", ".join(authors),
+        "journal": art.findtext("Journal/Title") if art is not None else "",
+        "country": citation.findtext("MedlineJournalInfo/Country") or "",
+        "year": int(year) if year.isdigit() else year,
+        "abstract": "\n".join(abstract_parts),
+        "study_type": study_type,
+        "evidence_level": evidence_level,
+        "publication_types": publication_types,
+        "mesh_terms": [
+            _element_text(heading.find("DescriptorName"))
+            for heading in citation.findall("MeshHeadingList/MeshHeading")
+        ],
+    }
+
+
+class PubMedClient:
+    """
+    Async client for the NCBI E-utilities esearch and efetch endpoints
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        search_endpoint: str = "esearch.fcgi",
+        fetch_endpoint: str = "efetch.fcgi",
+        rate_limit: float = 3,
+        burst: int = 1,
+        max_connections: int = 10,
+        efetch_batch_size: int = 200,
+        max_results: int = 10,
+        timeout: float = 30,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        api_key: Optional[str] = None,
+        tool: Optional[str] = None,
+        email: Optional[str] = None,
+        cache: Optional[PubMedCache] = None,
+    ):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.search_endpoint = search_endpoint
+        self.fetch_endpoint = fetch_endpoint
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.max_connections = max_connections
+        self.efetch_batch_size = efetch_batch_size
+        self.max_results = max_results
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.api_key = api_key
+        self.tool = tool
+        self.email = email
+        self.cache = cache
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, pubmed_config: Dict[str, Any], agent_path: str = ".") -> "PubMedClient":
+        """Build a client from the ``pubmed_api`` section of agent_config.yaml"""
+        cache_config = pubmed_config.get("cache", {})
+        cache = PubMedCache.from_config(cache_config, agent_path) if cache_config.get("enabled", False) else None
+        api_key = os.getenv(pubmed_config.get("api_key_env", "PUBMED_API_KEY"))
+        # NCBI allows 10 requests/second with an API key, 3 without
+        rate_limit = pubmed_config.get("rate_limit_with_key", 10) if api_key else pubmed_config.get("rate_limit", 3)
+        return cls(
+            base_url=pubmed_config.get("base_url", DEFAULT_BASE_URL),
+            search_endpoint=pubmed_config.get("search_endpoint", "esearch.fcgi"),
+            fetch_endpoint=pubmed_config.get("fetch_endpoint", "efetch.fcgi"),
+            rate_limit=rate_limit,
+            burst=pubmed_config.get("burst", 1),
+            max_connections=pubmed_config.get("max_connections", 10),
+            efetch_batch_size=pubmed_config.get("efetch_batch_size", 200),
+            max_results=pubmed_config.get("max_results", 10),
+            timeout=pubmed_config.get("timeout", 30),
+            max_retries=pubmed_config.get("max_retries", 3),
+            retry_backoff=pubmed_config.get("retry_backoff", 1.0),
+            api_key=api_key,
+            tool=pubmed_config.get("tool") or os.getenv("PUBMED_TOOL_NAME"),
+            email=pubmed_config.get("email") or os.getenv("PUBMED_EMAIL"),
+            cache=cache,
+        )
+
+    # Event loop ownership
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop that owns the HTTP session"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="pubmed-client",
+                    daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def run_sync(self, coro):
+        """Run a client coroutine from synchronous code"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    async def run_async(self, coro):
+        """Run a client coroutine from any event loop"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()))
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def close(self):
+        """Close the HTTP session and stop the background loop"""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    # HTTP
+
+    def _common_params(self) -> Dict[str, str]:
+        params = {"db": "pubmed"}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        if self.tool:
+            params["tool"] = self.tool
+        if self.email:
+            params["email"] = self.email
+        return params
+
+    async def _request(self, endpoint: str, data: Dict[str, Any]):
+        """POST to an E-utility, waiting for a rate-limit token before every attempt
+
+        Transient statuses, dropped connections and timeouts are retried with
+        exponential backoff; any response not handed back is released to the
+        connection pool first.
+        """
+        session = await self._get_session()
+        url = self.base_url + endpoint
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await session.post(url, data={**self._common_params(), **data})
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    raise
+                logger.warning(f"PubMed {endpoint} attempt {attempt + 1} failed: {e!r}")
+                await asyncio.sleep(min(self.retry_backoff * 2 ** attempt, 8))
+                continue
+            if response.status in RETRY_STATUSES and not last_attempt:
+                response.release()
+                await asyncio.sleep(min(self.retry_backoff * 2 ** attempt, 8))
+                continue
+            if response.status >= 400:
+                response.release()
+                response.raise_for_status()
+            return response
+
+    async def esearch(self, term: str, retmax: Optional[int] = None) -> Dict[str, Any]:
+        """Search PubMed and return the total hit count and matching PMIDs"""
+        response = await self._request(self.search_endpoint, {
+            "term": term,
+            "retmax": retmax or self.max_results,
+            "retmode": "json",
+            "sort": "relevance",
+        })
+        async with response:
+            payload = await response.json(content_type=None)
+        result = payload.get("esearchresult", {})
+        return {
+            "count": int(result.get("count", 0)),
+            "pmids": result.get("idlist", []),
+        }
+
+    async def _efetch_batch(self, pmids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch one batch of records, parsing the XML incrementally as it arrives"""
+        response = await self._request(self.fetch_endpoint, {
+            "id": ",".join(pmids),
+            "retmode": "xml",
+            "rettype": "abstract",
+        })
+        parser = ET.XMLPullParser(events=("end",))
+        records = []
+        async with response:
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    if element.tag == "PubmedArticle":
+                        records.append(parse_pubmed_article(element))
+                        element.clear()
+        parser.close()
+        return records
+
+    async def efetch(self, pmids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Fetch records for PMIDs, batching them into as few efetch calls as possible"""
+        pmids = list(dict.fromkeys(pmids))
+        batches = [
+            pmids[i:i + self.efetch_batch_size]
+            for i in range(0, len(pmids), self.efetch_batch_size)
+        ]
+        results = await asyncio.gather(*(self._efetch_batch(batch) for batch in batches))
+        by_pmid = {record["pmid"]: record for batch in results for record in batch}
+        return [by_pmid[pmid] for pmid in pmids if pmid in by_pmid]
+
+    async def search(self, query: str, max_results: Optional[int] = None) -> Dict[str, Any]:
+        """Search PubMed and fetch the top matching records, serving what it can from the cache"""
+        max_results = max_results or self.max_results
+        # The cache is blocking SQLite; keep it off the event loop shared by every caller
+        found = await asyncio.to_thread(self.cache.get_search, query, max_results) if self.cache else None
+        if found is None:
+            found = await self.esearch(query, max_results)
+            if self.cache:
+                await asyncio.to_thread(self.cache.put_search, query, max_results, found)
+
+        cached = await asyncio.to_thread(self.cache.get_records, found["pmids"]) if self.cache else {}
+        missing = [pmid for pmid in found["pmids"] if pmid not in cached]
+        if missing:
+            fetched = await self.efetch(missing)
+            if self.cache:
+                await asyncio.to_thread(self.cache.put_records, fetched)
+            cached.update((record["pmid"], record) for record in fetched)
+
+        return {
+            "total_results": found["count"],
+            "search_query": query,
+            "top_results": [cached[pmid] for pmid in found["pmids"] if pmid in cached],
+        }
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Compiled binary format for the RDF knowledge base
+Usage: python rdf_compile.py [--agent-path .]
+
+Turtle (and any other RDF sources listed in rdf_knowledge.extra_sources) is
+compiled into a single file holding a dictionary of distinct terms and the
+triples as an array of integer term ids. Loading memory-maps the file and
+rebuilds the graph from the arrays without running a text parser.
+
+Layout (little endian):
+    header      magic "SKB1", term count (u32), triple count (u32), namespace bytes (u32)
+    namespaces  JSON object prefix -> IRI
+    offsets     (term count + 1) x u64 offsets into the term blob, 8-byte aligned
+    triples     triple count x 3 x u32 term ids (subject, predicate, object)
+    terms       concatenated entries: kind byte + UTF-8 payload
+"""
+
+import os
+import json
+import mmap
+import struct
+import argparse
+from typing import Dict, List, Iterable
+
+import yaml
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.util import guess_format
+
+MAGIC = b"SKB1"
+HEADER = struct.Struct("<4sIII")
+
+IRI, BLANK, PLAIN_LITERAL, LANG_LITERAL, TYPED_LITERAL = range(5)
+
+
+def _encode_term(term) -> bytes:
+    if isinstance(term, URIRef):
+        return bytes([IRI]) + str(term).encode("utf-8")
+    if isinstance(term, BNode):
+        return bytes([BLANK]) + str(term).encode("utf-8")
+    if term.language:
+        return bytes([LANG_LITERAL]) + f"{term.language}\x00{term}".encode("utf-8")
+    if term.datatype:
+        return bytes([TYPED_LITERAL]) + f"{term.datatype}\x00{term}".encode("utf-8")
+    return bytes([PLAIN_LITERAL]) + str(term).encode("utf-8")
+
+
+def _decode_term(entry: bytes):
+    kind, payload = entry[0], entry[1:].decode("utf-8")
+    if kind == IRI:
+        return URIRef(payload)
+    if kind == BLANK:
+        return BNode(payload)
+    if kind == PLAIN_LITERAL:
+        return Literal(payload)
+    qualifier, value = payload.split("\x00", 1)
+    if kind == LANG_LITERAL:
+        return Literal(value, lang=qualifier)
+    return Literal(value, datatype=URIRef(qualifier))
+
+
+def _pad(length: int) -> bytes:
+    return b"\x00" * (-length % 8)
+
+
+def parse_sources(paths: Iterable[str]) -> Graph:
+    """Parse RDF source files into one graph, guessing each file's syntax"""
+    graph = Graph()
+    for path in paths:
+        graph.parse(path, format=guess_format(path) or "turtle")
+    return graph
+
+
+def compile_graph(graph: Graph, output_path: str) -> Dict[str, int]:
+    """Write a graph in the compiled binary format, atomically replacing output_path"""
+    term_ids: Dict = {}
+    entries: List[bytes] = []
+    triples: List[int] = []
+    for triple in graph:
+        for term in triple:
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(entries)
+                entries.append(_encode_term(term))
+            triples.append(term_id)
+
+    namespaces = json.dumps({prefix: str(iri) for prefix, iri in graph.namespaces()}).encode("utf-8")
+    offsets = [0]
+    for entry in entries:
+        offsets.append(offsets[-1] + len(entry))
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries), len(triples) // 3, len(namespaces)))
+        f.write(namespaces)
+        f.write(_pad(HEADER.size + len(namespaces)))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.write(struct.pack(f"<{len(triples)}I", *triples))
+        f.write(_pad(len(triples) * 4))
+        for entry in entries:
+            f.write(entry)
+    os.replace(tmp_path, output_path)
+    return {"terms": len(entries), "triples": len(triples) // 3}
+
+
+def load_graph(path: str) -> Graph:
+    """Rebuild a graph from a compiled file through a read-only memory map"""
+    graph = Graph()
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, term_count, triple_count, namespace_size = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a compiled knowledge base")
+            position = HEADER.size
+            namespaces = json.loads(mapped[position:position + namespace_size].decode("utf-8"))
+            position += namespace_size + len(_pad(HEADER.size + namespace_size))
+
+            view = memoryview(mapped)
+            offsets = view[position:position + (term_count + 1) * 8].cast("Q")
+            position += (term_count + 1) * 8
+            ids = view[position:position + triple_count * 12].cast("I")
+            position += triple_count * 12 + len(_pad(triple_count * 12))
+
+            terms = [
+                _decode_term(mapped[position + offsets[i]:position + offsets[i + 1]])
+                for i in range(term_count)
+            ]
+            graph.addN(
+                (terms[ids[i]], terms[ids[i + 1]], terms[ids[i + 2]], graph)
+                for i in range(0, triple_count * 3, 3)
+            )
+            del offsets, ids
+            view.release()
+
+    for prefix, iri in namespaces.items():
+        graph.bind(prefix, iri)
+    return graph
+
+
+def is_fresh(compiled_path: str, sources: Iterable[str]) -> bool:
+    """True when the compiled file exists and is newer than every source"""
+    if not os.path.exists(compiled_path):
+        return False
+    compiled_mtime = os.path.getmtime(compiled_path)
+    return all(os.path.getmtime(source) <= compiled_mtime for source in sources if os.path.exists(source))
+
+
+def knowledge_sources(agent_path: str, rdf_config: Dict) -> List[str]:
+    """Main knowledge base followed by any extra ontology sources from the config"""
+    paths = [rdf_config.get("knowledge_base_path", "rag/knowledge_base.ttl")]
+    paths.extend(rdf_config.get("extra_sources", []))
+    return [os.path.join(agent_path, path) for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the RDF knowledge base into the binary format')
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    parser.add_argument('--force', action='store_true', help='Recompile even if the compiled file is fresh')
+    args = parser.parse_args()
+
+    with open(os.path.join(args.agent_path, "agent_config.yaml"), "r") as f:
+        rdf_config = (yaml.safe_load(f) or {}).get("rdf_knowledge", {})
+    sources = knowledge_sources(args.agent_path, rdf_config)
+    output_path = os.path.join(args.agent_path, rdf_config.get("compiled_path", "rag/knowledge_base.skb"))
+
+    if not args.force and is_fresh(output_path, sources):
+        print(f"{output_path} is up to date")
+        return
+    stats = compile_graph(parse_sources(sources), output_path)
+    print(f"Wrote {output_path}: {stats['terms']} terms, {stats['triples']} triples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Semantic response cache in front of the agent executor
+
+Answers are looked up by exact normalized question first and then by
+embedding similarity above a configurable threshold. A similar question only
+shares an answer when it names the same compounds and conditions, since
+"Does CBD help epilepsy" and "Does THC help epilepsy" embed almost
+identically. Every entry is tagged with the knowledge version (knowledge
+base and vectorstore fingerprints) it was produced under, and the whole
+cache is dropped when that version moves.
+"""
+
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Iterable
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.strip().casefold()).rstrip("?.! ")
+
+
+def knowledge_version(paths: Iterable[str]) -> str:
+    """Fingerprint of the files an answer depends on"""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    Exact-match plus embedding-similarity cache of agent answers
+    """
+
+    def __init__(
+        self,
+        embeddings=None,
+        similarity_threshold: float = 0.95,
+        ttl: float = 86400,
+        max_entries: int = 10000,
+        version: str = "",
+        normalizer=None,
+    ):
+        if normalizer is None:
+            # claim_index imports knowledge_version from this module
+            from claim_index import EntityNormalizer
+
+            normalizer = EntityNormalizer()
+        self.embeddings = embeddings
+        self.normalizer = normalizer
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = version
+        # key -> {"response", "vector", "entities", "expires_at"}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Unit question vectors, one row per entry; rows of evicted entries are reused
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any], embeddings=None, version: str = "") -> "ResponseCache":
+        """Build a cache from the ``response_cache`` section of agent_config.yaml"""
+        return cls(
+            embeddings=embeddings if cache_config.get("semantic", True) else None,
+            similarity_threshold=cache_config.get("similarity_threshold", 0.95),
+            ttl=cache_config.get("ttl", 86400),
+            max_entries=cache_config.get("max_entries", 10000),
+            version=version,
+        )
+
+    @staticmethod
+    def _key(question: str, scope: str) -> str:
+        return f"{scope}\x1f{normalize_question(question)}"
+
+    def set_version(self, version: str):
+        """Invalidate every entry if the knowledge version changed"""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+                self._clear_rows()
+
+    async def _embed(self, question: str) -> Optional[np.ndarray]:
+        if self.embeddings is None:
+            return None
+        if hasattr(self.embeddings, "aembed_query"):
+            vector = await self.embeddings.aembed_query(normalize_question(question))
+        else:
+            vector = self.embeddings.embed_query(normalize_question(question))
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _entities(self, question: str) -> tuple:
+        """Compounds and conditions a question names, in a comparable form"""
+        found = self.normalizer.find(question)
+        return tuple(sorted(found["compound"])), tuple(sorted(found["condition"]))
+
+    def _clear_rows(self):
+        self._matrix = None
+        self._matrix_keys = []
+        self._rows.clear()
+        self._free_rows.clear()
+
+    def _set_row(self, key: str, vector: np.ndarray):
+        """Write a key's vector into its row, growing the matrix by doubling when full"""
+        row = self._rows.get(key)
+        if row is None:
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row = len(self._matrix_keys)
+                if self._matrix is None or row == len(self._matrix):
+                    grown = np.zeros((max(64, 2 * row), len(vector)), dtype=np.float32)
+                    if self._matrix is not None:
+                        grown[:row] = self._matrix
+                    self._matrix = grown
+                self._matrix_keys.append(None)
+            self._rows[key] = row
+            self._matrix_keys[row] = key
+        self._matrix[row] = vector
+
+    def _drop_row(self, key: str):
+        row = self._rows.pop(key, None)
+        if row is not None:
+            self._matrix[row] = 0
+            self._matrix_keys[row] = None
+            self._free_rows.append(row)
+
+    def _semantic_match(self, vector: np.ndarray, entities: tuple, scope: str, now: float) -> Optional[Dict[str, Any]]:
+        if not self._rows:
+            return None
+        similarities = self._matrix[:len(self._matrix_keys)] @ vector
+        candidates = np.flatnonzero(similarities >= self.similarity_threshold)
+        for position in candidates[np.argsort(similarities[candidates])[::-1]]:
+            key = self._matrix_keys[position]
+            entry = self._entries.get(key) if key is not None else None
+            if (entry is not None and key.startswith(scope + "\x1f") and entry["expires_at"] > now
+                    and entry["entities"] == entities):
+                self._entries.move_to_end(key)
+                return entry
+        return None
+
+    async def lookup(self, question: str, scope: str = "") -> Optional[Dict[str, Any]]:
+        """Cached response for a question, or None
+
+        ``scope`` separates questions asked under different contexts.
+        """
+        now = time.time()
+        key = self._key(question, scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] > now:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry["response"]
+
+        vector = await self._embed(question)
+        with self._lock:
+            entry = self._semantic_match(vector, self._entities(question), scope, now) if vector is not None else None
+            if entry is not None:
+                self.semantic_hits += 1
+                return entry["response"]
+            self.misses += 1
+        return None
+
+    async def store(self, question: str, response: Dict[str, Any], scope: str = ""):
+        vector = await self._embed(question)
+        with self._lock:
+            key = self._key(question, scope)
+            self._entries[key] = {
+                "response": response,
+                "vector": vector,
+                "entities": self._entities(question),
+                "expires_at": time.time() + self.ttl,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._drop_row(evicted)
+            if vector is not None and key in self._entries:
+                self._set_row(key, vector)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "version": self.version,
+            }
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Batch scoring of baseline responses
+Usage: python response_evaluator.py transcripts.jsonl [--output scored.jsonl] [--similarity]
+
+Scores stored answers without calling the LLM again, so old runs can be
+re-scored with new metrics. Input is a JSONL file of transcripts, one
+response per line (``question_id`` plus ``response``, or ``actual`` as
+baseline reports store it), or a baseline_runner JSON report. The keywords
+of every question and the science terms are compiled once into a shared
+term table; each response is lowercased once and tested for each distinct
+term it is scored on, filling a response x term hit matrix from which the
+scores of a whole batch are computed with NumPy. With similarity scoring,
+responses are embedded in batches and compared with the embedding of the
+question's ``expected_answer``.
+"""
+
+import os
+import json
+import argparse
+import logging
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+
+import numpy as np
+import yaml
+
+SCIENCE_TERMS = ("study", "research", "evidence", "clinical", "trial", "analysis")
+KEYWORD_WEIGHT = 0.4
+SCIENCE_WEIGHT = 0.4
+LENGTH_WEIGHT = 0.2
+# Responses this long get the full length score
+FULL_LENGTH = 200
+
+logger = logging.getLogger(__name__)
+
+
+def iter_transcripts(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream transcript records from a JSONL file or the trials of a baseline report"""
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        for question in report.get("questions", []):
+            for trial in question.get("trials", []):
+                yield {**trial, "question_id": question["question_id"]}
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class ResponseEvaluator:
+    """
+    Keyword, science-term, length and optional embedding-similarity scores for many responses at once
+    """
+
+    def __init__(
+        self,
+        questions: List[Dict[str, Any]],
+        science_terms: Iterable[str] = SCIENCE_TERMS,
+        pass_threshold: float = 0.6,
+        embeddings=None,
+        similarity_weight: float = 0.0,
+        batch_size: int = 256,
+    ):
+        self.science_terms = [term.lower() for term in science_terms]
+        self.pass_threshold = pass_threshold
+        self.embeddings = embeddings
+        self.similarity_weight = similarity_weight
+        self.batch_size = batch_size
+        self.questions: Dict[str, Dict[str, Any]] = {}
+        self._expected_vectors: Dict[str, Optional[np.ndarray]] = {}
+        for question in questions:
+            self.questions[question.get("id", "unknown")] = question
+        self._compile()
+
+    @classmethod
+    def from_config(cls, questions: List[Dict[str, Any]], baseline_config: Dict[str, Any], embeddings=None,
+                    **overrides) -> "ResponseEvaluator":
+        """Build an evaluator from the ``baseline_testing`` section of agent_config.yaml"""
+        evaluation_config = baseline_config.get("evaluation", {})
+        settings = {
+            "pass_threshold": evaluation_config.get("pass_threshold", 0.6),
+            "similarity_weight": evaluation_config.get("similarity_weight", 0.0),
+            "batch_size": evaluation_config.get("batch_size", 256),
+        }
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(questions, embeddings=embeddings, **settings)
+
+    def _compile(self):
+        """Term vocabulary, the pattern over all of it and the keyword counts of every question"""
+        keywords = {question_id: [keyword.lower() for keyword in question.get("keywords", []) if keyword]
+                    for question_id, question in self.questions.items()}
+        terms = sorted({term for terms in keywords.values() for term in terms} | set(self.science_terms))
+        self._term_ids = {term: position for position, term in enumerate(terms)}
+        self._question_rows = {question_id: row for row, question_id in enumerate(self.questions)}
+        # Distinct terms each question's responses are tested for: its keywords plus the science terms
+        self._question_terms: List[Tuple[np.ndarray, List[str]]] = []
+        for question_terms in keywords.values():
+            tested = sorted(set(question_terms) | set(self.science_terms))
+            self._question_terms.append((np.array([self._term_ids[term] for term in tested], dtype=np.int64), tested))
+        # Counts, so a keyword listed twice counts twice as the inline scoring always did
+        self._keyword_counts = np.zeros((len(self.questions), len(terms)), dtype=np.int32)
+        for question_id, question_terms in keywords.items():
+            for term in question_terms:
+                self._keyword_counts[self._question_rows[question_id], self._term_ids[term]] += 1
+        self._science_ids = np.array([self._term_ids[term] for term in set(self.science_terms)], dtype=np.int64)
+
+    def _question_id(self, question: Dict[str, Any]) -> str:
+        """Id of a question, registering it when it is new or its keywords changed"""
+        question_id = question.get("id") or question.get("question_id") or question.get("question", "unknown")
+        known = self.questions.get(question_id)
+        if known is None or known.get("keywords", []) != question.get("keywords", known.get("keywords", [])):
+            self.questions[question_id] = {**(known or {}), **question}
+            self._expected_vectors.pop(question_id, None)
+            self._compile()
+        return question_id
+
+    def _hits(self, question_rows: np.ndarray, responses: List[str]) -> np.ndarray:
+        """Boolean matrix: response x term, True where the term occurs in the response
+
+        Only the terms a response is scored on are tested, each once, with
+        str's substring search: measured over 20k responses it is several
+        times faster than a single alternation regex or Arrow's substring
+        kernel covering every term.
+        """
+        hits = np.zeros((len(responses), len(self._term_ids)), dtype=bool)
+        for row, (question_row, response) in enumerate(zip(question_rows, responses)):
+            text = response.lower()
+            columns, terms = self._question_terms[question_row]
+            hits[row, columns] = [term in text for term in terms]
+        return hits
+
+    def _expected_vector(self, question_id: str) -> Optional[np.ndarray]:
+        if question_id not in self._expected_vectors:
+            expected = self.questions.get(question_id, {}).get("expected_answer", "")
+            vector = np.array(self.embeddings.embed_query(expected), dtype=np.float32) if expected else None
+            self._expected_vectors[question_id] = vector / np.linalg.norm(vector) if vector is not None else None
+        return self._expected_vectors[question_id]
+
+    def _similarities(self, question_ids: List[str], responses: List[str]) -> np.ndarray:
+        """Cosine similarity of each response to its question's expected answer, NaN when there is none"""
+        similarities = np.full(len(responses), np.nan)
+        expected = [self._expected_vector(question_id) for question_id in question_ids]
+        rows = [row for row, vector in enumerate(expected) if vector is not None and responses[row]]
+        if not rows:
+            return similarities
+        vectors = np.array(self.embeddings.embed_documents([responses[row] for row in rows]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarities[rows] = np.einsum("ij,ij->i", vectors, np.stack([expected[row] for row in rows]))
+        return similarities
+
+    def evaluate_many(self, questions: List[Dict[str, Any]], responses: List[str]) -> List[Dict[str, Any]]:
+        """Evaluate responses, each against the question at the same position"""
+        question_ids = [self._question_id(question) for question in questions]
+        rows = np.array([self._question_rows[question_id] for question_id in question_ids], dtype=np.int64)
+        hits = self._hits(rows, responses)
+
+        counts = self._keyword_counts[rows]
+        keyword_matches = (counts * hits).sum(axis=1)
+        total_keywords = counts.sum(axis=1)
+        keyword_score = np.where(total_keywords > 0, keyword_matches / np.maximum(total_keywords, 1), 0.5)
+        science_score = hits[:, self._science_ids].sum(axis=1) / max(len(self.science_terms), 1)
+        lengths = np.array([len(response) for response in responses])
+        length_score = np.minimum(lengths / FULL_LENGTH, 1.0)
+        overall = keyword_score * KEYWORD_WEIGHT + science_score * SCIENCE_WEIGHT + length_score * LENGTH_WEIGHT
+
+        similarities = None
+        if self.embeddings is not None:
+            similarities = self._similarities(question_ids, responses)
+            if self.similarity_weight:
+                blended = (1 - self.similarity_weight) * overall + self.similarity_weight * similarities
+                overall = np.where(np.isnan(similarities), overall, blended)
+
+        results = []
+        for i in range(len(responses)):
+            result = {
+                "passed": bool(overall[i] >= self.pass_threshold),
+                "confidence": float(overall[i]),
+                "keyword_matches": int(keyword_matches[i]),
+                "total_keywords": int(total_keywords[i]),
+                "science_relevance": float(science_score[i]),
+                "response_length": int(lengths[i]),
+            }
+            if similarities is not None and not np.isnan(similarities[i]):
+                result["similarity"] = float(similarities[i])
+            results.append(result)
+        return results
+
+    def evaluate(self, question: Dict[str, Any], response: str) -> Dict[str, Any]:
+        """Evaluate one response"""
+        return self.evaluate_many([question], [response])[0]
+
+    def _record_question(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The question a transcript answers: inline keywords win over the baseline file"""
+        question_id = record.get("question_id") or record.get("id")
+        if "keywords" in record or "expected_answer" in record:
+            return {key: record[key] for key in ("keywords", "expected_answer", "question") if key in record} | \
+                {"id": question_id or record.get("question", "unknown")}
+        return self.questions.get(question_id)
+
+    def run(self, input_path: str, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """Score every transcript in input_path, optionally writing one scored record per line"""
+        records = iter_transcripts(input_path)
+        totals = {"transcripts": 0, "passed": 0, "unknown_questions": 0}
+        per_question: Dict[str, Dict[str, float]] = {}
+        out = None
+        if output_path:
+            if os.path.dirname(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            out = open(output_path, "w", encoding="utf-8")
+        try:
+            while True:
+                chunk = list(islice(records, self.batch_size))
+                if not chunk:
+                    break
+                scored, questions = [], []
+                for record in chunk:
+                    question = self._record_question(record)
+                    if question is None:
+                        totals["unknown_questions"] += 1
+                        continue
+                    scored.append(record)
+                    questions.append(question)
+                responses = [record.get("response") or record.get("actual") or "" for record in scored]
+                for record, question, evaluation in zip(scored, questions,
+                                                        self.evaluate_many(questions, responses)):
+                    passed = evaluation["passed"] and not record.get("error")
+                    totals["transcripts"] += 1
+                    totals["passed"] += passed
+                    stats = per_question.setdefault(question["id"], {"runs": 0, "passed": 0, "confidence": 0.0})
+                    stats["runs"] += 1
+                    stats["passed"] += passed
+                    stats["confidence"] += evaluation["confidence"]
+                    if out is not None:
+                        out.write(json.dumps({
+                            "question_id": question["id"],
+                            **{key: record[key] for key in ("trial", "latency", "error") if key in record},
+                            **evaluation,
+                            "passed": passed,
+                        }, ensure_ascii=False) + "\n")
+                logger.info(f"Scored {totals['transcripts']} transcripts")
+        finally:
+            if out is not None:
+                out.close()
+
+        return {
+            **totals,
+            "pass_rate": totals["passed"] / totals["transcripts"] if totals["transcripts"] else 0.0,
+            "questions": {
+                question_id: {
+                    "runs": stats["runs"],
+                    "pass_rate": stats["passed"] / stats["runs"],
+                    "confidence": stats["confidence"] / stats["runs"],
+                }
+                for question_id, stats in per_question.items()
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score stored baseline responses without calling the LLM')
+    parser.add_argument('transcripts', type=str, help='JSONL transcripts or a baseline_runner JSON report')
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    parser.add_argument('--output', type=str, help='JSONL file for the per-transcript scores')
+    parser.add_argument('--similarity', action='store_true', help='Score embedding similarity to expected_answer')
+    parser.add_argument('--similarity-weight', type=float, help='Share of the overall score given to similarity')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(os.path.join(args.agent_path, "agent_config.yaml"), "r") as f:
+        config = yaml.safe_load(f) or {}
+    baseline_config = config.get("baseline_testing", {})
+    with open(os.path.join(args.agent_path, baseline_config.get("test_file", "baseline.json")), "r") as f:
+        questions = json.load(f)
+
+    embeddings = None
+    if args.similarity:
+        from embeddings import embedding_spec, create_embeddings
+
+        embeddings = create_embeddings(embedding_spec(config.get("rag", {})))
+    evaluator = ResponseEvaluator.from_config(questions, baseline_config, embeddings,
+                                              similarity_weight=args.similarity_weight)
+    summary = evaluator.run(args.transcripts, args.output)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Typed results of the Science Agent's analysis tools
+
+Tools build these slotted dataclasses; programmatic callers use them
+directly and the LLM gets them through ``serialize``, which writes compact
+JSON: no indentation, empty fields left out and lists of records written
+once as column names plus rows.
+"""
+
+import json
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import Dict, List, Any, Optional, Union
+
+
+def slotted(cls):
+    """Rebuild a dataclass with __slots__ for its fields
+
+    Equivalent to ``@dataclass(slots=True)``, which needs Python 3.10. Slots
+    cannot be declared by hand on a dataclass whose fields have defaults,
+    since the defaults are class attributes. Apply it above ``@dataclass``.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items() if key not in names + ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@slotted
+@dataclass
+class EvidenceAnalysis:
+    study_type: str
+    sample_size: int
+    evidence_quality: str
+    findings: List[str]
+    limitations: List[str]
+    clinical_relevance: str
+    citation_count: int
+    publication_date: str
+
+
+@slotted
+@dataclass
+class EvidenceAssessment:
+    study_type: str = ""
+    evidence_level: str = ""
+    quality_score: int = 0
+    strengths: List[str] = field(default_factory=list)
+    limitations: List[str] = field(default_factory=list)
+    bias_risk: str = ""
+    clinical_applicability: str = ""
+    criteria_met: List[str] = field(default_factory=list)
+    bias_types: List[str] = field(default_factory=list)
+
+
+@slotted
+@dataclass
+class FocusArea:
+    area: str
+    percentage: float
+    growth: str
+
+
+@slotted
+@dataclass
+class ResearchTrends:
+    topic: str
+    total_publications: int = 0
+    growth_rate: str = ""
+    publication_trends: Dict[str, int] = field(default_factory=dict)
+    research_focus_areas: List[FocusArea] = field(default_factory=list)
+    emerging_topics: List[str] = field(default_factory=list)
+    research_gaps: List[str] = field(default_factory=list)
+    geographical_distribution: Dict[str, str] = field(default_factory=dict)
+
+
+@slotted
+@dataclass
+class ClaimValidation:
+    claim: str
+    evidence_status: str = ""
+    confidence_level: str = ""
+    supporting_studies: List[str] = field(default_factory=list)
+    contradicting_studies: List[str] = field(default_factory=list)
+    evidence_summary: str = ""
+    clinical_significance: str = ""
+    recommendations: List[str] = field(default_factory=list)
+
+
+@slotted
+@dataclass
+class EfficacyOutcome:
+    effect_size: float
+    confidence_interval: str
+    p_value: float
+    interpretation: str
+    standard_error: float = 0.0
+    bootstrap_interval: str = ""
+
+
+@slotted
+@dataclass
+class SafetyOutcome:
+    adverse_events: str
+    serious_adverse_events: str
+    discontinuation_rate: str
+
+
+@slotted
+@dataclass
+class Heterogeneity:
+    i_squared: float
+    interpretation: str
+    tau_squared: float = 0.0
+    q_statistic: float = 0.0
+    q_p_value: float = 1.0
+
+
+@slotted
+@dataclass
+class SubgroupFinding:
+    subgroup: str
+    finding: str
+
+
+@slotted
+@dataclass
+class LeaveOneOutResult:
+    omitted: str
+    effect_size: float
+    confidence_interval: str
+    i_squared: float
+
+
+@slotted
+@dataclass
+class MetaAnalysisSynthesis:
+    analysis_type: str
+    included_studies: int
+    total_participants: int
+    efficacy: EfficacyOutcome
+    heterogeneity: Heterogeneity
+    fixed_effect: Optional[EfficacyOutcome] = None
+    safety: Optional[SafetyOutcome] = None
+    sensitivity: List[LeaveOneOutResult] = field(default_factory=list)
+    subgroup_analyses: List[SubgroupFinding] = field(default_factory=list)
+    limitations: List[str] = field(default_factory=list)
+    clinical_implications: List[str] = field(default_factory=list)
+
+
+@slotted
+@dataclass
+class PubMedArticle:
+    pmid: str
+    title: str = ""
+    authors: str = ""
+    journal: str = ""
+    country: str = ""
+    year: Union[int, str] = ""
+    abstract: str = ""
+    study_type: str = ""
+    evidence_level: str = ""
+    publication_types: List[str] = field(default_factory=list)
+    mesh_terms: List[str] = field(default_factory=list)
+
+
+@slotted
+@dataclass
+class PubMedSearchResult:
+    total_results: int
+    search_query: str
+    top_results: List[PubMedArticle] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PubMedSearchResult":
+        """Build from the dict PubMedClient.search returns"""
+        return cls(
+            total_results=data["total_results"],
+            search_query=data["search_query"],
+            top_results=[PubMedArticle(**record) for record in data["top_results"]],
+        )
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def to_native(value) -> Any:
+    """Plain dicts and lists for a result object, keeping every field"""
+    if is_dataclass(value):
+        return {f.name: to_native(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, list):
+        return [to_native(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_native(item) for key, item in value.items()}
+    return value
+
+
+def _compact(value) -> Any:
+    if is_dataclass(value):
+        compacted = {}
+        for f in fields(value):
+            item = getattr(value, f.name)
+            if not _is_empty(item):
+                compacted[f.name] = _compact(item)
+        return compacted
+    if isinstance(value, list):
+        # Records of one type become a table, so field names are written once
+        if len(value) > 1 and is_dataclass(value[0]) and all(type(item) is type(value[0]) for item in value):
+            columns = [f.name for f in fields(value[0])]
+            columns = [c for c in columns if any(not _is_empty(getattr(item, c)) for item in value)]
+            return {
+                "columns": columns,
+                "rows": [[_compact(getattr(item, c)) for c in columns] for item in value],
+            }
+        return [_compact(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _compact(item) for key, item in value.items() if not _is_empty(item)}
+    return value
+
+
+def serialize(value) -> str:
+    """Compact JSON for a result object, as tools hand it to the LLM"""
+    return json.dumps(_compact(value), separators=(",", ":"), ensure_ascii=False)
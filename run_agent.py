@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Standalone runner for Science Agent
-Usage: python run_agent.py [--test] [--query "your question"]
+Usage: python run_agent.py [--test] [--query "your question"] [--lazy] [--build-snapshot] [--no-stream]
+       python run_agent.py --validate-claims claims.jsonl --output results.jsonl [--workers 4]
 """
 
 import os
@@ -10,23 +11,75 @@ import asyncio
 import argparse
 from agent import create_science_agent
 
+def _preview(value, limit: int = 120) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+async def render_stream(agent, user_id: str, query: str, prefix: str) -> dict:
+    """Print tool activity and answer tokens as they arrive, returning the final response"""
+    started = False
+    response = {}
+    events = agent.stream_query(user_id, query)
+    # Closed explicitly so an interrupted answer gives its admission slot back at once
+    try:
+        async for event in events:
+            if event["type"] == "tool_start":
+                print(f"  🔧 {event['tool']}: {_preview(event['input'])}", flush=True)
+            elif event["type"] == "tool_end":
+                print(f"  ✔️  {event['tool']} returned {_preview(event['output'], 60)}", flush=True)
+            elif event["type"] == "token":
+                if not started:
+                    print(prefix, end="", flush=True)
+                    started = True
+                print(event["content"], end="", flush=True)
+            elif event["type"] == "final":
+                response = event["response"]
+    finally:
+        await events.aclose()
+    if not started:
+        print(f"{prefix}{response.get('response', '')}", end="")
+    print()
+    return response
+
 async def main():
     parser = argparse.ArgumentParser(description='Run Science Agent')
     parser.add_argument('--test', action='store_true', help='Run baseline tests')
     parser.add_argument('--query', type=str, help='Ask a specific question')
     parser.add_argument('--user-id', type=str, default='cli_user', help='User ID for conversation tracking')
     parser.add_argument('--interactive', action='store_true', help='Start interactive mode')
+    parser.add_argument('--lazy', action='store_true', help='Load components in the background on first use')
+    parser.add_argument('--build-snapshot', action='store_true', help='Compile the knowledge base for fast worker startup and exit')
+    parser.add_argument('--timings', action='store_true', help='Print startup phase timings')
+    parser.add_argument('--no-stream', action='store_true', help='Print answers only once they are complete')
+    parser.add_argument('--validate-claims', type=str, metavar='PATH', help='Validate every claim in a JSONL or CSV file')
+    parser.add_argument('--output', type=str, help='JSONL results file for --validate-claims (appended to; reruns resume)')
+    parser.add_argument('--workers', type=int, help='Processes for --validate-claims')
     
     args = parser.parse_args()
     
     print("🔬 Starting Science Agent...")
-    agent = create_science_agent()
+    agent = create_science_agent(lazy=args.lazy or None)
+    
+    if args.build_snapshot:
+        snapshot = agent.build_warm_start_snapshot()
+        print(f"\n💾 {snapshot['snapshot_path']}: {'compiled' if snapshot['components'] else 'already up to date'}")
+        return
+    
+    if args.validate_claims:
+        output = args.output or os.path.splitext(args.validate_claims)[0] + ".validated.jsonl"
+        print(f"\n🧪 Validating claims from {args.validate_claims}...")
+        stats = agent.validate_claims_file(args.validate_claims, output, workers=args.workers)
+        print(f"Validated {stats['validated']} distinct claims ({stats['duplicates']} duplicates, "
+              f"{stats['skipped']} already done) -> {output}")
+        return
     
     if args.test:
         print("\n📊 Running baseline tests...")
         results = await agent.run_baseline_test()
         print(f"Test Results: {results['passed']}/{results['total_questions']} passed")
         print(f"Average Confidence: {results['average_confidence']:.2f}")
+        summary = results['summary']
+        print(f"Latency p50/p95: {summary['latency']['p50']:.2f}s / {summary['latency']['p95']:.2f}s, tokens: {summary['total_tokens']}")
         
         for result in results['results']:
             status = "✅ PASS" if result['passed'] else "❌ FAIL"
@@ -36,8 +89,11 @@ async def main():
     
     if args.query:
         print(f"\n💬 Processing query: {args.query}")
-        response = await agent.process_query(args.user_id, args.query)
-        print(f"\n🤖 Agent Response:\n{response['response']}")
+        if args.no_stream:
+            response = await agent.process_query(args.user_id, args.query)
+            print(f"\n🤖 Agent Response:\n{response['response']}")
+        else:
+            response = await render_stream(agent, args.user_id, args.query, "\n🤖 Agent Response:\n")
         print(f"\n📈 Confidence: {response['confidence']:.2f}")
         return
     
@@ -52,8 +108,11 @@ async def main():
                 if not query:
                     continue
                 
-                response = await agent.process_query(args.user_id, query)
-                print(f"\n🔬 Science Agent: {response['response']}")
+                if args.no_stream:
+                    response = await agent.process_query(args.user_id, query)
+                    print(f"\n🔬 Science Agent: {response['response']}")
+                else:
+                    await render_stream(agent, args.user_id, query, "\n🔬 Science Agent: ")
                 
             except KeyboardInterrupt:
                 break
@@ -63,6 +122,12 @@ async def main():
         print("\n👋 Goodbye!")
         return
     
+    if args.timings:
+        print("\n⏱️  Startup timings:")
+        for phase, seconds in agent.get_startup_timings().items():
+            print(f"  {phase}: {seconds:.3f}s")
+        return
+    
     # Default: show help
     parser.print_help()
 
@@ -0,0 +1,135 @@
+"""
+Admission control for concurrent agent queries
+
+Bounds how many queries run at once, globally and per user, keeps a
+bounded wait queue in front of that limit and rejects new work once the
+queue is full, so overload shows up as fast rejections instead of
+ever-growing latency.
+"""
+
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when a query cannot be admitted within the queue limits"""
+
+
+class AdmissionScheduler:
+    """
+    Global and per-user concurrency limits with a bounded admission queue
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 256,
+        max_per_user: int = 2,
+        max_queue_depth: int = 1024,
+        queue_timeout: Optional[float] = 30,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+
+        # Created on first use so it binds to the loop that runs the queries
+        self._global: Optional[asyncio.Semaphore] = None
+        # user_id -> [semaphore, holders + waiters]
+        self._users: Dict[str, list] = {}
+
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queue_depth = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.timed_out_total = 0
+        self.wait_seconds_total = 0.0
+
+    @classmethod
+    def from_config(cls, concurrency_config: Dict[str, Any]) -> "AdmissionScheduler":
+        """Build a scheduler from the ``concurrency`` section of agent_config.yaml"""
+        return cls(
+            max_concurrent=concurrency_config.get("max_concurrent_queries", 256),
+            max_per_user=concurrency_config.get("max_queries_per_user", 2),
+            max_queue_depth=concurrency_config.get("max_queue_depth", 1024),
+            queue_timeout=concurrency_config.get("queue_timeout", 30),
+        )
+
+    def _user_slot(self, user_id: str) -> asyncio.Semaphore:
+        slot = self._users.get(user_id)
+        if slot is None:
+            slot = self._users[user_id] = [asyncio.Semaphore(self.max_per_user), 0]
+        slot[1] += 1
+        return slot[0]
+
+    def _release_user(self, user_id: str):
+        slot = self._users[user_id]
+        slot[1] -= 1
+        if slot[1] == 0:
+            del self._users[user_id]
+
+    def _release_slots(self, user_id: str, held: list):
+        for semaphore in held:
+            semaphore.release()
+        self._release_user(user_id)
+
+    async def _acquire(self, user_semaphore: asyncio.Semaphore, held: list):
+        """Acquire the user's and then a global slot, recording each one as it is taken"""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrent)
+        await user_semaphore.acquire()
+        held.append(user_semaphore)
+        await self._global.acquire()
+        held.append(self._global)
+
+    @asynccontextmanager
+    async def admit(self, user_id: str):
+        """Hold a global and a per-user slot for the duration of the block"""
+        if self.queued >= self.max_queue_depth:
+            self.rejected_total += 1
+            raise SchedulerOverloaded(f"Admission queue full ({self.queued} waiting)")
+
+        user_semaphore = self._user_slot(user_id)
+        self.queued += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queued)
+        start = time.monotonic()
+        # Before Python 3.12, wait_for drops a result that lands as the caller is cancelled,
+        # so slots are released from what was actually taken rather than from the outcome
+        held = []
+        try:
+            await asyncio.wait_for(self._acquire(user_semaphore, held), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out_total += 1
+            self._release_slots(user_id, held)
+            raise SchedulerOverloaded(f"Not admitted within {self.queue_timeout}s")
+        except BaseException:
+            self._release_slots(user_id, held)
+            raise
+        finally:
+            self.queued -= 1
+
+        self.wait_seconds_total += time.monotonic() - start
+        self.admitted_total += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._global.release()
+            user_semaphore.release()
+            self._release_user(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and admission counters"""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_queue_depth": self.peak_queue_depth,
+            "active_users": len(self._users),
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "timed_out_total": self.timed_out_total,
+            "average_wait_seconds": self.wait_seconds_total / self.admitted_total if self.admitted_total else 0.0,
+        }
@@ -0,0 +1,260 @@
+"""
+Indexed SPARQL execution for structured_science_query
+
+Parses each SPARQL query template once and caches results until the graph
+changes. String literals are lifted out of generated queries into bound
+variables, so questions that differ only in a search term share one parsed
+query. SPARQL itself is evaluated by rdflib against the graph's store,
+which keeps its own triple indexes. Keyword lookups go through a literal
+index instead, with RDF collections (research:keyTerms,
+research:conditions, ...) expanded into direct member entries.
+"""
+
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import RDF, RDFS
+from rdflib.plugins.sparql import prepareQuery
+
+from tracing import annotate
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+# SPARQL comments start with # outside IRIs and string literals
+_COMMENT = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|<[^>\s]*>)|#[^\n]*""")
+# A string literal with an optional language tag or datatype marker, or an IRI to skip over
+_LITERAL = re.compile(r"""<[^>\s]*>|("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')(@[a-zA-Z]+(?:-[a-zA-Z0-9]+)*|\^\^)?""")
+_ESCAPE = re.compile(r"\\(?:u([0-9a-fA-F]{4})|U([0-9a-fA-F]{8})|(.))")
+_ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f"}
+# Literals cannot become variables in VALUES blocks or construct templates, and SELECT * would project them
+_UNPARAMETERIZED = re.compile(
+    r"\b(?:VALUES|CONSTRUCT|DESCRIBE)\b|\bSELECT\s+(?:DISTINCT\s+|REDUCED\s+)?\*", re.IGNORECASE
+)
+PARAMETER_PREFIX = "_literal"
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.strip().casefold())
+
+
+def normalize_sparql(query: str) -> str:
+    """Strip comments and collapse whitespace; literals and IRIs are kept verbatim"""
+    protected: List[str] = []
+
+    def protect(match):
+        if match.group(1) is None:
+            return " "
+        protected.append(match.group(1))
+        return f"\x00{len(protected) - 1}\x00"
+
+    collapsed = _WHITESPACE.sub(" ", _COMMENT.sub(protect, query)).strip()
+    return re.sub("\x00(\\d+)\x00", lambda m: protected[int(m.group(1))], collapsed)
+
+
+def _unescape(body: str) -> str:
+    def replace(match):
+        code = match.group(1) or match.group(2)
+        if code:
+            return chr(int(code, 16))
+        return _ESCAPES.get(match.group(3), match.group(3))
+    return _ESCAPE.sub(replace, body)
+
+
+def parameterize(query: str) -> Tuple[str, Dict[str, Literal]]:
+    """Template of a normalized query with plain and language-tagged string literals as variables
+
+    Returns the query unchanged, with no bindings, where a literal cannot be
+    replaced by a variable without changing the result.
+    """
+    if '"""' in query or "'''" in query or PARAMETER_PREFIX in query:
+        return query, {}
+    bindings: Dict[str, Literal] = {}
+
+    def replace(match):
+        if match.group(1) is None or match.group(2) == "^^":
+            return match.group()
+        name = f"{PARAMETER_PREFIX}{len(bindings)}"
+        language = match.group(2)[1:] if match.group(2) else None
+        bindings[name] = Literal(_unescape(match.group(1)[1:-1]), lang=language)
+        return f"?{name}"
+
+    template = _LITERAL.sub(replace, query)
+    if not bindings or _UNPARAMETERIZED.search(template):
+        return query, {}
+    return template, bindings
+
+
+class _LRU:
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class LiteralIndex:
+    """
+    Token index over the graph's literals, with RDF list members flattened
+
+    A triple whose object is the head of an RDF collection is also indexed as
+    one (subject, predicate, member) entry per list item, so "which areas
+    list CB1 receptors as a key term" is a single dictionary lookup instead
+    of an rdf:rest* path traversal.
+    """
+
+    def __init__(self, graph: Graph):
+        self.labels: Dict[Any, str] = {}
+        # Literal -> (subject, predicate) pairs that state it
+        self.mentions: Dict[Literal, Set[Tuple[Any, Any]]] = defaultdict(set)
+        # Token -> literal values containing it, for keyword lookups
+        self.literal_tokens: Dict[str, Set[Literal]] = defaultdict(set)
+
+        list_nodes = set(graph.subjects(RDF.first, None))
+        for s, p, o in graph:
+            if s in list_nodes or p in (RDF.first, RDF.rest):
+                continue
+            if o in list_nodes:
+                for member in Collection(graph, o):
+                    self._add(s, p, member)
+            else:
+                self._add(s, p, o)
+            if p == RDFS.label:
+                self.labels[s] = str(o)
+
+    def _add(self, s, p, o):
+        if isinstance(o, Literal):
+            self.mentions[o].add((s, p))
+            for token in set(_TOKEN.findall(str(o).casefold())):
+                self.literal_tokens[token].add(o)
+
+    def subjects(self, literal: Literal) -> List[Tuple[Any, Any]]:
+        """(subject, predicate) pairs stating a literal, directly or as a list member"""
+        return sorted(self.mentions.get(literal, ()), key=lambda pair: (str(pair[0]), str(pair[1])))
+
+    def lookup_literals(self, text: str) -> List[Literal]:
+        """Literals all of whose tokens occur in text, longest first"""
+        tokens = set(_TOKEN.findall(text.casefold()))
+        candidates = set()
+        for token in tokens:
+            candidates |= self.literal_tokens.get(token, set())
+        matches = [
+            literal for literal in candidates
+            if set(_TOKEN.findall(str(literal).casefold())) <= tokens
+        ]
+        return sorted(matches, key=lambda literal: len(str(literal)), reverse=True)
+
+
+class SPARQLEngine:
+    """
+    Cached SPARQL execution and keyword lookup over a knowledge graph
+    """
+
+    def __init__(self, graph: Graph, prepared_cache_size: int = 256, result_cache_size: int = 4096):
+        self.graph = graph
+        self.index = LiteralIndex(graph)
+        self.version = 0
+        self._prepared = _LRU(prepared_cache_size)
+        self._results = _LRU(result_cache_size)
+        self._translations = _LRU(result_cache_size)
+        self._namespaces = dict(graph.namespaces())
+
+    @classmethod
+    def from_turtle(cls, path: str, **kwargs) -> "SPARQLEngine":
+        graph = Graph()
+        graph.parse(path, format="turtle")
+        return cls(graph, **kwargs)
+
+    def reload(self, graph: Graph):
+        """Swap in a new graph and invalidate every cache"""
+        self.graph = graph
+        self.index = LiteralIndex(graph)
+        self._namespaces = dict(graph.namespaces())
+        self._prepared.clear()
+        self._results.clear()
+        self.version += 1
+
+    def translate(self, natural_language_query: str, generate) -> str:
+        """SPARQL for a natural-language question, calling the generator once per normalized question"""
+        key = normalize_text(natural_language_query)
+        sparql = self._translations.get(key)
+        if sparql is None:
+            sparql = generate(natural_language_query)
+            self._translations.put(key, sparql)
+        return sparql
+
+    def prepare(self, query: str):
+        """Parse and translate a query to algebra once per template
+
+        Returns the normalized query, the prepared template and the literal
+        bindings that turn the template back into the query.
+        """
+        normalized = normalize_sparql(query)
+        template, bindings = parameterize(normalized)
+        prepared = self._prepared.get(template)
+        annotate(prepared_cache_hit=prepared is not None)
+        if prepared is None:
+            prepared = prepareQuery(template, initNs=self._namespaces)
+            self._prepared.put(template, prepared)
+        return normalized, prepared, bindings
+
+    def query(self, query: str) -> List[Tuple[str, ...]]:
+        """Run a SPARQL query, serving repeated queries from the result cache"""
+        normalized = normalize_sparql(query)
+        key = (self.version, normalized)
+        cached = self._results.get(key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+        _, prepared, bindings = self.prepare(normalized)
+        result = self.graph.query(prepared, initBindings=bindings)
+        if result.type == "ASK":
+            rows = [(str(result.askAnswer),)]
+        else:
+            rows = [tuple(str(value) if value is not None else "" for value in row) for row in result]
+        self._results.put(key, rows)
+        return rows
+
+    def _display(self, node) -> str:
+        return self.index.labels.get(node) or (node.split("#")[-1] if isinstance(node, URIRef) else str(node))
+
+    def lookup(self, text: str, limit: int = 10) -> List[Tuple[str, str, str]]:
+        """Answer a keyword question straight from the indexes
+
+        Returns (subject, predicate, value) rows for every subject that has a
+        literal, including RDF list members, mentioned in the text.
+        """
+        key = (self.version, "lookup", normalize_text(text), limit)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        rows = []
+        for literal in self.index.lookup_literals(text):
+            for s, p in self.index.subjects(literal):
+                rows.append((self._display(s), self._display(p), str(literal)))
+                if len(rows) >= limit:
+                    break
+            if len(rows) >= limit:
+                break
+        self._results.put(key, rows)
+        return rows
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+# agent.py imports sparql_utils from the shared package next to this repository
+pytest.importorskip("agent")
+
+from benchmarks import OfflineScienceAgent
+
+PHASES = {"llm", "pubmed", "retriever", "rdf_knowledge", "literature", "claim_index"}
+KNOWLEDGE_BASE = """@prefix science: <http://formul8.ai/ontology/science#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+science:cbd_epilepsy a science:ResearchFinding ; rdfs:label "CBD for epilepsy" .
+"""
+
+
+@pytest.fixture
+def agent_path(tmp_path):
+    return str(tmp_path)
+
+
+def test_eager_startup_times_every_phase(agent_path):
+    agent = OfflineScienceAgent(agent_path, lazy=False)
+    assert agent._agent_ready
+    assert PHASES | {"tools", "agent", "response_cache"} <= set(agent.get_startup_timings())
+
+
+def test_lazy_startup_assembles_the_agent_on_first_query(agent_path):
+    agent = OfflineScienceAgent(agent_path, lazy=True)
+    assert not agent._agent_ready
+    assert set(agent._pending_components) == PHASES
+
+    result = asyncio.run(agent.process_query("user", "Does CBD help epilepsy?", use_cache=False))
+    assert result["response"]
+    assert agent._agent_ready
+    assert PHASES | {"tools", "agent"} <= set(agent.get_startup_timings())
+
+
+def test_snapshot_compiles_the_knowledge_base_once(tmp_path):
+    (tmp_path / "rag").mkdir()
+    (tmp_path / "rag" / "knowledge_base.ttl").write_text(KNOWLEDGE_BASE)
+    agent = OfflineScienceAgent(str(tmp_path), lazy=True)
+
+    snapshot = agent.build_warm_start_snapshot()
+    assert snapshot["components"] == ["knowledge_base"]
+    assert (tmp_path / "rag" / "knowledge_base.skb").exists()
+    assert agent.build_warm_start_snapshot()["components"] == []
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_stream_query_yields_tool_events_and_the_final_response(agent_path):
+    agent = OfflineScienceAgent(agent_path, lazy=False)
+    events = asyncio.run(collect(agent.stream_query("user", "Does CBD help epilepsy?", use_cache=False)))
+
+    kinds = [event["type"] for event in events]
+    assert kinds[-1] == "final" and kinds.count("final") == 1
+    assert {event["tool"] for event in events if event["type"] == "tool_start"} == {
+        "pubmed_literature_search", "evidence_quality_assessment"
+    }
+    response = events[-1]["response"]
+    assert "error" not in response
+    assert response["response"].startswith("Based on the available research evidence")
+    assert agent.get_scheduler_stats()["in_flight"] == 0
+
+
+def test_closing_the_stream_early_releases_the_admission_slot(agent_path):
+    agent = OfflineScienceAgent(agent_path, lazy=False)
+
+    async def scenario():
+        events = agent.stream_query("user", "Does CBD help epilepsy?", use_cache=False)
+        first = await events.__anext__()
+        held = agent.get_scheduler_stats()["in_flight"]
+        await events.aclose()
+        return first, held
+
+    first, held = asyncio.run(scenario())
+    assert first["type"] == "tool_start"
+    assert held == 1
+    assert agent.get_scheduler_stats()["in_flight"] == 0
+
+
+def test_stream_without_a_final_answer_reports_it(agent_path, monkeypatch):
+    agent = OfflineScienceAgent(agent_path, lazy=False)
+
+    async def no_events(self, *args, **kwargs):
+        return
+        yield
+
+    monkeypatch.setattr(type(agent.agent_executor), "astream_events", no_events)
+    events = asyncio.run(collect(agent.stream_query("user", "Does CBD help epilepsy?", use_cache=False)))
+    assert [event["type"] for event in events] == ["final"]
+    assert events[0]["response"]["error"] == "agent run ended without a final answer"
+    assert agent.get_scheduler_stats()["in_flight"] == 0
+
+
+def test_render_stream_closes_an_interrupted_stream(monkeypatch):
+    import run_agent
+
+    closed = []
+
+    class Interrupted(Exception):
+        pass
+
+    class StreamingAgent:
+        async def stream_query(self, user_id, query):
+            try:
+                yield {"type": "token", "content": "Cannabidiol"}
+                yield {"type": "final", "response": {"response": "Cannabidiol", "confidence": 0.9}}
+            finally:
+                closed.append(user_id)
+
+    def interrupt(*args, **kwargs):
+        raise Interrupted
+
+    async def scenario():
+        try:
+            await run_agent.render_stream(StreamingAgent(), "user", "Does CBD help?", "> ")
+        except Interrupted:
+            # Closed before the event loop's own async generator cleanup could run
+            return list(closed)
+
+    monkeypatch.setattr("builtins.print", interrupt)
+    assert asyncio.run(scenario()) == ["user"]
@@ -0,0 +1,103 @@
+import json
+import asyncio
+
+import pytest
+
+from baseline_runner import BaselineRunner, compare_reports, percentile
+
+QUESTIONS = [
+    {"id": "cbd_epilepsy", "question": "Does CBD help epilepsy?", "expected_answer": "Yes, in RCTs"},
+    {"id": "thc_pain", "question": "Does THC help chronic pain?", "expected_answer": "Moderate evidence"},
+    {"id": "broken", "question": "Trigger a failure", "expected_answer": ""},
+]
+
+
+class StubAgent:
+    """Keeps per-user histories and fails the question that asks it to"""
+
+    def __init__(self):
+        self.histories = {}
+        self.user_ids = []
+        self.cleared = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def process_query(self, user_id, query, context=None, use_cache=True):
+        history = self.histories.setdefault(user_id, [])
+        assert history == [], "session saw another question's history"
+        self.user_ids.append(user_id)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if query.startswith("Trigger"):
+                raise RuntimeError("tool exploded")
+            history.append(query)
+            return {"response": f"Answer to {query}", "confidence": 0.8}
+        finally:
+            self.in_flight -= 1
+
+    async def _evaluate_baseline_response(self, question, response):
+        return {"passed": question["id"] != "thc_pain", "confidence": 0.7}
+
+    async def aclear_user_memory(self, user_id):
+        self.cleared.append(user_id)
+        self.histories.pop(user_id, None)
+
+
+def test_percentile_interpolates_between_ranks():
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 95) == pytest.approx(3.85)
+    assert percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0) == 1.0
+
+
+def test_every_trial_gets_its_own_session_which_is_cleared(tmp_path):
+    agent = StubAgent()
+    runner = BaselineRunner(agent, concurrency=2, trials=3, transcript_path=str(tmp_path / "transcripts.jsonl"))
+    report = asyncio.run(runner.run(QUESTIONS))
+
+    assert len(agent.user_ids) == len(set(agent.user_ids)) == 9
+    assert sorted(agent.cleared) == sorted(agent.user_ids)
+    assert agent.histories == {}
+    assert agent.peak_in_flight <= 2
+
+    summary = report["summary"]
+    assert (summary["questions"], summary["runs"], summary["passed"], summary["errors"]) == (3, 9, 1, 3)
+    by_id = {question["question_id"]: question for question in report["questions"]}
+    assert by_id["cbd_epilepsy"]["pass_rate"] == 1.0
+    assert by_id["thc_pain"]["passed"] is False
+    assert by_id["broken"]["latency"] == {"p50": 0.0, "p95": 0.0, "mean": 0.0}
+    assert by_id["broken"]["trials"][0]["error"] == "tool exploded"
+
+    transcripts = [json.loads(line) for line in (tmp_path / "transcripts.jsonl").read_text().splitlines()]
+    assert len(transcripts) == 9
+    assert {line["response"] for line in transcripts if line["question_id"] == "cbd_epilepsy"} == {
+        "Answer to Does CBD help epilepsy?"
+    }
+
+
+def report(p50, p95, tokens, pass_rate, questions):
+    return {
+        "summary": {"latency": {"p50": p50, "p95": p95}, "total_tokens": tokens, "pass_rate": pass_rate},
+        "questions": [
+            {"question_id": question_id, "latency": {"p50": p50, "p95": p95}, "total_tokens": tokens,
+             "pass_rate": 1.0 if passed else 0.0, "passed": passed}
+            for question_id, passed in questions.items()
+        ],
+    }
+
+
+def test_compare_reports_deltas_and_regressions():
+    previous = report(1.0, 2.0, 100, 1.0, {"cbd_epilepsy": True, "thc_pain": True, "removed": True})
+    current = report(1.5, 1.5, 120, 0.5, {"cbd_epilepsy": True, "thc_pain": False, "new": False})
+    comparison = compare_reports(current, previous)
+
+    assert comparison["p50_delta"] == 0.5
+    assert comparison["p95_delta"] == -0.5
+    assert comparison["token_delta"] == 20
+    assert comparison["pass_rate_delta"] == -0.5
+    assert comparison["regressions"] == ["thc_pain"]
+    assert [question["question_id"] for question in comparison["questions"]] == ["cbd_epilepsy", "thc_pain"]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+# agent.py imports sparql_utils from the shared package next to this repository
+pytest.importorskip("agent")
+
+from benchmarks import OfflineScienceAgent, bench, compare_results, run_benchmarks
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    agent = OfflineScienceAgent(str(tmp_path_factory.mktemp("agent")))
+    try:
+        return {result["name"]: result for result in asyncio.run(run_benchmarks(agent, rounds=3))}
+    finally:
+        agent.pubmed_client.close()
+
+
+@pytest.mark.parametrize("name", [
+    "tool.pubmed_literature_search",
+    "tool.evidence_quality_assessment",
+    "tool.evidence_quality_assessment.batch",
+    "tool.scientific_claim_validation",
+    "tool.meta_analysis_synthesis",
+    "evaluate_baseline_response.batch",
+    "process_query.fresh_session",
+    "process_query.ongoing_session",
+    "evaluate_baseline_response",
+])
+def test_offline_suite_times_every_hot_path(results, name):
+    result = results[name]
+    assert result["rounds"] == 3
+    assert 0 < result["min_us"] <= result["p50_us"] <= result["p95_us"]
+
+
+def test_bench_pauses_garbage_collection_only_while_timing():
+    import gc
+
+    enabled = []
+    result = bench("noop", lambda: enabled.append(gc.isenabled()), rounds=4, warmup=2)
+    assert enabled == [True, True, False, False, False, False]
+    assert gc.isenabled()
+    assert result["rounds"] == 4
+
+
+def test_compare_results_reports_relative_p50_change():
+    previous = [{"name": "a", "p50_us": 100.0}, {"name": "b", "p50_us": 0.0}]
+    current = [{"name": "a", "p50_us": 130.0}, {"name": "b", "p50_us": 5.0}, {"name": "c", "p50_us": 1.0}]
+    changes = compare_results(current, previous)
+    assert [change["name"] for change in changes] == ["a", "b"]
+    assert changes[0]["p50_change"] == pytest.approx(0.3)
+    assert changes[1]["p50_change"] == 0.0
@@ -0,0 +1,89 @@
+import json
+
+from claim_batch import ClaimBatchValidator, claim_key
+from results import ClaimValidation
+
+
+class CountingValidator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, claim):
+        self.calls.append(claim)
+        return ClaimValidation(claim, evidence_status="Moderate Evidence")
+
+
+def write_claims(path, claims):
+    path.write_text("".join(json.dumps({"id": str(i), "claim": claim}) + "\n" for i, claim in enumerate(claims)))
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_near_identical_claims_are_validated_once(tmp_path):
+    claims = tmp_path / "claims.jsonl"
+    write_claims(claims, ["CBD reduces seizures.", "cbd REDUCES the seizures", "THC relieves pain"])
+    validate = CountingValidator()
+    stats = ClaimBatchValidator(validate, chunk_size=2).run(str(claims), str(tmp_path / "out.jsonl"))
+
+    assert stats == {"skipped": 0, "validated": 2, "duplicates": 1}
+    assert validate.calls == ["CBD reduces seizures.", "THC relieves pain"]
+    records = read_output(tmp_path / "out.jsonl")
+    assert [record["id"] for record in records] == ["0", "1", "2"]
+    assert records[1]["canonical_claim"] == "CBD reduces seizures."
+    assert claim_key("Does CBD reduce seizures?") == claim_key("cbd reduce seizures")
+
+
+def test_resume_after_a_crash_mid_line(tmp_path):
+    claims = tmp_path / "claims.jsonl"
+    write_claims(claims, ["CBD reduces seizures", "THC relieves pain", "Cannabis helps sleep"])
+    output = tmp_path / "out.jsonl"
+    ClaimBatchValidator(CountingValidator()).run(str(claims), str(output))
+
+    # Simulate a crash while the third record was being written
+    lines = output.read_text().splitlines(keepends=True)
+    output.write_text(lines[0] + lines[1] + lines[2][:25])
+
+    validate = CountingValidator()
+    stats = ClaimBatchValidator(validate).run(str(claims), str(output))
+    assert stats["skipped"] == 2
+    assert validate.calls == ["Cannabis helps sleep"]
+    assert [record["id"] for record in read_output(output)] == ["0", "1", "2"]
+
+
+def test_trim_partial_line_scans_back_across_blocks(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_bytes(b'{"id": "0"}\n' + b"x" * 100)
+    ClaimBatchValidator._trim_partial_line(str(output), block_size=16)
+    assert output.read_bytes() == b'{"id": "0"}\n'
+
+    output.write_bytes(b"no newline at all")
+    ClaimBatchValidator._trim_partial_line(str(output), block_size=4)
+    assert output.read_bytes() == b""
+
+
+class PickleCountingValidator:
+    pickles = 0
+
+    def __call__(self, claim):
+        return ClaimValidation(claim, evidence_status="Moderate Evidence")
+
+    def __getstate__(self):
+        type(self).pickles += 1
+        return {}
+
+
+def test_workers_receive_validate_once(tmp_path):
+    claims = tmp_path / "claims.jsonl"
+    write_claims(claims, [f"CBD reduces symptom {i}" for i in range(40)])
+    stats = ClaimBatchValidator(PickleCountingValidator(), chunk_size=8, workers=2).run(
+        str(claims), str(tmp_path / "out.jsonl")
+    )
+
+    assert stats["validated"] == 40
+    assert [record["claim"] for record in read_output(tmp_path / "out.jsonl")] == [
+        f"CBD reduces symptom {i}" for i in range(40)
+    ]
+    # Five chunks of two parts each would pickle it ten times if it travelled with the claims
+    assert PickleCountingValidator.pickles <= 2
@@ -0,0 +1,74 @@
+import pickle
+
+import pytest
+
+from claim_index import ClaimEvidenceIndex, EntityNormalizer, EvidenceEntry
+
+
+@pytest.fixture(scope="module")
+def index():
+    return ClaimEvidenceIndex([
+        EvidenceEntry("cannabidiol", "epilepsy", "seizure frequency", "high", curated=True,
+                      findings=["CBD reduces seizure frequency in Dravet and Lennox-Gastaut syndromes"]),
+        EvidenceEntry("thc", "epilepsy", evidence_level="moderate", curated=True,
+                      findings=["THC shows anticonvulsant effects in some studies"]),
+        EvidenceEntry("cannabis", "nausea", evidence_level="high", curated=True,
+                      findings=["Nausea: strong evidence"]),
+    ])
+
+
+def test_supported_claim_takes_the_grade(index):
+    result = index.validate("CBD reduces seizures in epilepsy")
+    assert (result.evidence_status, result.confidence_level) == ("Strong Evidence", "High")
+
+
+@pytest.mark.parametrize("claim", [
+    "CBD does not reduce seizures in epilepsy",
+    "CBD doesn't reduce seizures in epilepsy",
+    "Cannabidiol fails to reduce seizures in epilepsy",
+    "CBD is ineffective for epilepsy",
+])
+def test_negated_claims_require_review(index, claim):
+    result = index.validate(claim)
+    assert result.evidence_status == "Requires Review"
+    assert "negated" in result.evidence_summary
+
+
+@pytest.mark.parametrize("claim", [
+    "THC causes epilepsy",
+    "THC induces seizures",
+    "THC increases the risk of epilepsy",
+    "THC worsens epilepsy",
+])
+def test_causal_claims_require_review(index, claim):
+    result = index.validate(claim)
+    assert result.evidence_status == "Requires Review"
+    assert "causation" in result.evidence_summary
+
+
+def test_entity_names_are_not_cues(index):
+    assert index.normalizer.cues("Cannabis reduces chemotherapy-induced nausea") == ([], [])
+    assert index.validate("Cannabis reduces chemotherapy-induced nausea").evidence_status == "Strong Evidence"
+
+
+@pytest.mark.parametrize("text, compound", [
+    ("CBD-rich oil for epilepsy", "cannabidiol"),
+    ("THC-free extracts for epilepsy", "thc"),
+    ("CBD-infused gummies for epilepsy", "cannabidiol"),
+])
+def test_hyphenated_compounds_are_recognized(text, compound):
+    found = EntityNormalizer().find(text)
+    assert found["compound"] == [compound]
+    assert found["condition"] == ["epilepsy"]
+
+
+def test_hyphenated_forms_still_match_whole():
+    found = EntityNormalizer().find("Delta-9-THC in Lennox-Gastaut syndrome and anti-inflammatory use")
+    assert found["compound"] == ["thc"]
+    assert found["condition"] == ["epilepsy", "inflammation"]
+
+
+def test_evidence_entry_is_slotted():
+    entry = EvidenceEntry("cannabidiol", "epilepsy")
+    assert not hasattr(entry, "__dict__")
+    assert pickle.loads(pickle.dumps(entry)) == entry
@@ -0,0 +1,63 @@
+import pytest
+from langchain.schema import AIMessage
+from langchain_core.messages import ToolMessage
+
+from context_assembler import (
+    ContextAssembler, OMITTED_OUTPUT, TRUNCATED_OUTPUT, context_window, count_tokens, message_tokens
+)
+
+CONFIG = {"llm": {"model": "gpt-4o", "max_tokens": 2000}, "context": {"history_share": 0.4}}
+
+
+def tool_output(tokens):
+    # "cbd " is one token with tiktoken and four characters without it
+    return "cbd " * tokens
+
+
+def step(call_id, output):
+    return [AIMessage(content="", additional_kwargs={"tool_calls": [{"id": call_id}]}),
+            ToolMessage(content=output, tool_call_id=call_id)]
+
+
+def test_budget_comes_from_the_context_window_not_the_completion_limit():
+    assembler = ContextAssembler.from_config(CONFIG)
+    assert assembler.max_tokens == 128000 - 2000 - 2000
+    assert context_window("gpt-4-0613") == 8192
+    assert context_window("gpt-4o-2024-08-06") == 128000
+    assert context_window("anything", 32000) == 32000
+
+
+def test_explicit_budget_wins_and_impossible_budget_raises():
+    assert ContextAssembler.from_config({**CONFIG, "context": {"max_tokens": 3000}}).max_tokens == 3000
+    with pytest.raises(ValueError):
+        ContextAssembler.from_config({"llm": {"model": "gpt-4", "max_tokens": 7000}})
+
+
+def test_three_thousand_token_output_of_the_current_step_is_kept():
+    assembler = ContextAssembler.from_config(CONFIG)
+    output = tool_output(3000)
+    fitted = assembler.scratchpad(step("call_1", output))
+    assert fitted[-1].content == output
+
+
+def test_older_outputs_are_omitted_before_the_latest_is_truncated():
+    assembler = ContextAssembler(max_tokens=2000, history_share=0.4)
+    messages = step("call_1", tool_output(500)) + step("call_2", tool_output(3000))
+    fitted = assembler.scratchpad(messages)
+
+    assert fitted[1].content == OMITTED_OUTPUT
+    latest = fitted[-1].content
+    assert latest.startswith("cbd cbd")
+    assert latest.endswith(TRUNCATED_OUTPUT)
+    assert fitted[-1].tool_call_id == "call_2"
+    assert sum(message_tokens(m) for m in fitted) <= assembler.scratchpad_budget
+
+
+def test_parallel_outputs_of_the_latest_step_share_the_budget():
+    assembler = ContextAssembler(max_tokens=2000, history_share=0.4)
+    messages = [AIMessage(content="")] + [
+        ToolMessage(content=tool_output(1000), tool_call_id=f"call_{i}") for i in range(2)
+    ]
+    fitted = assembler.scratchpad(messages)
+    assert all(m.content.endswith(TRUNCATED_OUTPUT) for m in fitted[1:])
+    assert abs(count_tokens(fitted[1].content) - count_tokens(fitted[2].content)) <= 1
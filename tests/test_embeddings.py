@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+from langchain.embeddings.base import Embeddings
+
+from embeddings import CachedEmbeddings
+
+
+class RecordingEmbeddings(Embeddings):
+    """Marks query and document vectors differently and records what it was asked to embed"""
+
+    def __init__(self):
+        self.queries = []
+        self.documents = []
+        self.document_calls = 0
+        self._lock = threading.Lock()
+
+    def embed_query(self, text):
+        with self._lock:
+            self.queries.append(text)
+        return [1.0, float(len(text))]
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        self.documents.extend(texts)
+        return [[0.0, float(len(text))] for text in texts]
+
+
+def make(tmp_path=None, **kwargs):
+    model = RecordingEmbeddings()
+    path = str(tmp_path / "embeddings.sqlite") if tmp_path else None
+    return model, CachedEmbeddings(model, "test:model", persistent_path=path, **kwargs)
+
+
+def test_asymmetric_queries_embed_original_text_with_embed_query():
+    model, cached = make(symmetric=False)
+    vector = cached.embed_query("  Does CBD reduce Seizures? ")
+    assert model.queries == ["  Does CBD reduce Seizures? "]
+    assert model.documents == []
+    assert vector[0] == 1.0
+
+
+def test_symmetric_batch_is_one_model_call():
+    model, cached = make(batch_window=0.05)
+
+    async def run():
+        return await asyncio.gather(*(cached.aembed_query(f"CBD and condition {i}") for i in range(5)))
+
+    vectors = asyncio.run(run())
+    assert model.document_calls == 1
+    assert sorted(model.documents) == [f"CBD and condition {i}" for i in range(5)]
+    assert model.queries == []
+    assert vectors == [[0.0, 19.0]] * 5
+
+
+def test_normalized_key_is_shared_between_spellings(tmp_path):
+    model, cached = make(tmp_path)
+    cached.embed_query("Does CBD reduce seizures?")
+    cached.embed_query("does  cbd reduce SEIZURES?")
+    assert model.documents == ["Does CBD reduce seizures?"]
+    assert cached.stats()["hits"] == 1
+
+    _, reopened = make(tmp_path)
+    assert reopened.embed_query("DOES CBD REDUCE SEIZURES?") == [0.0, 25.0]
+    assert reopened.stats() == {"hits": 1, "misses": 0, "memory_entries": 1}
+
+
+def test_async_lookups_use_the_persistent_layer(tmp_path):
+    model, cached = make(tmp_path)
+    asyncio.run(cached.aembed_query("CBD and sleep"))
+    _, reopened = make(tmp_path)
+    assert asyncio.run(reopened.aembed_query("cbd and sleep")) == [0.0, 13.0]
+    assert reopened.stats() == {"hits": 1, "misses": 0, "memory_entries": 1}
+    assert model.document_calls == 1
+
+
+def test_concurrent_queries_are_coalesced_by_key():
+    model, cached = make(batch_window=0.05, symmetric=False)
+
+    async def run():
+        return await asyncio.gather(
+            cached.aembed_query("THC and pain"),
+            cached.aembed_query("thc AND pain"),
+            cached.aembed_query("CBD and anxiety"),
+        )
+
+    first, second, third = asyncio.run(run())
+    assert first == second
+    assert sorted(model.queries) == ["CBD and anxiety", "THC and pain"]
+
+
+def test_documents_pass_through():
+    model, cached = make(symmetric=False)
+    assert cached.embed_documents(["A", "BB"]) == [[0.0, 1.0], [0.0, 2.0]]
+    assert model.queries == []
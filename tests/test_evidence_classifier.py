@@ -0,0 +1,44 @@
+import os
+import json
+
+import pytest
+
+from evidence_classifier import EvidenceClassifier
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "abstracts.jsonl")
+
+with open(FIXTURES, "r", encoding="utf-8") as f:
+    ABSTRACTS = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return EvidenceClassifier.from_config({})
+
+
+@pytest.mark.parametrize("abstract", ABSTRACTS, ids=[abstract["id"] for abstract in ABSTRACTS])
+def test_fixture_abstracts(classifier, abstract):
+    assessment = classifier.classify(abstract["text"])
+    assert assessment.study_type == abstract["study_type"]
+    assert assessment.evidence_level == abstract["evidence_level"]
+    assert assessment.bias_risk == abstract["bias_risk"]
+    assert assessment.bias_types == abstract["bias_types"]
+
+
+@pytest.mark.parametrize("phrase", [
+    "This was not a randomized trial",
+    "participants had not been randomized in this trial",
+    "the trial was neither randomized nor controlled",
+    "patients were not randomly assigned in the trial",
+    "the lack of randomization in this trial",
+])
+def test_negated_randomization_is_never_an_rct(classifier, phrase):
+    assessment = classifier.classify(phrase + " of CBD in 40 patients.")
+    assert assessment.study_type != "Randomized Controlled Trial"
+    assert "randomization" not in assessment.criteria_met
+    assert "selection_bias" in assessment.bias_types
+
+
+def test_classify_many_matches_classify(classifier):
+    texts = [abstract["text"] for abstract in ABSTRACTS]
+    assert classifier.classify_many(texts, workers=2) == [classifier.classify(text) for text in texts]
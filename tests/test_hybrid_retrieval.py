@@ -0,0 +1,126 @@
+import os
+import asyncio
+
+import pytest
+from langchain.embeddings.base import Embeddings
+from langchain_community.vectorstores import FAISS
+
+import hybrid_retrieval
+from hybrid_retrieval import BM25Index, HybridRetriever, load_bm25_index, reciprocal_rank_fusion, tokenize
+
+TEXTS = [
+    "CB1 receptor agonists and THC psychoactivity",
+    "Cannabidiol reduces seizure frequency in Dravet syndrome",
+    "Delta-9-THC pharmacokinetics after inhalation",
+    "Cannabidiol and anxiety in social anxiety disorder",
+    "Seizure outcomes in Lennox-Gastaut syndrome trials of cannabidiol and clobazam in children",
+]
+VOCABULARY = ["cannabidiol", "seizure", "thc", "anxiety", "receptor", "syndrome"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Counts of a few vocabulary terms, so dense rankings are predictable"""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        tokens = tokenize(text)
+        return [float(tokens.count(term)) for term in VOCABULARY]
+
+
+class RecordingReranker:
+    """Scores candidates by text length and records what it was asked to score"""
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs):
+        self.pairs.extend(pairs)
+        return [len(text) for _, text in pairs]
+
+
+@pytest.fixture
+def vectorstore():
+    return FAISS.from_texts(TEXTS, KeywordEmbeddings())
+
+
+def contents(documents):
+    return [TEXTS.index(document.page_content) for document in documents]
+
+
+def test_tokenize_keeps_scientific_terms_intact():
+    assert tokenize("CB1 and Delta-9-THC at 5-HT1A") == ["cb1", "and", "delta-9-thc", "at", "5-ht1a"]
+
+
+def test_bm25_ranks_matching_documents_and_cuts_at_k():
+    index = BM25Index.from_texts(dict(enumerate(TEXTS)))
+    ranked = index.search("cannabidiol seizure", 10)
+    assert [row for row, _ in ranked] == [1, 4, 3]
+    assert ranked[0][1] > ranked[1][1] > ranked[2][1] > 0
+    assert index.search("cannabidiol seizure", 2) == ranked[:2]
+    assert index.search("glaucoma", 5) == []
+
+
+def test_bm25_prefers_rarer_terms_and_shorter_documents():
+    index = BM25Index.from_texts({0: "thc thc", 1: "thc cbd", 2: "thc thc thc thc thc thc thc cbd"})
+    scores = dict(index.search("cbd", 3))
+    assert scores[1] > scores[2]
+    assert 0 not in scores
+
+
+def test_reciprocal_rank_fusion_order():
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 1]]) == [1, 3, 2]
+    # A row both rankings agree on beats the top row of either one
+    assert reciprocal_rank_fusion([[5, 1], [6, 1]]) == [1, 5, 6]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_retrieve_fuses_dense_and_lexical_and_honours_retrieval_k(tmp_path, vectorstore):
+    vectorstore.save_local(str(tmp_path))
+    retriever = HybridRetriever.from_config(
+        vectorstore, str(tmp_path), {"retrieval_k": 2, "hybrid": {"candidate_k": 5}}
+    )
+    documents = retriever.retrieve("cannabidiol seizure frequency")
+    assert contents(documents) == [1, 4]
+    assert contents(retriever.retrieve("cannabidiol seizure frequency", k=4))[:2] == [1, 4]
+
+
+def test_async_retrieve_matches_sync(vectorstore):
+    retriever = HybridRetriever(vectorstore, BM25Index.from_texts(dict(enumerate(TEXTS))), k=3, candidate_k=5)
+    assert asyncio.run(retriever.aretrieve("cb1 receptor thc")) == retriever.retrieve("cb1 receptor thc")
+
+
+def test_reranker_scores_only_top_n(vectorstore):
+    reranker = RecordingReranker()
+    bm25 = BM25Index.from_texts(dict(enumerate(TEXTS)))
+    retriever = HybridRetriever(vectorstore, bm25, k=4, candidate_k=5, reranker=reranker, rerank_top_n=2)
+    fused = reciprocal_rank_fusion([retriever._dense_rows("cannabidiol seizure"),
+                                    [row for row, _ in bm25.search("cannabidiol seizure", 5)]])
+
+    documents = retriever.retrieve("cannabidiol seizure")
+    assert len(reranker.pairs) == 2
+    assert [TEXTS.index(text) for _, text in reranker.pairs] == fused[:2]
+    # The longer of the two reranked chunks comes first, the rest keep their fused order
+    assert contents(documents) == sorted(fused[:2], key=lambda row: len(TEXTS[row]), reverse=True) + fused[2:4]
+
+
+def test_bm25_index_is_persisted_and_rebuilt_when_stale(tmp_path, vectorstore, monkeypatch):
+    vectorstore.save_local(str(tmp_path))
+    built = load_bm25_index(str(tmp_path), vectorstore)
+    assert os.path.exists(tmp_path / hybrid_retrieval.BM25_FILE)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("rebuilt a fresh BM25 index")
+
+    monkeypatch.setattr(BM25Index, "from_texts", classmethod(fail))
+    loaded = load_bm25_index(str(tmp_path), vectorstore)
+    assert loaded.postings == built.postings
+    assert loaded.doc_lengths == built.doc_lengths
+    monkeypatch.undo()
+
+    docstore = tmp_path / hybrid_retrieval.DOCSTORE_FILE
+    bm25_mtime = os.path.getmtime(tmp_path / hybrid_retrieval.BM25_FILE)
+    os.utime(docstore, (bm25_mtime + 10, bm25_mtime + 10))
+    vectorstore.add_texts(["Cannabigerol and glaucoma"])
+    assert load_bm25_index(str(tmp_path), vectorstore).search("glaucoma", 1)[0][0] == len(TEXTS)
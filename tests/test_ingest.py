@@ -0,0 +1,67 @@
+import os
+import hashlib
+
+import faiss
+import pytest
+from langchain.embeddings.base import Embeddings
+
+import ingest
+import vector_index
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic 16-dimensional vectors derived from the text"""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [byte / 255 for byte in digest[:16]]
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "create_embeddings", lambda spec: HashEmbeddings())
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for i in range(20):
+        (data_dir / f"doc{i}.txt").write_text(f"Cannabidiol study number {i} on seizure frequency.")
+    (tmp_path / "rag" / "vectorstore").mkdir(parents=True)
+    return tmp_path
+
+
+def ingestor(agent_path, index_config):
+    config = {"rag": {"offline": True, "index": index_config}}
+    return ingest.VectorstoreIngestor(str(agent_path), config, offline=True)
+
+
+def test_small_corpus_falls_back_to_hnsw(corpus):
+    index_config = {"type": "ivf_pq", "pq_m": 4, "pq_nbits": 8}
+    stats = ingestor(corpus, index_config).run(str(corpus / "data"))
+    assert stats["chunks"] == 20
+
+    vectorstore_path = str(corpus / "rag" / "vectorstore")
+    index = vector_index.read_index(vectorstore_path, index_config)
+    assert isinstance(index, faiss.IndexHNSW)
+    assert index.ntotal == 20
+    assert index.hnsw.efSearch == 64
+
+
+def test_failed_training_leaves_previous_index_in_place(corpus, monkeypatch):
+    index_config = {"type": "hnsw"}
+    ingestor(corpus, index_config).run(str(corpus / "data"))
+    vectorstore_path = corpus / "rag" / "vectorstore"
+    before = {name: os.path.getmtime(vectorstore_path / name) for name in os.listdir(vectorstore_path)}
+
+    def fail(flat_index, config):
+        raise RuntimeError("training failed")
+
+    monkeypatch.setattr(ingest, "train_ann_index", fail)
+    (corpus / "data" / "doc20.txt").write_text("A new document about THC.")
+    with pytest.raises(RuntimeError):
+        ingestor(corpus, index_config).run(str(corpus / "data"), rebuild=True)
+
+    after = {name: os.path.getmtime(vectorstore_path / name) for name in os.listdir(vectorstore_path)}
+    assert after == before
+    assert "doc20.txt" not in ingest.load_manifest(str(vectorstore_path))["documents"]
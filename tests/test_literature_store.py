@@ -0,0 +1,45 @@
+import pytest
+
+from literature_store import LiteratureStore
+
+RECORDS = [
+    {"pmid": "1", "year": 2020, "title": "Purified compound for Dravet syndrome",
+     "mesh_terms": ["Cannabidiol", "Seizures"], "study_type": "randomized_controlled_trial"},
+    {"pmid": "2", "year": 2021, "title": "CBD in epilepsy", "mesh_terms": []},
+    {"pmid": "3", "year": 2021, "title": "THC for epilepsy", "mesh_terms": ["Dronabinol"]},
+    {"pmid": "4", "year": 2022, "title": "Cannabidiol and anxiety", "mesh_terms": ["Cannabidiol", "Anxiety"]},
+    {"pmid": "5", "year": 2022, "title": "Medical marijuana dispensaries", "mesh_terms": ["Medical Marijuana"]},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    literature = LiteratureStore(str(tmp_path / "literature"))
+    assert literature.append(RECORDS) == len(RECORDS)
+    return literature
+
+
+def pmids(store, topic, **kwargs):
+    return sorted(store.pmids[store.match(topic, **kwargs)])
+
+
+def test_compound_and_condition_synonyms_are_expanded(store):
+    assert pmids(store, "CBD epilepsy") == ["1", "2"]
+    assert pmids(store, "CBD epilepsy", synonyms=False) == ["2"]
+    assert pmids(store, "cannabidiol seizures") == ["1", "2"]
+
+
+def test_other_compounds_stay_distinct(store):
+    assert pmids(store, "dronabinol epilepsy") == ["3"]
+    assert pmids(store, "cannabis dispensaries") == ["5"]
+
+
+def test_plain_words_still_have_to_match(store):
+    assert pmids(store, "CBD anxiety") == ["4"]
+    assert pmids(store, "CBD purified") == ["1"]
+    assert pmids(store, "CBD glaucoma") == []
+
+
+def test_append_skips_known_pmids(store):
+    assert store.append(RECORDS[:2]) == 0
+    assert len(store) == len(RECORDS)
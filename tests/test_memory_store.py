@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+import memory_store
+from memory_store import SQLiteMemoryBackend, UserMemoryStore
+
+
+def summarize(summary, messages):
+    return " | ".join(filter(None, [summary] + [message.content for message in messages]))
+
+
+def make(tmp_path, window_size=2, **kwargs):
+    backend = SQLiteMemoryBackend(str(tmp_path / "memory.sqlite"), window_size * 2)
+    return UserMemoryStore(window_size=window_size, backend=backend, **kwargs)
+
+
+def contents(memory):
+    return [message.content for message in memory.chat_memory.messages]
+
+
+def test_window_keeps_the_latest_turns(tmp_path):
+    store = make(tmp_path)
+    for turn in range(3):
+        store.add_turn("alice", f"q{turn}", f"a{turn}")
+    assert contents(store.get("alice")) == ["q1", "a1", "q2", "a2"]
+    assert contents(make(tmp_path).get("alice")) == ["q1", "a1", "q2", "a2"]
+
+
+def test_least_recently_used_memory_is_evicted(tmp_path):
+    store = make(tmp_path, max_users=2)
+    store.get("alice")
+    store.get("bob")
+    store.get("alice")
+    store.get("carol")
+    assert set(store._entries) == {"alice", "carol"}
+    assert store.stats() == {"cached_users": 2, "evictions": 1}
+
+
+def test_idle_memories_expire(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(memory_store.time, "monotonic", lambda: clock[0])
+    store = make(tmp_path, idle_ttl=60)
+    store.get("alice")
+    clock[0] += 30
+    store.get("bob")
+    clock[0] += 45
+    store.get("carol")
+    assert set(store._entries) == {"bob", "carol"}
+    assert store.evictions == 1
+
+
+def test_memory_reloads_when_another_writer_appends(tmp_path):
+    first, second = make(tmp_path), make(tmp_path)
+    first.add_turn("alice", "q0", "a0")
+    cached = first.get("alice")
+    assert first.get("alice") is cached
+
+    second.add_turn("alice", "q1", "a1")
+    reloaded = first.get("alice")
+    assert reloaded is not cached
+    assert contents(reloaded) == ["q0", "a0", "q1", "a1"]
+
+
+def test_summary_of_evicted_turns_is_persisted(tmp_path):
+    store = make(tmp_path, window_size=1, summarizer=summarize)
+    for turn in range(3):
+        store.add_turn("alice", f"q{turn}", f"a{turn}")
+    assert store.summary("alice") == "q0 | a0 | q1 | a1"
+
+    reopened = make(tmp_path, window_size=1, summarizer=summarize)
+    assert contents(reopened.get("alice")) == ["q2", "a2"]
+    assert reopened.summary("alice") == "q0 | a0 | q1 | a1"
+
+
+def test_clear_removes_memory_and_backend_history(tmp_path):
+    store = make(tmp_path, summarizer=summarize)
+    store.add_turn("alice", "q0", "a0")
+    store.clear("alice")
+    assert "alice" not in store
+    assert make(tmp_path).peek("alice") is None
+
+
+def test_async_methods_match_sync_ones(tmp_path):
+    store = make(tmp_path, summarizer=summarize)
+
+    async def run():
+        await store.aadd_turn("alice", "q0", "a0")
+        memory = await store.aget("alice")
+        await store.aclear("bob")
+        return contents(memory)
+
+    assert asyncio.run(run()) == ["q0", "a0"]
+    assert contents(make(tmp_path).get("alice")) == ["q0", "a0"]
+
+
+@pytest.mark.parametrize("length", [10, 5000])
+def test_long_messages_round_trip_compressed(tmp_path, length):
+    store = make(tmp_path)
+    store.add_turn("alice", "q" * length, "a" * length)
+    assert contents(make(tmp_path).get("alice")) == ["q" * length, "a" * length]
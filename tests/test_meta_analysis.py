@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pytest
+
+from meta_analysis import Pooled, Studies, bootstrap, leave_one_out, parse_studies, pool, synthesize
+
+EFFECTS = np.array([0.2, 0.5, 0.8, 0.35])
+VARIANCES = np.array([0.04, 0.02, 0.05, 0.03])
+
+
+def dersimonian_laird(y, v):
+    w = 1 / v
+    fixed = (w @ y) / w.sum()
+    q = (w * (y - fixed) ** 2).sum()
+    tau2 = max(0.0, (q - (len(y) - 1)) / (w.sum() - (w ** 2).sum() / w.sum()))
+    w_star = 1 / (v + tau2)
+    return (w_star @ y) / w_star.sum(), tau2
+
+
+def test_dersimonian_laird_matches_the_closed_form():
+    expected, expected_tau2 = dersimonian_laird(EFFECTS, VARIANCES)
+    pooled = pool(EFFECTS, VARIANCES, method="DL")
+    assert pooled.estimate[0] == pytest.approx(expected)
+    assert pooled.tau2[0] == pytest.approx(expected_tau2)
+
+
+def test_leave_one_out_rows_match_pooling_the_subsets():
+    rows = leave_one_out(EFFECTS, VARIANCES, method="REML")
+    for i in range(len(EFFECTS)):
+        keep = np.arange(len(EFFECTS)) != i
+        assert rows.estimate[i] == pytest.approx(pool(EFFECTS[keep], VARIANCES[keep]).estimate[0])
+
+
+def test_bootstrap_is_reproducible_for_a_seed():
+    assert bootstrap(EFFECTS, VARIANCES, replicates=200, seed=3) == bootstrap(EFFECTS, VARIANCES, replicates=200, seed=3)
+
+
+def test_synthesize_from_tool_input():
+    studies = parse_studies(json.dumps([
+        {"label": "A", "effect": 0.2, "se": 0.2, "n": 50, "subgroup": {"dose": "low"}},
+        {"label": "B", "effect": 0.5, "variance": 0.02, "n": 80, "subgroup": {"dose": "high"}},
+        {"label": "C", "effect": 0.8, "ci_lower": 0.36, "ci_upper": 1.24, "n": 40, "subgroup": {"dose": "high"}},
+    ]))
+    result = synthesize(studies, bootstrap_replicates=100, seed=1)
+    assert result.included_studies == 3
+    assert result.total_participants == 170
+    assert [finding.omitted for finding in result.sensitivity] == ["A", "B", "C"]
+
+
+def test_internal_records_are_slotted():
+    assert not hasattr(parse_studies('[{"effect": 0.1, "se": 0.1}]'), "__dict__")
+    assert not hasattr(pool(EFFECTS, VARIANCES), "__dict__")
+    assert Studies.__slots__ == ("labels", "effects", "variances", "participants", "subgroups")
+    assert "interval" in dir(Pooled)
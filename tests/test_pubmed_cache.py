@@ -0,0 +1,74 @@
+import sqlite3
+
+from pubmed_cache import PubMedCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return PubMedCache(str(tmp_path / "pubmed.sqlite"), **kwargs)
+
+
+def record(pmid, padding=0):
+    return {"pmid": pmid, "title": "x" * padding}
+
+
+def test_round_trip_and_normalized_queries(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_search("CBD  Epilepsy", 10, {"count": 2, "pmids": ["1", "2"]})
+    cache.put_records([record("1"), record("2")])
+
+    assert cache.get_search("cbd epilepsy", 10) == {"count": 2, "pmids": ["1", "2"]}
+    assert cache.get_search("cbd epilepsy", 20) is None
+    assert set(cache.get_records(["1", "2", "3"])) == {"1", "2"}
+
+
+def test_reads_do_not_take_the_write_lock(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_records([record("1")])
+
+    writer = sqlite3.connect(cache.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        assert set(cache.get_records(["1", "2"])) == {"1"}
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_buffered_access_times_drive_lru_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put_records([record("1")])
+    cache.put_records([record("2")])
+    cache.get_records(["1"])
+    cache.put_records([record("3")])
+
+    assert set(cache.get_records(["1", "2", "3"])) == {"1", "3"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_running_totals_track_replacements_and_byte_limit(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_records([record("1", 100), record("2", 100)])
+    cache.put_records([record("1", 10)])
+
+    stats = cache.stats()
+    conn = sqlite3.connect(cache.path)
+    assert (stats["entries"], stats["bytes"]) == conn.execute(
+        "SELECT COUNT(*), SUM(size) FROM entries"
+    ).fetchone()
+
+    cache.max_bytes = stats["bytes"] - 1
+    cache.put_records([record("3")])
+    assert "2" not in cache.get_records(["2"])
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_clear_resets_totals(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_records([record("1")])
+    cache.get_records(["1"])
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "bytes": 0}
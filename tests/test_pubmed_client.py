@@ -0,0 +1,159 @@
+"""PubMedClient against a local stand-in for the E-utilities server"""
+
+import asyncio
+import contextlib
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from pubmed_client import PubMedClient
+
+EFETCH_XML = """<?xml version="1.0"?>
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation>
+      <PMID>101</PMID>
+      <Article>
+        <Journal><Title>Epilepsia</Title><JournalIssue><PubDate><Year>2018</Year></PubDate></JournalIssue></Journal>
+        <ArticleTitle>Cannabidiol in Dravet syndrome</ArticleTitle>
+        <Abstract><AbstractText Label="RESULTS">Seizure frequency fell.</AbstractText></Abstract>
+        <AuthorList><Author><LastName>Devinsky</LastName><Initials>O</Initials></Author></AuthorList>
+        <PublicationTypeList><PublicationType>Randomized Controlled Trial</PublicationType></PublicationTypeList>
+      </Article>
+      <MedlineJournalInfo><Country>United States</Country></MedlineJournalInfo>
+      <MeshHeadingList><MeshHeading><DescriptorName>Cannabidiol</DescriptorName></MeshHeading></MeshHeadingList>
+    </MedlineCitation>
+  </PubmedArticle>
+</PubmedArticleSet>
+"""
+
+
+class StandIn:
+    """E-utilities stand-in whose next responses can be scripted per endpoint"""
+
+    def __init__(self):
+        self.calls = {"esearch.fcgi": 0, "efetch.fcgi": 0}
+        # endpoint -> list of actions for successive calls: an HTTP status, or ("sleep", seconds)
+        self.script = {"esearch.fcgi": [], "efetch.fcgi": []}
+        self.received = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info["endpoint"]
+        self.calls[endpoint] += 1
+        self.received.append(dict(await request.post()))
+        action = self.script[endpoint].pop(0) if self.script[endpoint] else 200
+        if isinstance(action, tuple):
+            await asyncio.sleep(action[1])
+        elif action != 200:
+            return web.Response(status=action, text="scripted failure")
+        if endpoint == "esearch.fcgi":
+            return web.Response(text=json.dumps({"esearchresult": {"count": "1", "idlist": ["101"]}}))
+        return web.Response(text=EFETCH_XML, content_type="text/xml")
+
+
+@contextlib.asynccontextmanager
+async def serve(stand_in: StandIn):
+    app = web.Application()
+    app.router.add_post("/{endpoint}", stand_in.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}/"
+    finally:
+        await runner.cleanup()
+
+
+def run(scenario):
+    """Run scenario(client, stand_in) against a fresh server and client"""
+    async def main():
+        stand_in = StandIn()
+        async with serve(stand_in) as base_url:
+            client = PubMedClient(base_url=base_url, rate_limit=1000, burst=10, max_connections=1,
+                                  timeout=0.5, max_retries=2, retry_backoff=0.01, tool="tests")
+            try:
+                return await scenario(client, stand_in)
+            finally:
+                await client._aclose()
+    return asyncio.run(main())
+
+
+def test_search_parses_records():
+    async def scenario(client, stand_in):
+        return await client.search("cannabidiol epilepsy")
+
+    result = run(scenario)
+    assert result["total_results"] == 1
+    record = result["top_results"][0]
+    assert record["pmid"] == "101"
+    assert record["study_type"] == "randomized_controlled_trial"
+    assert record["country"] == "United States"
+    assert record["mesh_terms"] == ["Cannabidiol"]
+    assert record["abstract"] == "Results: Seizure frequency fell."
+
+
+def test_transient_status_is_retried():
+    async def scenario(client, stand_in):
+        stand_in.script["esearch.fcgi"] = [503, 429]
+        found = await client.esearch("cbd")
+        return found, stand_in.calls["esearch.fcgi"]
+
+    found, calls = run(scenario)
+    assert found["pmids"] == ["101"]
+    assert calls == 3
+
+
+def test_timeout_is_retried():
+    async def scenario(client, stand_in):
+        stand_in.script["esearch.fcgi"] = [("sleep", 1.0)]
+        found = await client.esearch("cbd")
+        return found, stand_in.calls["esearch.fcgi"]
+
+    found, calls = run(scenario)
+    assert found["count"] == 1
+    assert calls == 2
+
+
+def test_error_status_raises_and_releases_the_connection():
+    async def scenario(client, stand_in):
+        stand_in.script["esearch.fcgi"] = [400]
+        with pytest.raises(aiohttp.ClientResponseError) as error:
+            await client.esearch("cbd")
+        assert error.value.status == 400
+        # With a single pooled connection this only completes if the failed response was released
+        return await asyncio.wait_for(client.esearch("cbd"), 2)
+
+    assert run(scenario)["pmids"] == ["101"]
+
+
+def test_connection_errors_are_retried_then_raised():
+    async def scenario(client, stand_in):
+        client.base_url = "http://127.0.0.1:9/"
+        attempts = []
+        acquire = client.bucket.acquire
+
+        async def counting_acquire():
+            attempts.append(1)
+            await acquire()
+
+        client.bucket.acquire = counting_acquire
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await client.esearch("cbd")
+        return len(attempts)
+
+    assert run(scenario) == 3
+
+
+def test_common_parameters_are_sent():
+    async def scenario(client, stand_in):
+        await client.esearch("cbd")
+        return stand_in.received[0]
+
+    sent = run(scenario)
+    assert sent["db"] == "pubmed"
+    assert sent["tool"] == "tests"
+    assert sent["term"] == "cbd"
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import XSD
+
+import rdf_compile
+
+EX = Namespace("http://example.org/science#")
+TURTLE = """@prefix ex: <http://example.org/science#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+ex:cbd a ex:Compound ;
+    rdfs:label "Cannabidiol" , "Cannabidiol"@en , "Cannabidiol"@de-AT ;
+    ex:molecularWeight "314.46"^^xsd:decimal ;
+    ex:approved true ;
+    ex:trials 42 ;
+    ex:note "line one\\nline two \\"quoted\\" ✓" ;
+    ex:conditions ( "epilepsy" "Dravet syndrome"@en ex:lgs ) ;
+    ex:source [ ex:pmid "28538134" ] .
+"""
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(__file__), "..", "rag", "knowledge_base.ttl")
+
+
+def compiled(tmp_path, graph):
+    path = str(tmp_path / "knowledge_base.skb")
+    rdf_compile.compile_graph(graph, path)
+    return path, rdf_compile.load_graph(path)
+
+
+def test_round_trip_keeps_triples_lists_and_literal_types(tmp_path):
+    graph = Graph().parse(data=TURTLE, format="turtle")
+    _, loaded = compiled(tmp_path, graph)
+
+    assert set(loaded) == set(graph)
+    members = list(Collection(loaded, loaded.value(EX.cbd, EX.conditions)))
+    assert members == [Literal("epilepsy"), Literal("Dravet syndrome", lang="en"), EX.lgs]
+
+    label = URIRef("http://www.w3.org/2000/01/rdf-schema#label")
+    kinds = lambda g: {(term.language, term.datatype) for term in g.objects(EX.cbd, label)}
+    assert kinds(loaded) == kinds(graph)
+    assert len(kinds(loaded)) == 3
+    weight = loaded.value(EX.cbd, EX.molecularWeight)
+    assert weight.datatype == XSD.decimal and str(weight) == "314.46"
+    assert loaded.value(EX.cbd, EX.trials).toPython() == 42
+    assert loaded.value(EX.cbd, EX.approved).toPython() is True
+    assert str(loaded.value(EX.cbd, EX.note)) == 'line one\nline two "quoted" ✓'
+    assert dict(loaded.namespaces())["ex"] == URIRef(str(EX))
+
+
+def test_round_trip_of_the_shipped_knowledge_base(tmp_path):
+    graph = rdf_compile.parse_sources([KNOWLEDGE_BASE])
+    _, loaded = compiled(tmp_path, graph)
+    assert len(loaded) == len(graph)
+    assert set(loaded) == set(graph)
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "knowledge_base.skb"
+    path.write_bytes(b"NOPE" + b"\x00" * 32)
+    with pytest.raises(ValueError):
+        rdf_compile.load_graph(str(path))
+
+
+def test_is_fresh_turns_false_after_touching_a_source(tmp_path):
+    source = tmp_path / "knowledge_base.ttl"
+    source.write_text(TURTLE)
+    path = str(tmp_path / "knowledge_base.skb")
+    assert not rdf_compile.is_fresh(path, [str(source)])
+
+    rdf_compile.compile_graph(rdf_compile.parse_sources([str(source)]), path)
+    assert rdf_compile.is_fresh(path, [str(source)])
+
+    compiled_mtime = os.path.getmtime(path)
+    os.utime(source, (compiled_mtime + 5, compiled_mtime + 5))
+    assert not rdf_compile.is_fresh(path, [str(source)])
@@ -0,0 +1,55 @@
+import asyncio
+
+import numpy as np
+
+from response_cache import ResponseCache
+
+
+class BagOfWordsEmbeddings:
+    """Question vectors that ignore compound names, so CBD and THC questions look identical"""
+
+    VOCABULARY = ["does", "help", "epilepsy", "seizures", "pain", "reduce", "anxiety"]
+
+    def embed_query(self, text):
+        words = text.casefold().replace("?", "").split()
+        return [float(words.count(word)) for word in self.VOCABULARY]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_similar_question_about_another_compound_is_a_miss():
+    cache = ResponseCache(BagOfWordsEmbeddings(), similarity_threshold=0.95)
+    run(cache.store("Does CBD help epilepsy?", {"output": "cbd answer"}))
+
+    assert run(cache.lookup("Does THC help epilepsy?")) is None
+    assert run(cache.lookup("Does cannabidiol help epilepsy")) == {"output": "cbd answer"}
+    assert cache.stats()["semantic_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_similar_question_about_another_condition_is_a_miss():
+    cache = ResponseCache(BagOfWordsEmbeddings(), similarity_threshold=0.9)
+    run(cache.store("Does CBD help anxiety?", {"output": "anxiety"}))
+    assert run(cache.lookup("Does CBD help pain anxiety")) is None
+
+
+def test_matrix_rows_are_reused_after_eviction():
+    cache = ResponseCache(BagOfWordsEmbeddings(), max_entries=2)
+    run(cache.store("Does CBD help epilepsy?", {"output": "1"}))
+    run(cache.store("Does CBD reduce pain?", {"output": "2"}))
+    run(cache.store("Does CBD reduce anxiety?", {"output": "3"}))
+
+    assert cache.stats()["entries"] == 2
+    assert len(cache._matrix_keys) == 2
+    assert run(cache.lookup("does cbd help epilepsy seizures")) is None
+    assert run(cache.lookup("CBD reduce anxiety does")) == {"output": "3"}
+
+
+def test_version_change_drops_entries():
+    cache = ResponseCache(BagOfWordsEmbeddings(), version="a")
+    run(cache.store("Does CBD help epilepsy?", {"output": "1"}))
+    cache.set_version("b")
+    assert run(cache.lookup("Does CBD help epilepsy?")) is None
+    assert cache._matrix is None
@@ -0,0 +1,187 @@
+import os
+import json
+import asyncio
+
+import numpy as np
+import pytest
+
+from baseline_runner import BaselineRunner
+from response_evaluator import ResponseEvaluator
+
+BASELINE = os.path.join(os.path.dirname(__file__), "..", "baseline.json")
+
+
+def baseline_score(question, response):
+    """The per-response scoring ScienceAgent._evaluate_baseline_response did before ResponseEvaluator"""
+    expected_keywords = question.get("keywords", [])
+    response_lower = response.lower()
+    keyword_matches = sum(1 for keyword in expected_keywords if keyword.lower() in response_lower)
+    keyword_score = keyword_matches / len(expected_keywords) if expected_keywords else 0.5
+    science_terms = ["study", "research", "evidence", "clinical", "trial", "analysis"]
+    science_score = sum(1 for term in science_terms if term in response_lower) / len(science_terms)
+    length_score = min(len(response) / 200, 1.0)
+    overall_score = keyword_score * 0.4 + science_score * 0.4 + length_score * 0.2
+    return {
+        "passed": overall_score >= 0.6,
+        "confidence": overall_score,
+        "keyword_matches": keyword_matches,
+        "total_keywords": len(expected_keywords),
+        "science_relevance": science_score,
+        "response_length": len(response),
+    }
+
+
+def assert_matches_baseline(evaluation, question, response):
+    expected = baseline_score(question, response)
+    assert evaluation["confidence"] == pytest.approx(expected.pop("confidence"))
+    assert evaluation["science_relevance"] == pytest.approx(expected.pop("science_relevance"))
+    assert {key: evaluation[key] for key in expected} == expected
+
+
+def responses_for(question):
+    keywords = question.get("keywords", [])
+    return [
+        question.get("expected_answer", ""),
+        question["question"],
+        " and ".join(keyword.upper() for keyword in keywords[::2]),
+        "",
+        "A randomized clinical trial and a meta-analysis of the research found little evidence. " * 3,
+    ]
+
+
+class BagOfWordsEmbeddings:
+    """Deterministic embeddings: word counts hashed into a small vector"""
+
+    def __init__(self, size=32):
+        self.size = size
+        self.documents = 0
+
+    def embed_query(self, text):
+        vector = np.zeros(self.size)
+        for word in text.lower().split():
+            vector[sum(map(ord, word)) % self.size] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return [self.embed_query(text) for text in texts]
+
+
+@pytest.fixture(scope="module")
+def baseline_questions():
+    with open(BASELINE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_evaluate_many_matches_baseline_scores(baseline_questions):
+    evaluator = ResponseEvaluator(baseline_questions)
+    questions = [question for question in baseline_questions for _ in responses_for(question)]
+    responses = [response for question in baseline_questions for response in responses_for(question)]
+
+    evaluations = evaluator.evaluate_many(questions, responses)
+    assert len(evaluations) == len(responses)
+    for evaluation, question, response in zip(evaluations, questions, responses):
+        assert_matches_baseline(evaluation, question, response)
+    assert any(evaluation["passed"] for evaluation in evaluations)
+    assert not all(evaluation["passed"] for evaluation in evaluations)
+
+
+def test_duplicated_keywords_count_twice():
+    question = {"id": "dup", "question": "Does CBD help pain?", "keywords": ["CBD", "cbd", "pain", "sleep"]}
+    evaluator = ResponseEvaluator([question])
+
+    evaluation = evaluator.evaluate(question, "CBD may ease pain")
+    assert evaluation["keyword_matches"] == 3
+    assert evaluation["total_keywords"] == 4
+    assert_matches_baseline(evaluation, question, "CBD may ease pain")
+
+
+def test_questions_without_keywords_score_half_on_keywords(baseline_questions):
+    bare = {"id": "bare", "question": "Is there evidence for CBD?"}
+    evaluator = ResponseEvaluator(baseline_questions + [bare])
+    response = "Some clinical research exists."
+
+    evaluation, keyworded = evaluator.evaluate_many([bare, baseline_questions[0]], [response, response])
+    assert evaluation["total_keywords"] == 0
+    assert evaluation["confidence"] == pytest.approx(0.5 * 0.4 + 2 / 6 * 0.4 + len(response) / 200 * 0.2)
+    assert_matches_baseline(evaluation, bare, response)
+    assert_matches_baseline(keyworded, baseline_questions[0], response)
+
+
+def test_similarity_falls_back_to_the_baseline_score_when_nan(baseline_questions):
+    no_expected = {"id": "open", "question": "What is left to study?", "keywords": ["study"]}
+    embeddings = BagOfWordsEmbeddings()
+    evaluator = ResponseEvaluator(baseline_questions + [no_expected], embeddings=embeddings, similarity_weight=0.5)
+    question = baseline_questions[0]
+    questions = [question, question, no_expected]
+    responses = [question["expected_answer"], "", "Nobody has run a study yet."]
+
+    scored, empty, unanswerable = evaluator.evaluate_many(questions, responses)
+    assert scored["similarity"] == pytest.approx(1.0)
+    assert scored["confidence"] == pytest.approx(
+        0.5 * baseline_score(question, responses[0])["confidence"] + 0.5 * scored["similarity"]
+    )
+    # No response to embed, or no expected answer to compare with: similarity is NaN and left out
+    assert "similarity" not in empty and "similarity" not in unanswerable
+    assert_matches_baseline(empty, question, "")
+    assert_matches_baseline(unanswerable, no_expected, responses[2])
+    assert embeddings.documents == 1
+
+
+def test_run_scores_jsonl_transcripts(tmp_path, baseline_questions):
+    first, second = baseline_questions[:2]
+    records = [
+        {"question_id": first["id"], "trial": 0, "response": first["expected_answer"]},
+        {"question_id": first["id"], "trial": 1, "actual": "", "error": "timed out"},
+        {"question_id": second["id"], "trial": 0, "response": second["question"]},
+        {"question_id": "inline", "response": "CBD study", "keywords": ["CBD", "THC"]},
+        {"question_id": "missing", "response": "Unscored"},
+    ]
+    transcripts = tmp_path / "transcripts.jsonl"
+    transcripts.write_text("".join(json.dumps(record) + "\n" for record in records))
+    evaluator = ResponseEvaluator(baseline_questions, batch_size=2)
+
+    summary = evaluator.run(str(transcripts), str(tmp_path / "scored" / "scored.jsonl"))
+    assert summary["transcripts"] == 4
+    assert summary["unknown_questions"] == 1
+    scored = [json.loads(line) for line in (tmp_path / "scored" / "scored.jsonl").read_text().splitlines()]
+    assert [record["question_id"] for record in scored] == [first["id"], first["id"], second["id"], "inline"]
+    assert_matches_baseline(scored[0], first, first["expected_answer"])
+    assert_matches_baseline(scored[2], second, second["question"])
+    assert_matches_baseline(scored[3], {"keywords": ["CBD", "THC"]}, "CBD study")
+    # A transcript with an error never passes
+    assert scored[1]["passed"] is False and scored[1]["error"] == "timed out"
+    assert summary["questions"][first["id"]]["runs"] == 2
+    assert summary["pass_rate"] == sum(record["passed"] for record in scored) / 4
+
+
+class ExpectedAnswerAgent:
+    """Answers every baseline question with its expected answer and scores it the baseline way"""
+
+    def __init__(self, questions):
+        self.answers = {question["question"]: question["expected_answer"] for question in questions}
+
+    async def process_query(self, user_id, query, context=None, use_cache=True):
+        return {"response": self.answers[query]}
+
+    async def _evaluate_baseline_response(self, question, response):
+        return baseline_score(question, response)
+
+    async def aclear_user_memory(self, user_id):
+        pass
+
+
+def test_run_rescores_a_baseline_runner_report(tmp_path, baseline_questions):
+    report = asyncio.run(BaselineRunner(ExpectedAnswerAgent(baseline_questions), trials=2).run(baseline_questions))
+    report_path = tmp_path / "report.json"
+    report_path.write_text(json.dumps(report))
+
+    summary = ResponseEvaluator(baseline_questions).run(str(report_path))
+    assert summary["transcripts"] == 2 * len(baseline_questions)
+    assert summary["unknown_questions"] == 0
+    assert summary["pass_rate"] == report["summary"]["pass_rate"]
+    for question in report["questions"]:
+        rescored = summary["questions"][question["question_id"]]
+        assert rescored["runs"] == 2
+        assert rescored["confidence"] == pytest.approx(question["confidence"])
+        assert rescored["pass_rate"] == question["pass_rate"]
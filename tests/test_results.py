@@ -0,0 +1,53 @@
+import json
+import pickle
+
+import pytest
+
+from results import (
+    ClaimValidation, EfficacyOutcome, Heterogeneity, LeaveOneOutResult, MetaAnalysisSynthesis,
+    PubMedSearchResult, serialize, to_native
+)
+
+
+def synthesis():
+    return MetaAnalysisSynthesis(
+        analysis_type="Random-effects",
+        included_studies=2,
+        total_participants=200,
+        efficacy=EfficacyOutcome(0.4, "0.20 to 0.60", 0.001, "Small effect"),
+        heterogeneity=Heterogeneity(12.5, "Low heterogeneity between studies"),
+        sensitivity=[
+            LeaveOneOutResult("Trial 1", 0.35, "0.10 to 0.60", 0.0),
+            LeaveOneOutResult("Trial 2", 0.45, "0.20 to 0.70", 0.0),
+        ],
+    )
+
+
+def test_results_are_slotted_with_defaults_intact():
+    claim = ClaimValidation("CBD reduces seizures")
+    assert not hasattr(claim, "__dict__")
+    assert claim.supporting_studies == []
+    assert ClaimValidation("x").supporting_studies is not claim.supporting_studies
+    with pytest.raises(AttributeError):
+        claim.unknown = 1
+
+
+def test_results_pickle_and_compare():
+    result = synthesis()
+    assert pickle.loads(pickle.dumps(result)) == result
+
+
+def test_serialize_drops_empty_fields_and_tabulates_records():
+    data = json.loads(serialize(synthesis()))
+    assert "safety" not in data and "limitations" not in data
+    assert data["sensitivity"]["columns"] == ["omitted", "effect_size", "confidence_interval", "i_squared"]
+    assert data["sensitivity"]["rows"][1] == ["Trial 2", 0.45, "0.20 to 0.70", 0.0]
+    assert to_native(synthesis())["safety"] is None
+
+
+def test_search_result_from_client_dict():
+    result = PubMedSearchResult.from_dict({
+        "total_results": 1, "search_query": "cbd",
+        "top_results": [{"pmid": "1", "title": "Cannabidiol trial"}],
+    })
+    assert result.top_results[0].title == "Cannabidiol trial"
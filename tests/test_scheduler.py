@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from scheduler import AdmissionScheduler, SchedulerOverloaded
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def hold(scheduler, user_id, entered, release):
+    async with scheduler.admit(user_id):
+        entered.append(user_id)
+        await release.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def assert_idle(scheduler):
+    stats = scheduler.stats()
+    assert (stats["in_flight"], stats["queued"], stats["active_users"]) == (0, 0, 0)
+
+
+async def full_capacity(scheduler, users):
+    """Every user can be admitted at once, so no slot has leaked"""
+    entered, release = [], asyncio.Event()
+    tasks = [asyncio.create_task(hold(scheduler, user, entered, release)) for user in users]
+    await settle()
+    admitted = list(entered)
+    release.set()
+    await asyncio.gather(*tasks)
+    return admitted
+
+
+def test_per_user_limit_queues_the_extra_query():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrent=10, max_per_user=1)
+        entered, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(scheduler, user, entered, release)) for user in ("a", "a", "b")]
+        await settle()
+        assert sorted(entered) == ["a", "b"]
+        assert scheduler.stats()["queued"] == 1
+        release.set()
+        await asyncio.gather(*tasks)
+        assert sorted(entered) == ["a", "a", "b"]
+        assert_idle(scheduler)
+
+    run(scenario())
+
+
+def test_global_limit_queues_across_users():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrent=2, max_per_user=2)
+        entered, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(scheduler, user, entered, release)) for user in ("a", "b", "c")]
+        await settle()
+        assert entered == ["a", "b"]
+        assert scheduler.stats()["in_flight"] == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        assert scheduler.stats()["admitted_total"] == 3
+        assert_idle(scheduler)
+
+    run(scenario())
+
+
+def test_full_queue_rejects_new_queries():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrent=1, max_queue_depth=1)
+        entered, release = [], asyncio.Event()
+        tasks = []
+        for user in ("a", "b"):
+            tasks.append(asyncio.create_task(hold(scheduler, user, entered, release)))
+            await settle()
+        assert scheduler.stats()["queued"] == 1
+        with pytest.raises(SchedulerOverloaded):
+            async with scheduler.admit("c"):
+                pass
+        assert scheduler.stats()["rejected_total"] == 1
+        release.set()
+        await asyncio.gather(*tasks)
+        assert_idle(scheduler)
+
+    run(scenario())
+
+
+def test_timeout_counts_and_releases_the_waiter():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrent=1, queue_timeout=0.05)
+        entered, release = [], asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, "a", entered, release))
+        await settle()
+        with pytest.raises(SchedulerOverloaded):
+            async with scheduler.admit("b"):
+                pass
+        assert scheduler.stats()["timed_out_total"] == 1
+        assert scheduler.stats()["active_users"] == 1
+        release.set()
+        await holder
+        assert_idle(scheduler)
+        assert await full_capacity(scheduler, ["b"]) == ["b"]
+
+    run(scenario())
+
+
+def test_exception_in_the_block_releases_slots():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrent=2, max_per_user=1)
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                async with scheduler.admit("a"):
+                    raise ValueError("tool failed")
+        assert_idle(scheduler)
+        assert await full_capacity(scheduler, ["a", "b"]) == ["a", "b"]
+
+    run(scenario())
+
+
+def test_cancellation_releases_slots_while_waiting_and_while_running():
+    async def scenario():
+        scheduler = AdmissionScheduler(max_concurrent=1, max_per_user=1)
+        entered, release = [], asyncio.Event()
+        running = asyncio.create_task(hold(scheduler, "a", entered, release))
+        waiting = asyncio.create_task(hold(scheduler, "b", entered, release))
+        await settle()
+        assert entered == ["a"]
+
+        waiting.cancel()
+        running.cancel()
+        for task in (waiting, running):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert_idle(scheduler)
+        assert await full_capacity(scheduler, ["b"]) == ["b"]
+
+    run(scenario())
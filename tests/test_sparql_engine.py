@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from rdflib import Literal
+from rdflib.plugins.sparql import prepareQuery
+
+from sparql_engine import SPARQLEngine, normalize_sparql, parameterize
+
+KNOWLEDGE_BASE = os.path.join(os.path.dirname(__file__), "..", "rag", "knowledge_base.ttl")
+
+
+def engine():
+    return SPARQLEngine.from_turtle(KNOWLEDGE_BASE)
+
+
+def test_lookup_finds_rdf_list_members():
+    rows = engine().lookup("which areas list CB1 receptors as a key term")
+    assert ("Cannabinoid Pharmacology", "keyTerms", "CB1 receptors") in rows
+
+
+def test_query_results_are_cached_per_normalized_query():
+    sparql_engine = engine()
+    query = "SELECT ?s WHERE { ?s a ?type } # all typed subjects"
+    first = sparql_engine.query(query)
+    assert first
+    assert sparql_engine.query("SELECT ?s  WHERE {\n ?s a ?type }") is first
+
+    sparql_engine.reload(sparql_engine.graph)
+    assert sparql_engine.query(query) is not first
+
+
+def test_normalize_sparql_keeps_literals_and_iris():
+    query = 'SELECT * WHERE { ?s ?p "a  # b" . ?s ?q <http://x/#y> } # comment'
+    assert normalize_sparql(query) == 'SELECT * WHERE { ?s ?p "a  # b" . ?s ?q <http://x/#y> }'
+
+
+def test_queries_differing_in_a_literal_share_one_template():
+    sparql_engine = engine()
+    query = 'SELECT ?s WHERE {{ ?s rdfs:label ?label FILTER(CONTAINS(LCASE(STR(?label)), "{term}")) }}'
+    _, first, bindings = sparql_engine.prepare(query.format(term="cannabinoid"))
+    _, second, _ = sparql_engine.prepare(query.format(term="clinical"))
+    assert first is second
+    assert bindings == {"_literal0": Literal("cannabinoid")}
+
+
+@pytest.mark.parametrize("query", [
+    'SELECT ?s ?label WHERE { ?s rdfs:label ?label FILTER(CONTAINS(LCASE(STR(?label)), "pharmacology")) }',
+    'SELECT ?s WHERE { ?s rdfs:label ?label FILTER(REGEX(?label, "^cannabinoid", "i")) }',
+    r'SELECT ?s WHERE { { ?s rdfs:label "Cannabinoid Pharmacology" } UNION { ?s rdfs:label "a \"quoted\" term" } }',
+    'ASK { ?s rdfs:label "Cannabinoid Pharmacology" }',
+    'SELECT ?s WHERE { ?s rdfs:label ?label FILTER(LANG(?label) = "") } LIMIT 3',
+])
+def test_parameterized_queries_match_rdflib(query):
+    sparql_engine = engine()
+    prepared = prepareQuery(query, initNs=dict(sparql_engine.graph.namespaces()))
+    result = sparql_engine.graph.query(prepared)
+    expected = [(str(result.askAnswer),)] if result.type == "ASK" else [tuple(str(v) for v in row) for row in result]
+    assert parameterize(normalize_sparql(query))[1]
+    assert sorted(sparql_engine.query(query)) == sorted(expected)
+
+
+@pytest.mark.parametrize("query", [
+    'SELECT * WHERE { ?s rdfs:label "Cannabinoid Pharmacology" }',
+    'SELECT ?s WHERE { ?s rdfs:label ?label } VALUES ?label { "Cannabinoid Pharmacology" }',
+    'SELECT ?s WHERE { ?s ?p "3"^^<http://www.w3.org/2001/XMLSchema#integer> }',
+])
+def test_literals_that_cannot_be_variables_stay_in_the_query(query):
+    assert parameterize(query) == (query, {})
@@ -0,0 +1,77 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tool_runtime import threaded_coroutine, with_timeout
+from tracing import Tracer, annotate
+
+
+class CollectingSink:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+def tracer():
+    sink = CollectingSink()
+    return Tracer(sinks=[sink]), sink
+
+
+def test_slow_threaded_tool_times_out_without_blocking_the_loop():
+    tool_tracer, sink = tracer()
+    executor = ThreadPoolExecutor(2)
+
+    def slow_tool(tool_input):
+        time.sleep(1)
+        return "done"
+
+    wrapped = with_timeout("slow_tool", threaded_coroutine(slow_tool, executor), 0.1, tool_tracer)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        start = time.perf_counter()
+        output = await wrapped("input")
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        return output, elapsed, ticks
+
+    output, elapsed, ticks = asyncio.run(run())
+    executor.shutdown(wait=True)
+    assert output == "slow_tool timed out after 0.1s; answer from the other sources"
+    assert elapsed < 0.5
+    assert ticks >= 5
+    assert sink.spans[-1].status == "timeout"
+
+
+def test_threaded_tool_runs_off_loop_and_annotates_its_span():
+    tool_tracer, sink = tracer()
+
+    def tool(tool_input):
+        annotate(worker=threading.current_thread().name)
+        return tool_input.upper()
+
+    executor = ThreadPoolExecutor(1, thread_name_prefix="tool-test")
+    wrapped = with_timeout("echo", threaded_coroutine(tool, executor), 5, tool_tracer)
+    assert asyncio.run(wrapped("cbd")) == "CBD"
+    span = sink.spans[-1]
+    assert span.status == "ok"
+    assert span.attributes["worker"].startswith("tool-test")
+    assert span.attributes["output_chars"] == 3
+
+
+def test_tool_error_output_marks_the_span():
+    tool_tracer, sink = tracer()
+    wrapped = with_timeout("claims", threaded_coroutine(lambda text: "Claim validation error: boom"), 5, tool_tracer)
+    assert asyncio.run(wrapped("x")) == "Claim validation error: boom"
+    assert sink.spans[-1].status == "error"
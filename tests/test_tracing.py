@@ -0,0 +1,55 @@
+import json
+import threading
+
+from tracing import Tracer, annotate
+
+
+def test_disabled_jsonl_path_has_no_sinks(tmp_path):
+    assert Tracer.from_config({"jsonl_path": None}, str(tmp_path)).sinks == []
+    assert Tracer.from_config({"jsonl_path": ""}, str(tmp_path)).sinks == []
+
+
+def test_jsonl_sink_writes_one_line_per_finished_span(tmp_path):
+    tracer = Tracer.from_config({"jsonl_path": "logs/traces.jsonl"}, str(tmp_path))
+    with tracer.span("query") as root:
+        with tracer.span("pubmed_literature_search", "tool"):
+            annotate(cache_hit=True)
+
+    tracer.flush()
+    lines = (tmp_path / "logs" / "traces.jsonl").read_text().splitlines()
+    spans = [json.loads(line) for line in lines]
+    assert [span["name"] for span in spans] == ["pubmed_literature_search", "query"]
+    assert spans[0]["parent_id"] == spans[1]["span_id"]
+    assert spans[0]["attributes"] == {"cache_hit": True}
+    assert root.counts["tool"] == 1
+
+
+def test_jsonl_sink_writes_spans_off_the_calling_thread(tmp_path):
+    tracer = Tracer.from_config({"jsonl_path": "traces.jsonl"}, str(tmp_path))
+    for i in range(50):
+        with tracer.span("sparql", index=i):
+            pass
+    sink = tracer.sinks[0]
+    assert sink._writer.is_alive() and sink._writer is not threading.current_thread()
+
+    sink.close()
+    spans = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    assert [span["attributes"]["index"] for span in spans] == list(range(50))
+    assert sink._writer is None
+
+    # A span exported after close starts a new writer
+    with tracer.span("sparql", index=50):
+        pass
+    sink.close()
+    assert len((tmp_path / "traces.jsonl").read_text().splitlines()) == 51
+
+
+def test_metrics_count_errors_and_cache_lookups():
+    tracer = Tracer()
+    with tracer.span("structured_science_query", "tool") as span:
+        span.status = "error"
+        annotate(embedding_cache_hit=False)
+
+    metrics = tracer.metrics.render()
+    assert 'science_agent_span_errors_total{kind="tool",name="structured_science_query"} 1' in metrics
+    assert 'science_agent_cache_lookups_total{kind="embedding",result="miss"} 1' in metrics
@@ -0,0 +1,38 @@
+import os
+
+import faiss
+import numpy as np
+
+import vector_index
+
+
+def write_flat(path, count=600, dimension=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+    index = faiss.IndexFlatL2(dimension)
+    index.add(vectors)
+    faiss.write_index(index, os.path.join(path, vector_index.FLAT_INDEX_FILE))
+    return vectors
+
+
+def test_benchmark_sweeps_ef_search_on_held_out_queries(tmp_path):
+    write_flat(str(tmp_path))
+    result = vector_index.benchmark(str(tmp_path), {"type": "hnsw"}, queries=50, k=5, sweep=[4, 64])
+
+    assert result["query_source"] == "held_out"
+    assert result["queries"] == 50
+    assert result["vectors"] == 550
+    assert [point["ef_search"] for point in result["curve"]] == [4, 64]
+    assert result["curve"][1]["recall_at_k"] >= result["curve"][0]["recall_at_k"]
+    assert result["curve"][1]["recall_at_k"] > 0.9
+
+
+def test_benchmark_sweeps_nprobe_with_supplied_queries(tmp_path):
+    vectors = write_flat(str(tmp_path))
+    queries = np.random.default_rng(1).normal(size=(20, vectors.shape[1])).astype(np.float32)
+    config = {"type": "ivf_pq", "nlist": 8, "pq_m": 4, "pq_nbits": 8}
+    result = vector_index.benchmark(str(tmp_path), config, k=5, sweep=[1, 8], query_vectors=queries)
+
+    assert result["query_source"] == "supplied"
+    assert result["built_as"] == "ivf_pq"
+    assert result["vectors"] == 600
+    assert [point["nprobe"] for point in result["curve"]] == [1, 8]
@@ -0,0 +1,58 @@
+"""
+Async execution of the Science Agent's tools
+
+Synchronous tools that do real work (evidence grading, claim validation,
+trend analysis, meta-analysis bootstraps) run on a shared worker pool so they
+never block the event loop that parallel tool calls and the PubMed client
+share. Every tool call is bounded by a timeout and traced as a ``tool`` span.
+"""
+
+import re
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import Executor
+from typing import Awaitable, Callable, Optional
+
+from tracing import Tracer
+
+# Tools catch their own exceptions and answer "<Tool> error: ..."
+TOOL_FAILURE = re.compile(r"^[A-Za-z ]+ error: ")
+
+ToolCoroutine = Callable[[str], Awaitable[str]]
+
+logger = logging.getLogger(__name__)
+
+
+def threaded_coroutine(func: Callable[[str], str], executor: Optional[Executor] = None) -> ToolCoroutine:
+    """Async form of a blocking tool, run on executor (the loop's default when None)
+
+    The caller's context is copied into the worker so spans annotated by the
+    tool attach to the tool call that started it.
+    """
+    async def run(tool_input: str) -> str:
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(executor, context.run, func, tool_input)
+    return run
+
+
+def with_timeout(tool_name: str, coroutine: ToolCoroutine, timeout: float, tracer: Tracer) -> ToolCoroutine:
+    """Wrap a tool coroutine with a timeout and a tool span
+
+    A timed-out threaded tool keeps its worker until it returns, but the
+    agent gets the timeout message straight away.
+    """
+    async def run(tool_input: str) -> str:
+        with tracer.span(tool_name, "tool") as span:
+            try:
+                output = await asyncio.wait_for(coroutine(tool_input), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Tool {tool_name} timed out after {timeout}s")
+                span.status = "timeout"
+                return f"{tool_name} timed out after {timeout}s; answer from the other sources"
+            # Tools report failures in their output rather than raising
+            if TOOL_FAILURE.match(output):
+                span.status = "error"
+            span.set(output_chars=len(output))
+            return output
+    return run
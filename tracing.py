@@ -0,0 +1,393 @@
+"""
+Per-query tracing and aggregate metrics for the Science Agent
+
+Every query gets a trace: a root ``query`` span with child spans for each
+agent iteration, LLM call, tool call, retriever lookup and SPARQL execution,
+carrying durations, token counts and cache hits. Finished spans go to the
+configured sinks (a local JSONL file and/or OpenTelemetry, when installed)
+and are folded into in-process metrics served in the Prometheus text format.
+
+Code deeper in the stack marks the current span with ``annotate`` without
+needing to know whether tracing is enabled.
+"""
+
+import os
+import json
+import queue
+import atexit
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("science_agent_span", default=None)
+
+# Histogram bucket upper bounds in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Span:
+    """
+    One timed operation within a query trace
+    """
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start", "end",
+                 "attributes", "status", "active_step", "totals", "counts", "_otel")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+        # On a query span: the agent iteration currently running, parent of its tool calls
+        self.active_step: Optional["Span"] = None
+        # On a root span: seconds spent in descendant spans, by kind
+        self.totals: Dict[str, float] = defaultdict(float)
+        # On a root span: number of descendant spans by kind, and failed ones as "<kind>_errors"
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._otel = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def annotate(**attributes):
+    """Set attributes on the current span, if any"""
+    span = _current.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+class JSONLSpanSink:
+    """
+    Appends finished spans to a JSONL file, one object per line
+
+    Spans are queued and written by a background thread, so finishing a span
+    never touches the disk; each write drains everything queued so far under
+    a single open. Call ``flush`` to wait for queued spans to reach the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        self._queue.put(json.dumps(span.to_dict(), default=str) + "\n")
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write, name="science-agent-traces", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.close)
+
+    def _write(self):
+        while True:
+            lines = [self._queue.get()]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a") as f:
+                    f.writelines(line for line in lines if line is not None)
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+            if None in lines:
+                return
+
+    def flush(self):
+        """Block until every span exported so far is written"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write the remaining spans and stop the writer thread"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+            atexit.unregister(self.close)
+
+
+class Metrics:
+    """
+    Span-derived counters and duration histograms in the Prometheus text format
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (kind, name) -> [bucket counts..., count, sum]
+        self._durations: Dict[Tuple[str, str], List[float]] = {}
+        self._errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._tokens: Dict[str, int] = defaultdict(int)
+        self._cache: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def observe(self, span: Span):
+        key = (span.kind, span.name)
+        duration = span.duration
+        with self._lock:
+            series = self._durations.get(key)
+            if series is None:
+                series = self._durations[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += duration
+            if span.status != "ok":
+                self._errors[key] += 1
+            for kind in ("prompt_tokens", "completion_tokens"):
+                self._tokens[kind] += span.attributes.get(kind, 0) if span.kind == "llm" else 0
+            for attribute, value in span.attributes.items():
+                # cache_hit is about the span's own cache, <layer>_cache_hit about a named layer
+                if attribute.endswith("cache_hit"):
+                    layer = attribute[:-len("_cache_hit")] or span.kind
+                    self._cache[(layer, "hit" if value else "miss")] += 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP science_agent_span_duration_seconds Duration of traced operations",
+            "# TYPE science_agent_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name), series in sorted(self._durations.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'science_agent_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'science_agent_span_duration_seconds_bucket{{{labels},le="+Inf"}} {series[-2]}')
+                lines.append(f"science_agent_span_duration_seconds_count{{{labels}}} {series[-2]}")
+                lines.append(f"science_agent_span_duration_seconds_sum{{{labels}}} {series[-1]}")
+            lines += ["# HELP science_agent_span_errors_total Traced operations that failed",
+                      "# TYPE science_agent_span_errors_total counter"]
+            for (kind, name), count in sorted(self._errors.items()):
+                lines.append(f'science_agent_span_errors_total{{kind="{kind}",name="{name}"}} {count}')
+            lines += ["# HELP science_agent_llm_tokens_total Tokens used by LLM calls",
+                      "# TYPE science_agent_llm_tokens_total counter"]
+            for kind, count in sorted(self._tokens.items()):
+                lines.append(f'science_agent_llm_tokens_total{{type="{kind}"}} {count}')
+            lines += ["# HELP science_agent_cache_lookups_total Cache lookups by layer and result",
+                      "# TYPE science_agent_cache_lookups_total counter"]
+            for (kind, result), count in sorted(self._cache.items()):
+                lines.append(f'science_agent_cache_lookups_total{{kind="{kind}",result="{result}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """
+    Creates spans, tracks the current one per task and exports finished spans
+    """
+
+    def __init__(self, sinks: Optional[List] = None, metrics: Optional[Metrics] = None, otel_tracer=None):
+        self.sinks = sinks or []
+        self.metrics = metrics or Metrics()
+        self.otel_tracer = otel_tracer
+        self._roots: Dict[str, Span] = {}
+
+    @classmethod
+    def from_config(cls, tracing_config: Dict[str, Any], agent_path: str = ".") -> "Tracer":
+        """Build a tracer from the ``tracing`` section of agent_config.yaml"""
+        sinks = []
+        if tracing_config.get("jsonl_path"):
+            sinks.append(JSONLSpanSink(os.path.join(agent_path, tracing_config["jsonl_path"])))
+        otel_tracer = None
+        if tracing_config.get("opentelemetry", False):
+            try:
+                from opentelemetry import trace
+
+                otel_tracer = trace.get_tracer("science-agent")
+            except ImportError:
+                pass
+        return cls(sinks=sinks, otel_tracer=otel_tracer)
+
+    def start(self, name: str, kind: str, parent: Optional[Span] = None, **attributes) -> Span:
+        """Open a span under parent, or under the current span when no parent is given"""
+        if parent is None:
+            parent = _current.get()
+            if parent is not None and parent.active_step is not None:
+                parent = parent.active_step
+        span = Span(name, kind, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None, attributes)
+        if parent is None:
+            self._roots[span.trace_id] = span
+        if self.otel_tracer is not None:
+            from opentelemetry import trace
+
+            context = trace.set_span_in_context(parent._otel) if parent is not None and parent._otel else None
+            span._otel = self.otel_tracer.start_span(name, context=context, start_time=int(span.start * 1e9))
+        return span
+
+    def finish(self, span: Span, error: Optional[BaseException] = None):
+        if span.end is not None:
+            return
+        span.end = time.time()
+        if error is not None:
+            span.status = "error"
+            span.attributes.setdefault("error", str(error))
+        if span.parent_id is None:
+            self._roots.pop(span.trace_id, None)
+        else:
+            root = self._roots.get(span.trace_id)
+            if root is not None:
+                root.totals[span.kind] += span.duration
+                root.counts[span.kind] += 1
+                if span.status != "ok":
+                    root.counts[f"{span.kind}_errors"] += 1
+        if span._otel is not None:
+            from opentelemetry.trace import Status, StatusCode
+
+            for key, value in span.attributes.items():
+                if isinstance(value, (str, bool, int, float)):
+                    span._otel.set_attribute(f"science_agent.{key}", value)
+            if span.status != "ok":
+                span._otel.set_status(Status(StatusCode.ERROR))
+            span._otel.end(end_time=int(span.end * 1e9))
+        self.metrics.observe(span)
+        for sink in self.sinks:
+            sink.export(span)
+
+    def flush(self):
+        """Wait for the sinks to write the spans finished so far"""
+        for sink in self.sinks:
+            flush = getattr(sink, "flush", None)
+            if flush is not None:
+                flush()
+
+    @contextmanager
+    def span(self, name: str, kind: Optional[str] = None, parent: Optional[Span] = None, **attributes):
+        """Run a block inside a new span that becomes the current one"""
+        span = self.start(name, kind or name, parent, **attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.finish(span, e)
+            raise
+        finally:
+            _current.reset(token)
+            self.finish(span)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Turns the agent executor's LLM callbacks into iteration and LLM spans
+
+    Each LLM call starts a new agent iteration; tool spans opened while it
+    runs attach to that iteration through the query span's active step.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracer: Tracer, query_span: Span):
+        self.tracer = tracer
+        self.query_span = query_span
+        self.iterations = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._llm_spans: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    def _next_iteration(self) -> Span:
+        with self._lock:
+            if self.query_span.active_step is not None:
+                self.tracer.finish(self.query_span.active_step)
+            self.iterations += 1
+            step = self.tracer.start("agent.iteration", "iteration", self.query_span, iteration=self.iterations)
+            self.query_span.active_step = step
+            return step
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id, **kwargs):
+        step = self._next_iteration()
+        self._llm_spans[run_id] = self.tracer.start(
+            "llm", "llm", step, model=(serialized or {}).get("name", "unknown"), messages=len(messages[0])
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._llm_spans.pop(run_id, None)
+        if span is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        self.tracer.finish(span)
+
+    def on_llm_error(self, error: BaseException, *, run_id, **kwargs):
+        span = self._llm_spans.pop(run_id, None)
+        if span is not None:
+            self.tracer.finish(span, error)
+
+    def close(self):
+        """Finish the last iteration; call once the agent run is over"""
+        with self._lock:
+            if self.query_span.active_step is not None:
+                self.tracer.finish(self.query_span.active_step)
+                self.query_span.active_step = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: Metrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(metrics: Metrics, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="science-agent-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Approximate-nearest-neighbour indexes for the Science Agent vectorstore
+Usage: python vector_index.py build|benchmark [--agent-path .] [--sweep 1,4,16,64]
+
+The flat index written by ingest.py stays the source of truth. From it an
+IVF-PQ or HNSW index is trained and written next to it.
+
+Memory sharing depends on the index type. With faiss 1.7.4, IO_FLAG_MMAP
+only maps the inverted lists of IVF indexes. Those lists hold the PQ codes
+and ids, which is nearly all of an IVF-PQ index, so workers on a host share
+one page-cached copy. HNSW and flat indexes ignore the flag and are read
+into private memory in every worker. In all cases the docstore (index.pkl)
+is unpickled privately by each worker.
+"""
+
+import os
+import json
+import time
+import pickle
+import argparse
+import logging
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import faiss
+import yaml
+
+FLAT_INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+INDEX_TYPES = ("flat", "ivf_pq", "hnsw")
+
+logger = logging.getLogger(__name__)
+
+
+def ann_index_path(vectorstore_path: str, index_type: str) -> str:
+    return os.path.join(vectorstore_path, f"index.{index_type}.faiss")
+
+
+def _flat_vectors(flat_index) -> np.ndarray:
+    return flat_index.reconstruct_n(0, flat_index.ntotal).astype(np.float32)
+
+
+def _metric(flat_index) -> int:
+    return getattr(flat_index, "metric_type", faiss.METRIC_L2)
+
+
+def ivf_pq_training_minimum(index_config: Dict[str, Any]) -> int:
+    """Fewest vectors IVF-PQ can be trained on: one per product-quantizer centroid"""
+    return 2 ** index_config.get("pq_nbits", 8)
+
+
+def train_ann_index(flat_index, index_config: Dict[str, Any]):
+    """Train and fill the configured ANN index from an in-memory flat index
+
+    Returns None for a flat configuration. Corpora too small to train IVF-PQ
+    get an HNSW index instead, which needs no training.
+    """
+    index_type = index_config.get("type", "flat")
+    if index_type == "flat":
+        return None
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown rag.index.type: {index_type}")
+
+    vectors = _flat_vectors(flat_index)
+    dimension = flat_index.d
+    metric = _metric(flat_index)
+
+    if index_type == "ivf_pq" and len(vectors) < ivf_pq_training_minimum(index_config):
+        logger.warning(
+            f"{len(vectors)} vectors are too few to train IVF-PQ "
+            f"(need {ivf_pq_training_minimum(index_config)}), building HNSW instead"
+        )
+        index_type = "hnsw"
+
+    if index_type == "ivf_pq":
+        # Keep at least ~39 training points per centroid, as faiss recommends
+        nlist = max(1, min(index_config.get("nlist", 1024), len(vectors) // 39))
+        pq_m = index_config.get("pq_m", 16)
+        if dimension % pq_m:
+            raise ValueError(f"rag.index.pq_m ({pq_m}) must divide the embedding dimension ({dimension})")
+        quantizer = faiss.IndexFlat(dimension, metric)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, index_config.get("pq_nbits", 8), metric)
+        index.train(vectors)
+    else:
+        index = faiss.IndexHNSWFlat(dimension, index_config.get("hnsw_m", 32), metric)
+        index.hnsw.efConstruction = index_config.get("ef_construction", 200)
+
+    # Row i of the ANN index must stay row i of the flat index for index_to_docstore_id
+    index.add(vectors)
+    return index
+
+
+def write_ann_index(index, vectorstore_path: str, index_type: str) -> str:
+    """Atomically write a trained ANN index under the configured type's file name"""
+    path = ann_index_path(vectorstore_path, index_type)
+    faiss.write_index(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def build_ann_index(vectorstore_path: str, index_config: Dict[str, Any]) -> Optional[str]:
+    """Train the configured ANN index from the saved flat index and write it to disk"""
+    flat_index = faiss.read_index(os.path.join(vectorstore_path, FLAT_INDEX_FILE))
+    index = train_ann_index(flat_index, index_config)
+    if index is None:
+        return None
+    return write_ann_index(index, vectorstore_path, index_config["type"])
+
+
+def configure_search(index, index_config: Dict[str, Any]):
+    """Apply query-time parameters (nprobe, efSearch) to a loaded index
+
+    Dispatches on the loaded index rather than the configured type, since a
+    small corpus configured for IVF-PQ is written as HNSW.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = index_config.get("nprobe", 16)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = index_config.get("ef_search", 64)
+
+
+def read_index(vectorstore_path: str, index_config: Dict[str, Any]):
+    """Open the configured ANN index read-only (IVF lists memory-mapped), if it is up to date"""
+    path = ann_index_path(vectorstore_path, index_config.get("type", "flat"))
+    flat_path = os.path.join(vectorstore_path, FLAT_INDEX_FILE)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(flat_path):
+        return None
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if index_config.get("mmap", True) else 0
+    index = faiss.read_index(path, flags)
+    configure_search(index, index_config)
+    return index
+
+
+def load_vectorstore(vectorstore_path: str, embeddings, index_config: Dict[str, Any]):
+    """Build a LangChain FAISS vectorstore around the on-disk ANN index
+
+    Returns None when no ANN index is configured or it is missing or stale, in
+    which case callers fall back to the flat index.
+    """
+    if index_config.get("type", "flat") == "flat":
+        return None
+    index = read_index(vectorstore_path, index_config)
+    if index is None:
+        logger.warning("ANN index missing or older than the flat index, run `python vector_index.py build`")
+        return None
+
+    from langchain_community.vectorstores import FAISS
+
+    with open(os.path.join(vectorstore_path, DOCSTORE_FILE), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def _timed_search(index, query_vectors: np.ndarray, k: int):
+    latencies = np.empty(len(query_vectors))
+    results = np.empty((len(query_vectors), k), dtype=np.int64)
+    for i, vector in enumerate(query_vectors):
+        start = time.perf_counter()
+        _, ids = index.search(vector[None, :], k)
+        latencies[i] = time.perf_counter() - start
+        results[i] = ids[0]
+    return results, latencies * 1000
+
+
+def _latency(ms: np.ndarray) -> Dict[str, float]:
+    return {"p50": float(np.percentile(ms, 50)), "p95": float(np.percentile(ms, 95))}
+
+
+def benchmark(
+    vectorstore_path: str,
+    index_config: Dict[str, Any],
+    queries: int = 200,
+    k: int = 5,
+    sweep: Optional[List[int]] = None,
+    query_vectors: Optional[np.ndarray] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Recall@k against latency for the ANN index across nprobe or efSearch values
+
+    Without query_vectors, ``queries`` stored vectors are held out: the ANN
+    index and the exact flat index are rebuilt from the remaining vectors and
+    searched with the held-out ones, so no query is its own nearest
+    neighbour. Pass query_vectors (e.g. embedded real queries) to search the
+    full corpus instead. sweep lists the nprobe (IVF) or efSearch (HNSW)
+    values to measure; it defaults to the configured value.
+    """
+    flat_index = faiss.read_index(os.path.join(vectorstore_path, FLAT_INDEX_FILE))
+    vectors = _flat_vectors(flat_index)
+    metric = _metric(flat_index)
+
+    query_source = "held_out" if query_vectors is None else "supplied"
+    if query_vectors is None:
+        rng = np.random.default_rng(seed)
+        held_out = np.zeros(len(vectors), dtype=bool)
+        held_out[rng.choice(len(vectors), size=min(queries, len(vectors) // 2), replace=False)] = True
+        query_vectors = vectors[held_out]
+        flat_index = faiss.IndexFlat(flat_index.d, metric)
+        flat_index.add(vectors[~held_out])
+    query_vectors = np.ascontiguousarray(query_vectors, dtype=np.float32)
+
+    ann_index = train_ann_index(flat_index, index_config)
+    if ann_index is None:
+        raise ValueError("rag.index.type is flat, nothing to benchmark")
+
+    ivf = faiss.try_extract_index_ivf(ann_index)
+    parameter = "nprobe" if ivf is not None else "ef_search"
+    values = sweep or [index_config.get(parameter, 16 if ivf is not None else 64)]
+
+    truth, flat_ms = _timed_search(flat_index, query_vectors, k)
+    curve = []
+    for value in values:
+        configure_search(ann_index, {**index_config, parameter: value})
+        found, ann_ms = _timed_search(ann_index, query_vectors, k)
+        recall = np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+        curve.append({parameter: value, "recall_at_k": round(float(recall), 4), "latency_ms": _latency(ann_ms)})
+
+    ann_path = ann_index_path(vectorstore_path, index_config.get("type"))
+    return {
+        "index_type": index_config.get("type"),
+        "built_as": "ivf_pq" if ivf is not None else "hnsw",
+        "vectors": int(flat_index.ntotal),
+        "queries": len(query_vectors),
+        "query_source": query_source,
+        "k": k,
+        "flat_latency_ms": _latency(flat_ms),
+        "curve": curve,
+        "flat_bytes": os.path.getsize(os.path.join(vectorstore_path, FLAT_INDEX_FILE)),
+        "ann_bytes": os.path.getsize(ann_path) if os.path.exists(ann_path) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or benchmark the ANN vectorstore index')
+    parser.add_argument('command', choices=['build', 'benchmark'])
+    parser.add_argument('--agent-path', type=str, default='.', help='Agent directory containing agent_config.yaml')
+    parser.add_argument('--type', type=str, choices=INDEX_TYPES, help='Override rag.index.type')
+    parser.add_argument('--queries', type=int, default=200, help='Stored vectors held out as benchmark queries')
+    parser.add_argument('--query-file', type=str, help='.npy array of embedded real queries to use instead')
+    parser.add_argument('--sweep', type=str, help='Comma-separated nprobe/efSearch values (default: configured value)')
+    parser.add_argument('--k', type=int, default=None, help='Benchmark k (default: rag.retrieval_k)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(os.path.join(args.agent_path, "agent_config.yaml"), "r") as f:
+        rag_config = (yaml.safe_load(f) or {}).get("rag", {})
+    index_config = dict(rag_config.get("index", {}))
+    if args.type:
+        index_config["type"] = args.type
+    vectorstore_path = os.path.join(args.agent_path, "rag", "vectorstore")
+
+    if args.command == "build":
+        path = build_ann_index(vectorstore_path, index_config)
+        print(f"Wrote {path}" if path else "rag.index.type is flat, nothing to build")
+    else:
+        k = args.k or rag_config.get("retrieval_k", 5)
+        sweep = [int(value) for value in args.sweep.split(",")] if args.sweep else None
+        query_vectors = np.load(args.query_file) if args.query_file else None
+        print(json.dumps(benchmark(vectorstore_path, index_config, args.queries, k, sweep, query_vectors), indent=2))
+
+
+if __name__ == "__main__":
+    main()